@@ -0,0 +1,6119 @@
+import sqlite3
+import csv
+from datetime import datetime, date, timedelta
+import random
+import re
+from tabulate import tabulate
+import os
+import gzip
+import io
+import time
+import configparser
+import tempfile
+import argparse
+import sys
+import asyncio
+import json
+import pathlib
+import signal
+import shutil
+import concurrent.futures
+import threading
+import bisect
+import heapq
+from array import array
+from itertools import accumulate, compress
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Connection settings. 'default' keeps SQLite's stock behaviour; 'performance'
+# uses WAL so readers don't block while a clerk is writing, fsyncs only at
+# checkpoints, and gives SQLite a larger page cache and memory-mapped I/O.
+CONNECTION_PROFILES = {
+    'default': {
+        'cached_statements': 128,
+        'pragmas': {},
+    },
+    'performance': {
+        'cached_statements': 512,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 268435456,  # 256 MB
+            'cache_size': -65536,    # 64 MB (negative means KiB)
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+DEFAULT_DB_PATH = 'superstore.db'
+DEFAULT_CONFIG_FILE = 'superstore.ini'
+
+def load_db_config():
+    """Read database settings from superstore.ini, overridden by environment variables.
+
+    The config file (or the one named by SUPERSTORE_CONFIG) may contain:
+
+        [database]
+        path = superstore.db
+        profile = performance
+        mmap_size = 1073741824
+
+    Any key other than path/profile/cached_statements is applied as a PRAGMA.
+    SUPERSTORE_DB and SUPERSTORE_DB_PROFILE override path and profile.
+    """
+    config = {'path': DEFAULT_DB_PATH, 'profile': 'default', 'overrides': {}}
+
+    parser = configparser.ConfigParser()
+    parser.read(os.environ.get('SUPERSTORE_CONFIG', DEFAULT_CONFIG_FILE))
+    if parser.has_section('database'):
+        for key, value in parser.items('database'):
+            if key in ('path', 'profile'):
+                config[key] = value
+            else:
+                config['overrides'][key] = value
+
+    config['path'] = os.environ.get('SUPERSTORE_DB', config['path'])
+    config['profile'] = os.environ.get('SUPERSTORE_DB_PROFILE', config['profile'])
+    return config
+
+def connect_db(path=None, profile=None, overrides=None, read_only=False, **kwargs):
+    """Open a connection tuned by the named profile from CONNECTION_PROFILES.
+
+    read_only opens the file with mode=ro and leaves the journal mode, which
+    belongs to the database rather than the connection, to the writer.
+    """
+    config = load_db_config()
+    path = path or config['path']
+    profile = profile or config['profile']
+    if overrides is None:
+        overrides = config['overrides']
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(f"Unknown connection profile '{profile}'. "
+                         f"Choose from: {', '.join(CONNECTION_PROFILES)}")
+
+    settings = dict(CONNECTION_PROFILES[profile]['pragmas'])
+    settings.update(overrides)
+    cached_statements = int(settings.pop('cached_statements',
+                                         CONNECTION_PROFILES[profile]['cached_statements']))
+
+    if read_only:
+        settings.pop('journal_mode', None)
+        path = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+        kwargs['uri'] = True
+    connection = sqlite3.connect(path, cached_statements=cached_statements, **kwargs)
+    for pragma, value in settings.items():
+        if not pragma.replace('_', '').isalnum() or not str(value).lstrip('-').isalnum():
+            raise ValueError(f"Invalid setting {pragma} = {value}")
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    return connection
+
+# Instrumentation. When enabled (SUPERSTORE_STATS=1, [stats] enabled = yes in
+# superstore.ini, or --stats), open_database() wraps the connection and cursor
+# so every execute/executemany and commit is timed into a StatementStats.
+# When disabled the plain sqlite3 objects are used, so there is no overhead.
+STATS_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]  # seconds
+DEFAULT_SLOW_MS = 100
+DEFAULT_SLOW_LOG = 'superstore_slow.log'
+
+def load_stats_config():
+    """Read instrumentation settings from the [stats] section, overridden by environment variables"""
+    parser = configparser.ConfigParser()
+    parser.read(os.environ.get('SUPERSTORE_CONFIG', DEFAULT_CONFIG_FILE))
+    section = parser['stats'] if parser.has_section('stats') else {}
+    enabled = os.environ.get('SUPERSTORE_STATS', section.get('enabled', 'no'))
+    return {
+        'enabled': enabled.strip().lower() in ('1', 'yes', 'true', 'on'),
+        'slow_ms': float(os.environ.get('SUPERSTORE_SLOW_MS', section.get('slow_ms', DEFAULT_SLOW_MS))),
+        'slow_log': os.environ.get('SUPERSTORE_SLOW_LOG', section.get('slow_log', DEFAULT_SLOW_LOG)),
+    }
+
+class StatementStats:
+    """Latency histograms and row counts per SQL statement, plus commit timings and a slow-query log"""
+
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, slow_log=DEFAULT_SLOW_LOG):
+        self.slow_seconds = slow_ms / 1000
+        self.slow_log = slow_log
+        self.reset()
+
+    def reset(self):
+        self.statements = {}
+        self.commits = self.new_entry()
+        self.slow_count = 0
+        self.started = time.time()
+        # Raw SQL -> collapsed text, so whitespace is normalised once per distinct string
+        self.names = {}
+
+    def new_entry(self):
+        return {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0, 'fetch_seconds': 0.0,
+                'buckets': [0] * (len(STATS_BUCKETS) + 1)}
+
+    def entry(self, sql):
+        name = self.names.get(sql)
+        if name is None:
+            name = self.names[sql] = ' '.join(sql.split())
+        entry = self.statements.get(name)
+        if entry is None:
+            entry = self.statements[name] = self.new_entry()
+        return entry
+
+    def record(self, entry, elapsed, rows=0, sql=None, params=None):
+        entry['calls'] += 1
+        entry['seconds'] += elapsed
+        entry['rows'] += rows
+        if elapsed > entry['max_seconds']:
+            entry['max_seconds'] = elapsed
+        entry['buckets'][bisect.bisect_left(STATS_BUCKETS, elapsed)] += 1
+        if elapsed >= self.slow_seconds:
+            self.log_slow(elapsed, rows, sql, params)
+
+    def log_slow(self, elapsed, rows, sql, params):
+        self.slow_count += 1
+        if not self.slow_log:
+            return
+        statement = ' '.join(sql.split()) if sql else 'COMMIT'
+        params = repr(params)[:200] if params is not None else ''
+        with open(self.slow_log, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().isoformat(timespec='milliseconds')}\t{elapsed * 1000:.1f} ms\t"
+                    f"{rows} rows\t{statement}\t{params}\n")
+
+    def summary(self, limit=None):
+        """(statement, calls, total ms, mean ms, p50 ms, p99 ms, max ms, rows) rows, slowest total first"""
+        rows = []
+        for name, entry in sorted(self.statements.items(), key=lambda item: -item[1]['seconds']):
+            rows.append((name, entry['calls'], entry['seconds'] * 1000,
+                         entry['seconds'] / entry['calls'] * 1000 if entry['calls'] else 0.0,
+                         self.bucket_percentile(entry, 50) * 1000, self.bucket_percentile(entry, 99) * 1000,
+                         entry['max_seconds'] * 1000, entry['rows']))
+        return rows[:limit] if limit else rows
+
+    @staticmethod
+    def bucket_percentile(entry, pct):
+        """Upper bound of the histogram bucket holding the pct-th percentile (the max for the last one)"""
+        target = entry['calls'] * pct / 100
+        seen = 0
+        for bound, count in zip(STATS_BUCKETS + [entry['max_seconds']], entry['buckets']):
+            seen += count
+            if count and seen >= target:
+                return min(bound, entry['max_seconds'])
+        return 0.0
+
+    def to_dict(self):
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'buckets': STATS_BUCKETS,
+            'slow_ms': self.slow_seconds * 1000,
+            'slow_queries': self.slow_count,
+            'commits': self.commits,
+            'statements': self.statements,
+        }
+
+    def to_prometheus(self):
+        """The stats in Prometheus text exposition format"""
+        def label(text):
+            return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        def histogram(metric, labels, entry):
+            lines, total = [], 0
+            for bound, count in zip(STATS_BUCKETS + ['+Inf'], entry['buckets']):
+                total += count
+                lines.append(f'{metric}_bucket{{{labels}le="{bound}"}} {total}')
+            lines.append(f"{metric}_sum{{{labels.rstrip(',')}}} {entry['seconds']}")
+            lines.append(f"{metric}_count{{{labels.rstrip(',')}}} {entry['calls']}")
+            return lines
+
+        lines = ['# HELP superstore_statement_seconds Time spent in execute/executemany per statement',
+                 '# TYPE superstore_statement_seconds histogram']
+        for name, entry in self.statements.items():
+            lines += histogram('superstore_statement_seconds', f'statement="{label(name)}",', entry)
+        lines += ['# HELP superstore_statement_rows_total Rows changed or fetched per statement',
+                  '# TYPE superstore_statement_rows_total counter']
+        lines += [f'superstore_statement_rows_total{{statement="{label(name)}"}} {entry["rows"]}'
+                  for name, entry in self.statements.items()]
+        lines += ['# HELP superstore_commit_seconds Time spent in commit, including the fsync',
+                  '# TYPE superstore_commit_seconds histogram']
+        lines += histogram('superstore_commit_seconds', '', self.commits)
+        lines += ['# HELP superstore_slow_queries_total Statements and commits over the slow threshold',
+                  '# TYPE superstore_slow_queries_total counter',
+                  f'superstore_slow_queries_total {self.slow_count}']
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename):
+        """Write the stats to filename: Prometheus text for .prom/.txt, JSON otherwise"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            if filename.endswith(('.prom', '.txt')):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """A cursor that times every statement into the global STATS"""
+
+    def execute(self, sql, parameters=()):
+        entry = STATS.entry(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._stats_entry = entry
+            STATS.record(entry, time.perf_counter() - start, max(self.rowcount, 0), sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        entry = STATS.entry(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._stats_entry = None
+            STATS.record(entry, time.perf_counter() - start, max(self.rowcount, 0), sql)
+
+    def fetch(self, method, *args):
+        start = time.perf_counter()
+        rows = method(*args)
+        entry = getattr(self, '_stats_entry', None)
+        if entry is not None:
+            entry['fetch_seconds'] += time.perf_counter() - start
+            entry['rows'] += len(rows) if isinstance(rows, list) else rows is not None
+        return rows
+
+    def fetchone(self):
+        return self.fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self.fetch(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self.fetch(super().fetchall)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection whose cursors are instrumented and whose commits are timed"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            STATS.record(STATS.commits, time.perf_counter() - start)
+
+STATS = None
+
+# The connection is opened by open_database(), so importing this module has no side effects
+con = None
+cur = None
+
+def open_database(path=None, profile=None, stats=None):
+    """Connect to the database, bring its schema up to date and return the connection.
+
+    stats turns instrumentation on or off, defaulting to load_stats_config().
+    """
+    global con, cur, STATS
+    config = load_stats_config()
+    if config['enabled'] if stats is None else stats:
+        if STATS is None:
+            STATS = StatementStats(config['slow_ms'], config['slow_log'])
+        con = connect_db(path, profile, factory=InstrumentedConnection)
+    else:
+        STATS = None
+        con = connect_db(path, profile)
+    cur = con.cursor()
+    register_sql_functions(con)
+    run_migrations()
+    invalidate_product_catalog()
+    return con
+
+def database_path(connection):
+    """File name of the main database behind connection"""
+    for _, name, filename in connection.execute("PRAGMA database_list"):
+        if name == 'main':
+            return filename
+    raise ValueError("Connection has no main database")
+
+def close_database():
+    """Refresh planner statistics if they have drifted, then close the connection"""
+    global con, cur
+    if con is not None:
+        cur.execute("PRAGMA optimize")
+        con.close()
+        con = cur = None
+
+# Schema migrations, applied in order. PRAGMA user_version records how many
+# have run, so a database that is already current costs a single read at
+# startup. Add new schema changes as a new function at the end of MIGRATIONS;
+# never edit one that has shipped, except to drop work a later migration redoes.
+def table_exists(name):
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,))
+    return cur.fetchone() is not None
+
+def migrate_create_products():
+    if table_exists('products'):
+        return
+    # Create Products table
+    cur.execute("""
+    CREATE TABLE products(
+        product_id VARCHAR(20) PRIMARY KEY,
+        category VARCHAR(20),
+        sub_category VARCHAR(20),
+        product_name VARCHAR(100),
+        unit_price FLOAT
+    )""")
+    print('Products table created')
+
+    # Insert predefined products
+    products_data = [
+        ('PROD-001', 'Furniture', 'Chairs', 'Executive Leather Chair', 299.99),
+        ('PROD-002', 'Furniture', 'Tables', 'L-Shape Office Desk', 449.99),
+        ('PROD-003', 'Furniture', 'Chairs', 'Ergonomic Mesh Chair', 189.99),
+        ('PROD-004', 'Furniture', 'Tables', 'Conference Table', 799.99),
+        ('PROD-005', 'Furniture', 'Storage', 'Bookshelf', 159.99),
+        ('PROD-006', 'Office Supplies', 'Storage', 'File Cabinet', 129.99),
+        ('PROD-007', 'Office Supplies', 'Paper', 'Printer Paper Box', 45.99),
+        ('PROD-008', 'Office Supplies', 'Binders', 'Heavy Duty Binder', 18.99),
+        ('PROD-009', 'Office Supplies', 'Supplies', 'Stapler Set', 12.99),
+        ('PROD-010', 'Office Supplies', 'Art', 'Whiteboard', 89.99),
+        ('PROD-011', 'Technology', 'Phones', 'VoIP Phone System', 299.99),
+        ('PROD-012', 'Technology', 'Accessories', 'Wireless Mouse', 29.99),
+        ('PROD-013', 'Technology', 'Machines', 'Color Laser Printer', 499.99),
+        ('PROD-014', 'Technology', 'Copiers', 'Heavy Duty Copier', 1299.99),
+        ('PROD-015', 'Technology', 'Accessories', 'Mechanical Keyboard', 89.99),
+    ]
+    cur.executemany("INSERT INTO products VALUES(?, ?, ?, ?, ?)", products_data)
+
+def migrate_create_customers():
+    if table_exists('customers'):
+        return
+    # Create Customers table
+    cur.execute("""
+    CREATE TABLE customers(
+        customer_id VARCHAR(20) PRIMARY KEY,
+        customer_name VARCHAR(50),
+        segment VARCHAR(20),
+        country VARCHAR(50),
+        city VARCHAR(50),
+        state VARCHAR(50),
+        postal_code VARCHAR(10),
+        region VARCHAR(20)
+    )""")
+    print('Customers table created')
+
+def migrate_create_orders():
+    if table_exists('orders'):
+        return
+    # Create Orders table with foreign keys
+    cur.execute("""
+    CREATE TABLE orders(
+        order_id VARCHAR(20) PRIMARY KEY,
+        order_date DATE,
+        ship_date DATE,
+        ship_mode VARCHAR(20),
+        customer_id VARCHAR(20),
+        product_id VARCHAR(20),
+        quantity INT,
+        discount FLOAT,
+        sales FLOAT,
+        profit FLOAT,
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id)
+    )""")
+    print('Orders table created')
+
+def migrate_add_indexes():
+    # Secondary indexes for the customer/product deletes, date ranges and the report joins
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders(customer_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_product_id ON orders(product_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders(order_date)")
+    # Covering indexes let the orders join read customer/product columns from the index alone
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_customers_report
+    ON customers(customer_id, customer_name, segment, country, city, state, region)
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_products_report
+    ON products(product_id, product_name, category, sub_category, unit_price)
+    """)
+    # The planner only prefers the covering indexes once it has statistics
+    cur.execute("ANALYZE")
+
+def migrate_create_sales_summary():
+    # Filled and wired up with triggers by migrate_split_order_lines
+    create_sales_summary()
+    print('Sales summary table created')
+
+# Line-level columns that move from orders to order_lines; anything else on
+# orders (including columns added through Alter Table) stays on the header
+ORDER_LINE_COLUMNS = ['product_id', 'quantity', 'discount', 'sales', 'profit']
+
+def migrate_split_order_lines():
+    # One order can now hold several products: orders keeps the header and
+    # order_lines holds one row per product. Existing orders become one-line orders.
+    for trigger in SALES_SUMMARY_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cur.execute("""
+    CREATE TABLE order_lines(
+        order_id VARCHAR(20),
+        line_number INT,
+        product_id VARCHAR(20),
+        quantity INT,
+        discount FLOAT,
+        sales FLOAT,
+        profit FLOAT,
+        PRIMARY KEY (order_id, line_number),
+        FOREIGN KEY (order_id) REFERENCES orders(order_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id)
+    )""")
+    cur.execute("""
+    INSERT INTO order_lines
+    SELECT order_id, 1, product_id, quantity, discount, sales, profit FROM orders
+    """)
+
+    cur.execute("PRAGMA table_info(orders)")
+    extra = [(row[1], row[2]) for row in cur.fetchall()
+             if row[1] not in ORDER_LINE_COLUMNS + ['order_id', 'order_date', 'ship_date', 'ship_mode', 'customer_id']]
+    extra_defs = ''.join(f",\n        {name} {col_type}" for name, col_type in extra)
+    cur.execute(f"""
+    CREATE TABLE orders_header(
+        order_id VARCHAR(20) PRIMARY KEY,
+        order_date DATE,
+        ship_date DATE,
+        ship_mode VARCHAR(20),
+        customer_id VARCHAR(20){extra_defs},
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    )""")
+    columns = ', '.join(['order_id', 'order_date', 'ship_date', 'ship_mode', 'customer_id'] + [name for name, _ in extra])
+    cur.execute(f"INSERT INTO orders_header({columns}) SELECT {columns} FROM orders")
+    cur.execute("DROP TABLE orders")
+    cur.execute("ALTER TABLE orders_header RENAME TO orders")
+
+    cur.execute("CREATE INDEX idx_orders_customer_id ON orders(customer_id)")
+    cur.execute("CREATE INDEX idx_orders_order_date ON orders(order_date)")
+    cur.execute("CREATE INDEX idx_order_lines_product_id ON order_lines(product_id)")
+    cur.execute("ANALYZE")
+
+    create_sales_summary_triggers()
+    cur.execute("DELETE FROM sales_summary")
+    cur.execute("INSERT INTO sales_summary " + SUMMARY_AGGREGATE_QUERY)
+    print('Order lines table created')
+
+# Full-text indexes: table -> (FTS5 table, indexed columns, key column). The
+# FTS tables are external-content tables over the base table's rowid, so the
+# text is stored once; triggers keep them in sync. prefix='2 3' adds indexes
+# for two and three character prefixes, which type-ahead search hits most.
+SEARCH_INDEXES = {
+    'customers': ('customers_fts', ['customer_name', 'city', 'state', 'postal_code'], 'customer_id'),
+    'products': ('products_fts', ['product_name', 'category', 'sub_category'], 'product_id'),
+}
+
+def migrate_create_search_indexes():
+    for table_name, (fts, columns, _) in SEARCH_INDEXES.items():
+        cur.execute(f"""
+        CREATE VIRTUAL TABLE {fts} USING fts5(
+            {', '.join(columns)},
+            content='{table_name}', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+    rebuild_search_indexes()
+    create_search_triggers()
+    print('Search indexes created')
+
+def search_triggers():
+    """(name, CREATE TRIGGER statement) for the triggers keeping each FTS table in step with its table"""
+    triggers = []
+    for table_name, (fts, columns, _) in SEARCH_INDEXES.items():
+        column_list = ', '.join(columns)
+        old_values = ', '.join(f"OLD.{column}" for column in columns)
+        new_values = ', '.join(f"NEW.{column}" for column in columns)
+        triggers += [(f"{fts}_insert", f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table_name}
+        BEGIN
+            INSERT INTO {fts}(rowid, {column_list}) VALUES(NEW.rowid, {new_values});
+        END"""), (f"{fts}_delete", f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table_name}
+        BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES('delete', OLD.rowid, {old_values});
+        END"""), (f"{fts}_update", f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {column_list} ON {table_name}
+        BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES('delete', OLD.rowid, {old_values});
+            INSERT INTO {fts}(rowid, {column_list}) VALUES(NEW.rowid, {new_values});
+        END""")]
+    return triggers
+
+def create_search_triggers():
+    for name, statement in search_triggers():
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cur.execute(statement)
+
+def drop_search_triggers():
+    """Stop maintaining the FTS tables, for bulk loads that call rebuild_search_indexes() afterwards"""
+    for name, _ in search_triggers():
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def rebuild_search_indexes():
+    """Re-read every FTS table from its base table, e.g. after a bulk load or a VACUUM that moved rowids"""
+    for fts, _, _ in SEARCH_INDEXES.values():
+        cur.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+
+def migrate_create_change_log():
+    # AUTOINCREMENT so a seq is never reused after the log is trimmed
+    cur.execute("""
+    CREATE TABLE change_log(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name VARCHAR(20),
+        row_key VARCHAR(20)
+    )""")
+    cur.execute("""
+    CREATE TABLE sync_watermarks(
+        consumer VARCHAR(50) PRIMARY KEY,
+        last_seq INTEGER,
+        synced_at TEXT
+    )""")
+    create_change_triggers()
+    print('Change log created')
+
+# Change tracking: table -> (export it belongs to, key column). Order lines are
+# logged under their order, so a changed line re-exports the whole order.
+CHANGE_TRACKED = {
+    'orders': ('orders', 'order_id'),
+    'order_lines': ('orders', 'order_id'),
+    'customers': ('customers', 'customer_id'),
+    'products': ('products', 'product_id'),
+}
+
+# Exported orders carry customer and product columns, so changing one of these
+# also logs the orders that show it: table -> (columns, query for the order ids)
+CHANGE_CASCADES = {
+    'customers': (['customer_name', 'segment', 'country', 'city', 'state'],
+                  "SELECT order_id FROM orders WHERE customer_id = NEW.customer_id"),
+    'products': (['product_name', 'category', 'sub_category'],
+                 "SELECT DISTINCT order_id FROM order_lines WHERE product_id = NEW.product_id"),
+}
+
+# trim_change_log() drops the entries every registered consumer has received.
+# While no consumer is registered it keeps the newest CHANGE_LOG_RETENTION
+# entries, so a store that never syncs can still be cut back (changes --trim or
+# Maintenance). Deletes run CHANGE_LOG_TRIM_BATCH entries per transaction.
+CHANGE_LOG_RETENTION = 500000
+CHANGE_LOG_TRIM_BATCH = 50000
+
+def change_triggers():
+    """(name, CREATE TRIGGER statement) for the triggers appending each changed key to change_log"""
+    triggers = []
+    for table_name, (export, key) in CHANGE_TRACKED.items():
+        log = f"INSERT INTO change_log(table_name, row_key)"
+        triggers += [(f"change_log_{table_name}_insert", f"""
+        CREATE TRIGGER change_log_{table_name}_insert AFTER INSERT ON {table_name}
+        BEGIN
+            {log} VALUES('{export}', NEW.{key});
+        END"""), (f"change_log_{table_name}_delete", f"""
+        CREATE TRIGGER change_log_{table_name}_delete AFTER DELETE ON {table_name}
+        BEGIN
+            {log} VALUES('{export}', OLD.{key});
+        END"""), (f"change_log_{table_name}_update", f"""
+        CREATE TRIGGER change_log_{table_name}_update AFTER UPDATE ON {table_name}
+        BEGIN
+            {log} VALUES('{export}', NEW.{key});
+            {log} SELECT '{export}', OLD.{key} WHERE OLD.{key} IS NOT NEW.{key};
+        END""")]
+    for table_name, (columns, orders_query) in CHANGE_CASCADES.items():
+        changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+        triggers.append((f"change_log_{table_name}_orders", f"""
+        CREATE TRIGGER change_log_{table_name}_orders AFTER UPDATE OF {', '.join(columns)} ON {table_name}
+        WHEN {changed}
+        BEGIN
+            INSERT INTO change_log(table_name, row_key) SELECT 'orders', order_id FROM ({orders_query});
+        END"""))
+    return triggers
+
+def create_change_triggers():
+    for name, statement in change_triggers():
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cur.execute(statement)
+
+def drop_change_triggers():
+    """Stop logging changes, for bulk moves that are not changes to the data (archiving, generation)"""
+    for name, _ in change_triggers():
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def migrate_create_purge_jobs():
+    # One row per batched purge; last_rowid is the cursor a resumed job continues from
+    cur.execute("""
+    CREATE TABLE purge_jobs(
+        job_id INTEGER PRIMARY KEY,
+        kind VARCHAR(20),
+        filters TEXT,
+        last_rowid INTEGER,
+        high_rowid INTEGER,
+        deleted INTEGER,
+        status VARCHAR(10),
+        started_at TEXT,
+        finished_at TEXT
+    )""")
+    print('Purge jobs table created')
+
+def migrate_add_date_dimensions():
+    # Dates stay ISO text, so every range comparison keeps working; rows typed
+    # in another layout are rewritten, unreadable ones are left to be fixed
+    cur.execute("""
+    UPDATE orders SET order_date = iso_date(order_date), ship_date = iso_date(ship_date)
+    WHERE order_date IS NOT iso_date(order_date) OR ship_date IS NOT iso_date(ship_date)
+    """)
+    if cur.rowcount:
+        print(f"{cur.rowcount} orders had their dates rewritten as YYYY-MM-DD")
+    # Computed on read and stored in the index, which SQLite 3.41+ reads instead of calling julianday()
+    cur.execute("""
+    ALTER TABLE orders ADD COLUMN lead_days INTEGER
+    GENERATED ALWAYS AS (julianday(ship_date) - julianday(order_date)) VIRTUAL
+    """)
+    cur.execute("CREATE INDEX idx_orders_lead_time ON orders(order_date, ship_mode, lead_days)")
+    cur.execute("SELECT COUNT(*) FROM orders WHERE lead_days IS NULL")
+    unreadable = cur.fetchone()[0]
+    if unreadable:
+        print(f"Warning: {unreadable} orders have a date that could not be read; fix them with Update Records")
+
+    cur.execute("""
+    CREATE TABLE calendar(
+        day DATE PRIMARY KEY,
+        day_number INTEGER,
+        year INTEGER,
+        quarter VARCHAR(7),
+        month VARCHAR(7),
+        week VARCHAR(8),
+        weekday INTEGER,
+        weekday_name VARCHAR(9)
+    ) WITHOUT ROWID""")
+    for period in ('quarter', 'month', 'week', 'weekday'):
+        cur.execute(f"CREATE INDEX idx_calendar_{period} ON calendar({period}, day)")
+    fill_calendar()
+    cur.execute("ANALYZE orders")
+    cur.execute("ANALYZE calendar")
+    print('Date dimensions created')
+
+def migrate_bound_change_log():
+    # Trimming used to be a trigger on change_log; it now runs from export_changes
+    cur.execute("DROP TRIGGER IF EXISTS change_log_retention")
+    deleted = trim_change_log(commit=False)
+    print(f"Change log trimmed ({deleted} entries no consumer needs removed)")
+
+def migrate_key_purge_cursor():
+    # Purge cursors move from rowids, which VACUUM may renumber, to Order IDs.
+    # A rowid cursor cannot be turned into an Order ID, so unfinished jobs start
+    # over; everything they already deleted is gone, so that only costs a rescan.
+    cur.execute("""
+    CREATE TABLE purge_jobs_keyed(
+        job_id INTEGER PRIMARY KEY,
+        kind VARCHAR(20),
+        filters TEXT,
+        last_key VARCHAR(20),
+        high_key VARCHAR(20),
+        deleted INTEGER,
+        status VARCHAR(10),
+        started_at TEXT,
+        finished_at TEXT
+    )""")
+    cur.execute("""
+    INSERT INTO purge_jobs_keyed
+    SELECT job_id, kind, filters, CASE WHEN status = 'running' THEN '' END,
+           CASE WHEN status = 'running' THEN (SELECT COALESCE(MAX(order_id), '') FROM orders) END,
+           deleted, status, started_at, finished_at
+    FROM purge_jobs
+    """)
+    cur.execute("DROP TABLE purge_jobs")
+    cur.execute("ALTER TABLE purge_jobs_keyed RENAME TO purge_jobs")
+    print('Purge jobs now resume by Order ID')
+
+MIGRATIONS = [
+    migrate_create_products,
+    migrate_create_customers,
+    migrate_create_orders,
+    migrate_add_indexes,
+    migrate_create_sales_summary,
+    migrate_split_order_lines,
+    migrate_create_search_indexes,
+    migrate_create_change_log,
+    migrate_create_purge_jobs,
+    migrate_add_date_dimensions,
+    migrate_bound_change_log,
+    migrate_key_purge_cursor,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def run_migrations():
+    """Bring the database up to SCHEMA_VERSION, one transaction per migration"""
+    cur.execute("PRAGMA user_version")
+    version = cur.fetchone()[0]
+    if version > SCHEMA_VERSION:
+        print(f"Warning: database schema version {version} is newer than this program ({SCHEMA_VERSION})")
+        return
+
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        cur.execute("BEGIN")
+        try:
+            migration()
+            cur.execute(f"PRAGMA user_version = {number}")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+# Add these constants at the beginning of the file, after the imports
+SHIP_MODES = ['Standard Class', 'Second Class', 'First Class', 'Same Day']
+SEGMENTS = ['Consumer', 'Corporate', 'Home Office']
+REGIONS = ['North', 'South', 'East', 'West']
+CATEGORIES = {
+    'Furniture': ['Bookcases', 'Chairs', 'Furnishings', 'Tables'],
+    'Office Supplies': ['Appliances', 'Art', 'Binders', 'Envelopes', 'Fasteners', 'Labels', 'Paper', 'Storage', 'Supplies'],
+    'Technology': ['Accessories', 'Copiers', 'Machines', 'Phones']
+}
+
+# In-memory product catalog, loaded on first use and dropped whenever products
+# change. Keyed by product_id -> (product_name, category, sub_category, unit_price).
+_product_catalog = None
+_products_by_category = None
+
+def get_product_catalog():
+    """Return the cached product catalog, loading it from the database if needed"""
+    global _product_catalog, _products_by_category
+    if _product_catalog is None:
+        cur.execute("SELECT product_id, product_name, category, sub_category, unit_price FROM products ORDER BY product_id")
+        catalog = {row[0]: row[1:] for row in cur.fetchall()}
+
+        # Category -> sub-category -> product IDs, seeded from CATEGORIES so every
+        # known sub-category is present even when it has no products yet
+        by_category = {category: {sub: [] for sub in subs} for category, subs in CATEGORIES.items()}
+        for product_id, (_, category, sub_category, _) in catalog.items():
+            by_category.setdefault(category, {}).setdefault(sub_category, []).append(product_id)
+
+        _product_catalog, _products_by_category = catalog, by_category
+    return _product_catalog
+
+def get_products_by_category():
+    """Return the cached category -> sub-category -> product IDs index"""
+    get_product_catalog()
+    return _products_by_category
+
+def invalidate_product_catalog():
+    """Drop the cached catalog so the next lookup reloads it"""
+    global _product_catalog, _products_by_category
+    _product_catalog = None
+    _products_by_category = None
+
+def search_products(text='', category=None):
+    """Product IDs whose name, category or sub-category has words starting with those in text.
+
+    Matches come best first from the products_fts index; with no text every
+    product is returned in ID order.
+    """
+    catalog = get_product_catalog()
+    if category:
+        candidates = sorted(pid for ids in get_products_by_category().get(category, {}).values() for pid in ids)
+    else:
+        candidates = catalog
+    if not text.strip():
+        return list(candidates)
+    try:
+        query = search_query(text)
+    except ValueError:
+        return []
+    cur.execute("""
+    SELECT p.product_id FROM products_fts f JOIN products p ON p.rowid = f.rowid
+    WHERE products_fts MATCH ? ORDER BY f.rank
+    """, (query,))
+    candidates = set(candidates)
+    return [pid for pid, in cur.fetchall() if pid in candidates]
+
+def choose_product():
+    """Let the user search and page through the catalog, returning the chosen Product ID"""
+    catalog = get_product_catalog()
+    matches = search_products(input("\nSearch products by name or category (blank for all): "))
+    start = 0
+
+    while True:
+        page = matches[start:start + PAGE_SIZE]
+        if page:
+            print(f"\nProducts {start + 1}-{start + len(page)} of {len(matches)}:")
+            for pid in page:
+                name, category, sub_category, price = catalog[pid]
+                print(f"ID: {pid}, Name: {name}, Category: {category}/{sub_category}, Price: ${price:.2f}")
+        else:
+            print("\nNo matching products.")
+
+        command = input("Enter Product ID, [s]earch <text>, [n]ext, [p]rev: ").strip()
+        action, _, argument = command.partition(' ')
+        if command in catalog:
+            return command
+        elif action.lower() == 's':
+            matches = search_products(argument)
+            start = 0
+        elif action.lower() == 'n' and not argument:
+            if start + PAGE_SIZE < len(matches):
+                start += PAGE_SIZE
+            else:
+                print("Already on the last page.")
+        elif action.lower() == 'p' and not argument:
+            if start > 0:
+                start -= PAGE_SIZE
+            else:
+                print("Already on the first page.")
+        else:
+            print("Unknown Product ID or command. Please try again.")
+
+# Modified insert_record function for superstore
+def calculate_financials(quantity, unit_price):
+    """Calculate discount, sales and profit based on quantity and price"""
+    
+    # Discount calculation based on quantity
+    if quantity >= 50:
+        discount = 0.20  # 20% discount for bulk orders (50+ units)
+    elif quantity >= 20:
+        discount = 0.15  # 15% discount for medium orders (20-49 units)
+    elif quantity >= 10:
+        discount = 0.10  # 10% discount for small bulk orders (10-19 units)
+    elif quantity >= 5:
+        discount = 0.05  # 5% discount for multiple units (5-9 units)
+    else:
+        discount = 0.00  # No discount for small quantities
+    
+    # Calculate sales (price after discount)
+    subtotal = quantity * unit_price
+    discount_amount = subtotal * discount
+    sales = subtotal - discount_amount
+    
+    # Calculate profit based on product category
+    # Different profit margins for different price ranges
+    if unit_price >= 500:
+        profit_margin = 0.25  # 25% profit margin for high-end items
+    elif unit_price >= 100:
+        profit_margin = 0.30  # 30% profit margin for mid-range items
+    else:
+        profit_margin = 0.35  # 35% profit margin for low-cost items
+    
+    profit = sales * profit_margin
+    
+    return round(discount, 2), round(sales, 2), round(profit, 2)
+
+# Quantity and price tiers used by calculate_financials, lowest threshold last
+DISCOUNT_TIERS = [(50, 0.20), (20, 0.15), (10, 0.10), (5, 0.05)]
+MARGIN_TIERS = [(500, 0.25), (100, 0.30)]
+DEFAULT_MARGIN = 0.35
+
+def round_batch(values):
+    """Round a NumPy array to 2 places exactly the way Python's round() does"""
+    rounded = np.round(values, 2)
+    # np.round scales by 100 first, which can tip values sitting on a .5 boundary
+    # the other way; those few are redone with round() so results match bit for bit
+    scaled = values * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(ties):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+def calculate_financials_batch(quantities, unit_prices):
+    """Batch version of calculate_financials over columns of quantities and prices.
+
+    Accepts NumPy arrays, array.array or any sequence, and returns the
+    discount, sales and profit columns rounded exactly like the scalar version.
+    NumPy arrays are returned when NumPy is installed, array('d') otherwise.
+    """
+    if np is None:
+        discounts, sales, profits = array('d'), array('d'), array('d')
+        for quantity, unit_price in zip(quantities, unit_prices):
+            discount, sale, profit = calculate_financials(quantity, unit_price)
+            discounts.append(discount)
+            sales.append(sale)
+            profits.append(profit)
+        return discounts, sales, profits
+
+    quantities = np.asarray(quantities, dtype=np.int64)
+    unit_prices = np.asarray(unit_prices, dtype=np.float64)
+
+    discount = np.select([quantities >= q for q, _ in DISCOUNT_TIERS],
+                         [d for _, d in DISCOUNT_TIERS], default=0.00)
+    # Same operations in the same order as the scalar version
+    subtotal = quantities * unit_prices
+    discount_amount = subtotal * discount
+    sales = subtotal - discount_amount
+
+    profit_margin = np.select([unit_prices >= p for p, _ in MARGIN_TIERS],
+                              [m for _, m in MARGIN_TIERS], default=DEFAULT_MARGIN)
+    profit = sales * profit_margin
+
+    return round_batch(discount), round_batch(sales), round_batch(profit)
+
+def check_financials_parity(samples=100000):
+    """Compare calculate_financials_batch against the scalar version, returning mismatches"""
+    rng = random.Random(42)
+    # Every quantity tier against prices on and around each margin boundary,
+    # followed by a spread of random orders
+    boundary_prices = [0.01, 1.005, 2.675, 99.99, 100.0, 100.01, 499.99, 500.0, 500.01]
+    quantities = [q for q in range(0, 121) for _ in boundary_prices]
+    prices = boundary_prices * 121
+    quantities += [rng.randint(0, 500) for _ in range(samples)]
+    prices += [round(rng.uniform(0, 2000), 2) for _ in range(samples)]
+
+    discounts, sales, profits = calculate_financials_batch(quantities, prices)
+    mismatches = []
+    for i, (quantity, unit_price) in enumerate(zip(quantities, prices)):
+        expected = calculate_financials(quantity, unit_price)
+        actual = (float(discounts[i]), float(sales[i]), float(profits[i]))
+        if expected != actual:
+            mismatches.append((quantity, unit_price, expected, actual))
+    return len(quantities), mismatches
+
+# Layouts accepted for order and ship dates on the way in. Dates are stored as
+# ISO YYYY-MM-DD text, which sorts and indexes in date order; month/day/year
+# is the layout of the Superstore sample data.
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d']
+DATE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def normalize_date(value):
+    """A date in one of DATE_FORMATS (or a datetime.date) as YYYY-MM-DD, raising ValueError otherwise.
+
+    Memoized: an import or a table holds far fewer distinct dates than rows.
+    """
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        for layout in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value.strip(), layout).date()
+            except ValueError:
+                continue
+            if parsed.year >= 1900:
+                return parsed.isoformat()
+    raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+def check_order_dates(order_date, ship_date):
+    """Both dates as YYYY-MM-DD, raising ValueError if either is invalid or the order ships before it is placed"""
+    order_date, ship_date = normalize_date(order_date), normalize_date(ship_date)
+    if ship_date < order_date:
+        raise ValueError(f"Ship date {ship_date} is before order date {order_date}")
+    return order_date, ship_date
+
+def check_ship_mode(ship_mode):
+    """Raise ValueError unless ship_mode is one of SHIP_MODES"""
+    if ship_mode not in SHIP_MODES:
+        raise ValueError(f"Unknown ship mode '{ship_mode}'. Choose from: {', '.join(SHIP_MODES)}")
+
+def check_quantity(product_id, quantity):
+    """Raise ValueError unless quantity is a whole number of at least one"""
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+        raise ValueError(f"Invalid quantity {quantity!r} for {product_id}, must be at least 1")
+
+def add_customer(customer_id, customer_name, segment, country, city, state, postal_code, region,
+                 commit=True):
+    """Insert a new customer"""
+    if segment not in SEGMENTS:
+        raise ValueError(f"Unknown segment '{segment}'. Choose from: {', '.join(SEGMENTS)}")
+    if region not in REGIONS:
+        raise ValueError(f"Unknown region '{region}'. Choose from: {', '.join(REGIONS)}")
+    cur.execute("""
+    INSERT INTO customers VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+    """, (customer_id, customer_name, segment, country, city, state, postal_code, region))
+    if commit:
+        con.commit()
+
+def add_basket(order_id, order_date, ship_date, ship_mode, customer_id, lines, commit=True):
+    """Insert an order with one line per (product_id, quantity) in lines, priced from the catalog.
+
+    The header and all lines go in with a single commit, so a bad line leaves
+    nothing behind. Returns one (unit_price, discount, sales, profit) per line.
+    """
+    check_ship_mode(ship_mode)
+    order_date, ship_date = check_order_dates(order_date, ship_date)
+    if not lines:
+        raise ValueError("An order needs at least one product")
+    catalog = get_product_catalog()
+    for product_id, quantity in lines:
+        if product_id not in catalog:
+            raise ValueError(f"Invalid Product ID '{product_id}'")
+        check_quantity(product_id, quantity)
+    cur.execute("SELECT 1 FROM customers WHERE customer_id = ?", (customer_id,))
+    if not cur.fetchone():
+        raise ValueError(f"Invalid Customer ID '{customer_id}'")
+
+    # Price the whole basket in one pass
+    quantities = [quantity for _, quantity in lines]
+    unit_prices = [catalog[product_id][3] for product_id, _ in lines]
+    discounts, sales, profits = calculate_financials_batch(quantities, unit_prices)
+    financials = [(float(d), float(s), float(p)) for d, s, p in zip(discounts, sales, profits)]
+
+    try:
+        cur.execute("""
+        INSERT INTO orders(order_id, order_date, ship_date, ship_mode, customer_id) VALUES(?, ?, ?, ?, ?)
+        """, (order_id, order_date, ship_date, ship_mode, customer_id))
+        cur.executemany("""
+        INSERT INTO order_lines VALUES(?, ?, ?, ?, ?, ?, ?)
+        """, [(order_id, line_number, product_id, quantity, discount, sales, profit)
+              for line_number, ((product_id, quantity), (discount, sales, profit))
+              in enumerate(zip(lines, financials), 1)])
+    except sqlite3.Error:
+        if commit:
+            con.rollback()
+        raise
+    if commit:
+        con.commit()
+    return [(unit_price, *line) for unit_price, line in zip(unit_prices, financials)]
+
+def add_order(order_id, order_date, ship_date, ship_mode, customer_id, product_id, quantity,
+              commit=True):
+    """Insert a single-product order, returning (unit_price, discount, sales, profit)"""
+    return add_basket(order_id, order_date, ship_date, ship_mode, customer_id,
+                      [(product_id, quantity)], commit)[0]
+
+def insert_record():
+    try:
+        # First, insert or select customer
+        print("\nCustomer Details:")
+        customer_id = input("Enter Customer ID (or ? to search): ").strip()
+        if customer_id == '?':
+            customer_id = browse_customers(choose=True)
+            if customer_id is None:
+                print("Order cancelled.")
+                return
+        cur.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
+        customer = cur.fetchone()
+        
+        if not customer:
+            # Insert new customer
+            customer_name = input("Enter Customer Name: ")
+            print("\nAvailable Segments:")
+            for i, seg in enumerate(SEGMENTS, 1):
+                print(f"{i}. {seg}")
+            segment_choice = int(input("Choose Segment (enter number): "))
+            segment = SEGMENTS[segment_choice-1]
+            
+            country = input("Enter Country: ")
+            city = input("Enter City: ")
+            state = input("Enter State: ")
+            postal_code = input("Enter Postal Code: ")
+            
+            print("\nAvailable Regions:")
+            for i, reg in enumerate(REGIONS, 1):
+                print(f"{i}. {reg}")
+            region_choice = int(input("Choose Region (enter number): "))
+            region = REGIONS[region_choice-1]
+            
+            # Committed together with the order below
+            add_customer(customer_id, customer_name, segment, country, city, state, postal_code, region,
+                         commit=False)
+            print("New customer added successfully!")
+
+        # Get order details
+        order_id = input("\nEnter Order ID: ")
+        order_date = input("Enter Order Date (YYYY-MM-DD): ")
+        ship_date = input("Enter Ship Date (YYYY-MM-DD): ")
+        # Checked now rather than after the basket has been entered
+        order_date, ship_date = check_order_dates(order_date, ship_date)
+        
+        print("\nAvailable Ship Modes:")
+        for i, mode in enumerate(SHIP_MODES, 1):
+            print(f"{i}. {mode}")
+        ship_choice = int(input("Choose Ship Mode (enter number): "))
+        ship_mode = SHIP_MODES[ship_choice-1]
+        
+        # Build the basket from the cached catalog; it is saved in one transaction at the end
+        lines = []
+        while True:
+            product_id = choose_product()
+            quantity = int(input("Enter Quantity: "))
+            lines.append((product_id, quantity))
+            if input("Add another product? (y/n): ").strip().lower() != 'y':
+                break
+
+        priced = add_basket(order_id, order_date, ship_date, ship_mode, customer_id, lines)
+
+        print(f"""
+Order Summary:
+-------------
+Order ID: {order_id}""")
+        catalog = get_product_catalog()
+        for line_number, ((product_id, quantity), (unit_price, discount, sales, profit)) in enumerate(zip(lines, priced), 1):
+            print(f"""
+Line {line_number}: {catalog[product_id][0]}
+Quantity: {quantity}
+Unit Price: ${unit_price:.2f}
+Subtotal: ${(quantity * unit_price):.2f}
+Discount: {discount:.2%}
+Discount Amount: ${(quantity * unit_price * discount):.2f}
+Final Sales: ${sales:.2f}
+Profit: ${profit:.2f}""")
+        print(f"""
+Order Total: ${sum(line[2] for line in priced):.2f}
+Order Profit: ${sum(line[3] for line in priced):.2f}
+""")
+        
+    except sqlite3.IntegrityError as e:
+        if "FOREIGN KEY constraint failed" in str(e):
+            print("Error: Invalid Customer ID or Product ID")
+        else:
+            print(f"Error: {str(e)}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+
+# Orders are shown page by page so memory stays flat however big the table gets
+PAGE_SIZE = 20
+
+def order_detail_query(schema=None):
+    """The joined order lines of the main database, or of an attached archive schema.
+
+    Customers and products always come from the main database; archived
+    lines are LEFT JOINed so they survive their customer or product being deleted.
+    """
+    prefix, join = (f"{schema}.", "LEFT JOIN") if schema else ("", "JOIN")
+    return f'''
+SELECT o.order_id, l.line_number, o.order_date, o.ship_date, o.ship_mode,
+       c.customer_name, c.segment, c.country, c.city, c.state,
+       p.product_name, p.category, p.sub_category,
+       l.quantity, l.discount, l.sales, l.profit
+FROM {prefix}order_lines l
+JOIN {prefix}orders o ON o.order_id = l.order_id
+{join} customers c ON o.customer_id = c.customer_id
+{join} products p ON l.product_id = p.product_id
+'''
+
+ORDER_DETAIL_QUERY = order_detail_query()
+
+ORDER_DETAIL_HEADERS = ['Order ID', 'Line', 'Order Date', 'Ship Date', 'Ship Mode',
+                        'Customer', 'Segment', 'Country', 'City', 'State',
+                        'Product', 'Category', 'Sub-Category',
+                        'Quantity', 'Discount', 'Sales', 'Profit']
+
+def fetch_orders_page(after=None, before=None, page_size=PAGE_SIZE):
+    """Fetch one page of joined order lines using keyset pagination.
+
+    after and before are (order_id, line_number) keys taken from the edge of
+    the current page.
+    """
+    if before is not None:
+        # Walk backwards from the first row of the current page, then restore order
+        cur.execute(ORDER_DETAIL_QUERY + " WHERE (l.order_id, l.line_number) < (?, ?)"
+                    " ORDER BY l.order_id DESC, l.line_number DESC LIMIT ?", (*before, page_size))
+        return cur.fetchall()[::-1]
+    if after is not None:
+        cur.execute(ORDER_DETAIL_QUERY + " WHERE (l.order_id, l.line_number) > (?, ?)"
+                    " ORDER BY l.order_id, l.line_number LIMIT ?", (*after, page_size))
+    else:
+        cur.execute(ORDER_DETAIL_QUERY + " ORDER BY l.order_id, l.line_number LIMIT ?", (page_size,))
+    return cur.fetchall()
+
+def count_order_details(before=None):
+    """Number of rows in the joined order lines view, or only those with an Order ID below before.
+
+    Counts the same inner join the pages come from, so lines whose customer
+    or product is missing don't throw the page numbers off.
+    """
+    if before is None:
+        cur.execute(f"SELECT COUNT(*) FROM ({ORDER_DETAIL_QUERY})")
+    else:
+        cur.execute(f"SELECT COUNT(*) FROM ({ORDER_DETAIL_QUERY} WHERE l.order_id < ?)", (before,))
+    return cur.fetchone()[0]
+
+def format_order_row(record):
+    """Format the money columns of a joined order row for display"""
+    formatted_record = list(record)
+    formatted_record[-3] = f"{record[-3]:.2%}"  # Discount
+    formatted_record[-2] = f"${record[-2]:.2f}"  # Sales
+    formatted_record[-1] = f"${record[-1]:.2f}"  # Profit
+    return formatted_record
+
+def show_orders_paged():
+    """Interactive pager over the joined order lines view"""
+    cur.execute("SELECT COUNT(*) FROM orders")
+    total = cur.fetchone()[0]
+    if total == 0:
+        print("No orders found.")
+        return
+    total_lines = count_order_details()
+
+    total_pages = max((total_lines + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    page = fetch_orders_page()
+    page_number = 1
+
+    while True:
+        if page:
+            print(f"\nOrders with Details (page {page_number} of {total_pages}):")
+            # Column widths are worked out from the rows on this page only
+            print(tabulate([format_order_row(r) for r in page],
+                           headers=ORDER_DETAIL_HEADERS, tablefmt='grid'))
+        else:
+            print("\nNo orders on this page.")
+        print(f"\nTotal Orders: {total}, Lines: {total_lines}")
+
+        command = input("[n]ext, [p]rev, [g]o to page <number>, [j]ump to order <Order ID>, [q]uit: ").strip()
+        action, _, argument = command.partition(' ')
+        action = action.lower()
+        argument = argument.strip()
+
+        if action == 'n':
+            next_page = fetch_orders_page(after=page[-1][:2]) if page else []
+            if next_page:
+                page = next_page
+                page_number += 1
+            else:
+                print("Already on the last page.")
+        elif action == 'p':
+            prev_page = fetch_orders_page(before=page[0][:2]) if page else []
+            if prev_page:
+                page = prev_page
+                page_number -= 1
+            else:
+                print("Already on the first page.")
+        elif action == 'g':
+            try:
+                target = int(argument)
+            except ValueError:
+                print("Enter a page number, e.g. 'g 5'.")
+                continue
+            if not 1 <= target <= total_pages:
+                print(f"Page must be between 1 and {total_pages}.")
+                continue
+            if target == 1:
+                page = fetch_orders_page()
+            else:
+                # Skip through the joined rows, so the page matches the one n/p would reach
+                cur.execute(ORDER_DETAIL_QUERY + " ORDER BY l.order_id, l.line_number LIMIT 1 OFFSET ?",
+                            ((target - 1) * PAGE_SIZE - 1,))
+                page = fetch_orders_page(after=cur.fetchone()[:2])
+            page_number = target
+        elif action == 'j':
+            if not argument:
+                print("Enter an Order ID, e.g. 'j ORD-1001'.")
+                continue
+            page_number = count_order_details(before=argument) // PAGE_SIZE + 1
+            # Start right after the last line of the preceding order
+            page = fetch_orders_page(after=(argument, 0))
+        elif action == 'q':
+            break
+        else:
+            print("Invalid command. Please try again.")
+
+TABLES = ['orders', 'order_lines', 'customers', 'products']
+
+# Tables shown, imported and deleted from as whole records; order lines go with their order
+RECORD_TABLES = ['orders', 'customers', 'products']
+
+def fetch_records(table_name):
+    """Return every row of the customers or products table"""
+    if table_name not in ('customers', 'products'):
+        raise ValueError(f"Cannot list table '{table_name}'")
+    cur.execute(f'SELECT * FROM {table_name}')
+    return cur.fetchall()
+
+def format_product_row(record):
+    """Format the unit price of a product row for display"""
+    formatted_record = list(record)
+    formatted_record[4] = f"${record[4]:.2f}"  # Format unit price
+    return formatted_record
+
+def search_query(text):
+    """FTS5 MATCH expression for text: every word must match, as typed or as the start of a longer word"""
+    words = ''.join(ch if ch.isalnum() else ' ' for ch in text).split()
+    if not words:
+        raise ValueError("Enter some letters or digits to search for")
+    return ' '.join(f'"{word}"*' for word in words)
+
+# Ranking has to score every match before the first page comes back, so
+# searches matching more rows than this come back in table order instead
+SEARCH_RANK_LIMIT = 2000
+
+def search(table_name, text, limit=PAGE_SIZE, offset=0):
+    """Rows of customers or products matching text and the number of matches.
+
+    Rows come best match first. When more than SEARCH_RANK_LIMIT rows match,
+    they come in table order and the count is None, since counting and
+    ranking them all would cost far more than the page itself.
+    """
+    if table_name not in SEARCH_INDEXES:
+        raise ValueError(f"Cannot search '{table_name}'. Choose from: {', '.join(SEARCH_INDEXES)}")
+    fts = SEARCH_INDEXES[table_name][0]
+    query = search_query(text)
+    cur.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {fts} WHERE {fts} MATCH ? LIMIT ?)",
+                (query, SEARCH_RANK_LIMIT + 1))
+    total = cur.fetchone()[0]
+    if total > SEARCH_RANK_LIMIT:
+        total, order = None, "f.rowid"
+    else:
+        order = "f.rank"
+    cur.execute(f"""
+    SELECT t.* FROM {fts} f JOIN {table_name} t ON t.rowid = f.rowid
+    WHERE {fts} MATCH ? ORDER BY {order} LIMIT ? OFFSET ?
+    """, (query, limit, offset))
+    return cur.fetchall(), total
+
+def fetch_customers_page(after=None, before=None, page_size=PAGE_SIZE):
+    """One page of customers in Customer ID order, keyset-paged like fetch_orders_page()"""
+    if before is not None:
+        cur.execute("SELECT * FROM customers WHERE customer_id < ? ORDER BY customer_id DESC LIMIT ?",
+                    (before, page_size))
+        return cur.fetchall()[::-1]
+    if after is not None:
+        cur.execute("SELECT * FROM customers WHERE customer_id > ? ORDER BY customer_id LIMIT ?",
+                    (after, page_size))
+    else:
+        cur.execute("SELECT * FROM customers ORDER BY customer_id LIMIT ?", (page_size,))
+    return cur.fetchall()
+
+def browse_customers(choose=False):
+    """Page through all customers, or through ranked search results once a search is entered.
+
+    With choose set, entering a Customer ID returns it. Returns None on quit.
+    """
+    text = input("\nSearch customers by name, city, state or postal code (blank for all): ").strip()
+    page = [] if text else fetch_customers_page()
+    offset = total = 0
+
+    while True:
+        if text:
+            page, total = search('customers', text, PAGE_SIZE, offset)
+        if page:
+            if text:
+                of = f"{total}" if total is not None else f"more than {SEARCH_RANK_LIMIT}, type more to narrow"
+                print(f"\nCustomers matching '{text}' ({offset + 1}-{offset + len(page)} of {of}):")
+            else:
+                print("\nCustomers:")
+            print(tabulate(page, headers=CUSTOMER_HEADERS, tablefmt='grid'))
+        else:
+            print("\nNo matching customers.")
+
+        command = input(("Enter Customer ID, " if choose else "")
+                        + "[s]earch <text>, [n]ext, [p]rev, [q]uit: ").strip()
+        action, _, argument = command.partition(' ')
+        action = action.lower()
+        if action == 's':
+            text, offset = argument.strip(), 0
+            if not text:
+                page = fetch_customers_page()
+        elif action == 'n' and not argument:
+            if text:
+                if offset + PAGE_SIZE < (total if total is not None else offset + len(page) + 1):
+                    offset += PAGE_SIZE
+                else:
+                    print("Already on the last page.")
+            else:
+                next_page = fetch_customers_page(after=page[-1][0]) if page else []
+                if next_page:
+                    page = next_page
+                else:
+                    print("Already on the last page.")
+        elif action == 'p' and not argument:
+            if text:
+                if offset > 0:
+                    offset -= PAGE_SIZE
+                else:
+                    print("Already on the first page.")
+            else:
+                prev_page = fetch_customers_page(before=page[0][0]) if page else []
+                if prev_page:
+                    page = prev_page
+                else:
+                    print("Already on the first page.")
+        elif action == 'q' and not argument:
+            return None
+        elif choose and command:
+            cur.execute("SELECT 1 FROM customers WHERE customer_id = ?", (command,))
+            if cur.fetchone():
+                return command
+            print("Unknown Customer ID or command. Please try again.")
+        else:
+            print("Invalid command. Please try again.")
+
+# Live dashboard. A Dashboard runs a background thread with its own read-only
+# connection that keeps today's KPIs in memory. Each refresh reads, inside one
+# read transaction (a consistent snapshot under WAL), only the change_log rows
+# with a seq above the last one it saw, and re-reads just those orders. The
+# foreground only copies the latest figures, so it never waits on a query.
+DASHBOARD_INTERVAL = 2.0
+
+DASHBOARD_ORDERS_QUERY = """
+SELECT o.order_id, o.order_date, o.ship_mode, c.region, COUNT(l.order_id), TOTAL(l.sales), TOTAL(l.profit)
+FROM orders o
+LEFT JOIN customers c ON c.customer_id = o.customer_id
+LEFT JOIN order_lines l ON l.order_id = o.order_id
+"""
+
+class Dashboard:
+    """Today's sales KPIs, kept current by a background thread"""
+
+    def __init__(self, path, interval=DASHBOARD_INTERVAL, profile=None):
+        self.path = path
+        self.profile = profile
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.refreshed = threading.Event()
+        self.thread = None
+        # Only touched by the worker thread
+        self.day = None
+        self.last_seq = 0
+        self.orders = {}
+        # Swapped in under the lock
+        self.kpis = None
+        self.error = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='dashboard', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        reader = connect_db(self.path, self.profile, read_only=True)
+        try:
+            wal = reader.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            while not self.stopping.is_set():
+                start = time.perf_counter()
+                try:
+                    kpis = self.refresh(reader)
+                    kpis['wal'] = wal
+                    kpis['refresh_ms'] = (time.perf_counter() - start) * 1000
+                    with self.lock:
+                        self.kpis, self.error = kpis, None
+                except sqlite3.Error as e:
+                    with self.lock:
+                        self.error = str(e)
+                self.refreshed.set()
+                self.stopping.wait(self.interval)
+        finally:
+            reader.close()
+
+    def refresh(self, reader):
+        """Bring self.orders up to date with the database and return the KPIs"""
+        today = date.today().isoformat()
+        reader.execute("BEGIN")
+        try:
+            upto, = reader.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence "
+                                   "WHERE name = 'change_log'").fetchone()
+            oldest, = reader.execute("SELECT MIN(seq) FROM change_log").fetchone()
+            # A new day, or changes trimmed from the log before this thread saw them
+            if today != self.day or (upto > self.last_seq and (oldest or upto + 1) > self.last_seq + 1):
+                self.orders = {}
+                rows = reader.execute(DASHBOARD_ORDERS_QUERY + " WHERE o.order_date = ? GROUP BY o.order_id",
+                                      (today,)).fetchall()
+                self.day = today
+            elif upto > self.last_seq:
+                changed = "SELECT row_key FROM change_log WHERE seq > ? AND seq <= ? AND table_name = 'orders'"
+                for key, in reader.execute(changed, (self.last_seq, upto)):
+                    self.orders.pop(key, None)
+                rows = reader.execute(DASHBOARD_ORDERS_QUERY + f" WHERE o.order_id IN ({changed})"
+                                      " GROUP BY o.order_id", (self.last_seq, upto)).fetchall()
+            else:
+                rows = []
+        finally:
+            reader.rollback()
+        for order_id, order_date, ship_mode, region, lines, sales, profit in rows:
+            if order_date == today:
+                self.orders[order_id] = (ship_mode, region, lines, sales, profit)
+        self.last_seq = upto
+        return self.summarize()
+
+    def summarize(self):
+        kpis = {'day': self.day, 'orders': len(self.orders), 'lines': 0, 'sales': 0.0, 'profit': 0.0,
+                'ship_mode': {}, 'region': {}, 'last_seq': self.last_seq,
+                'refreshed_at': datetime.now()}
+        for ship_mode, region, lines, sales, profit in self.orders.values():
+            kpis['lines'] += lines
+            kpis['sales'] += sales
+            kpis['profit'] += profit
+            for dimension, key in [('ship_mode', ship_mode), ('region', region)]:
+                count, total = kpis[dimension].get(key, (0, 0.0))
+                kpis[dimension][key] = (count + 1, total + sales)
+        return kpis
+
+    def snapshot(self):
+        """(latest KPIs or None, last error or None)"""
+        with self.lock:
+            return self.kpis, self.error
+
+def format_dashboard(kpis):
+    """The dashboard as text"""
+    if kpis is None:
+        return "Loading..."
+    lines = [f"Sales for {kpis['day']}  (refreshed {kpis['refreshed_at']:%H:%M:%S} "
+             f"in {kpis['refresh_ms']:.1f} ms, change {kpis['last_seq']})"]
+    if not kpis['wal']:
+        lines.append("Note: the database is not in WAL mode, so refreshes briefly block writers. "
+                     "Use --profile performance.")
+    average = kpis['sales'] / kpis['orders'] if kpis['orders'] else 0.0
+    lines.append(tabulate([[kpis['orders'], kpis['lines'], f"${kpis['sales']:,.2f}",
+                            f"${kpis['profit']:,.2f}", f"${average:,.2f}"]],
+                          headers=['Orders', 'Order Lines', 'Sales', 'Profit', 'Average Order'], tablefmt='grid'))
+    for dimension, order in [('ship_mode', SHIP_MODES), ('region', REGIONS)]:
+        groups = kpis[dimension]
+        keys = [k for k in order if k in groups] + sorted((k for k in groups if k not in order), key=str)
+        lines.append(tabulate([[key, *groups[key][:1], f"${groups[key][1]:,.2f}"] for key in keys],
+                              headers=[dimension.replace('_', ' ').title(), 'Orders', 'Sales'], tablefmt='grid'))
+    return '\n'.join(lines)
+
+def run_dashboard(interval=DASHBOARD_INTERVAL, once=False):
+    """Redraw the dashboard every interval until Ctrl+C (or after the first refresh with once)"""
+    dashboard = Dashboard(database_path(con), interval)
+    dashboard.start()
+    shown = None
+    try:
+        while True:
+            dashboard.refreshed.wait()
+            dashboard.refreshed.clear()
+            kpis, error = dashboard.snapshot()
+            if error:
+                print(f"Database error: {error}")
+            # Redrawn only when something has changed
+            if kpis and (kpis['day'], kpis['last_seq']) != shown:
+                shown = (kpis['day'], kpis['last_seq'])
+                print("\n" + format_dashboard(kpis))
+                if not once:
+                    print("Ctrl+C to return to the menu")
+            if once:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dashboard.stop()
+
+def ask_date_range():
+    """Prompt for an optional from/to order date, returning (date_from, date_to) with None for blanks"""
+    dates = []
+    for label in ('From', 'To'):
+        value = input(f"{label} order date (YYYY-MM-DD, blank for no limit): ").strip()
+        dates.append(normalize_date(value) if value else None)
+    return tuple(dates)
+
+# Modified show_records function
+def show_records():
+    while True:
+        print("\nWhich table would you like to view?")
+        print("1. Orders (with full details)")
+        print("2. Customers")
+        print("3. Products")
+        print("4. Live Sales Dashboard")
+        print("5. Back to main menu")
+        
+        choice = input("Enter your choice: ")
+        
+        try:
+            if choice == '1':
+                # Show orders with joined details, one page at a time
+                if archive_files() and input("Include archived orders? (y/n): ").lower() == 'y':
+                    date_from, date_to = ask_date_range()
+                    show_history_paged(date_from, date_to)
+                else:
+                    show_orders_paged()
+                    
+            elif choice == '2':
+                # Search or page through customers rather than printing them all
+                browse_customers()
+                    
+            elif choice == '3':
+                # Show products table
+                records = fetch_records('products')
+                
+                if records:
+                    formatted_records = [format_product_row(record) for record in records]
+                    
+                    print("\nProducts:")
+                    print(tabulate(formatted_records, headers=PRODUCT_HEADERS, tablefmt='grid'))
+                    print(f"\nTotal Products: {len(records)}")
+                else:
+                    print("No products found.")
+
+            elif choice == '4':
+                # Today's figures, refreshed in the background from new changes only
+                run_dashboard()
+                    
+            elif choice == '5':
+                break
+            else:
+                print("Invalid choice. Please try again.")
+                
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+# Rows pulled from the cursor per fetchmany() call while exporting
+EXPORT_CHUNK_SIZE = 5000
+
+CUSTOMER_HEADERS = ['Customer ID', 'Customer Name', 'Segment', 'Country', 
+                    'City', 'State', 'Postal Code', 'Region']
+
+PRODUCT_HEADERS = ['Product ID', 'Category', 'Sub-Category', 
+                   'Product Name', 'Unit Price']
+
+def stream_query_to_csv(query, headers, filename, compress=False, chunk_size=EXPORT_CHUNK_SIZE, params=()):
+    """Write the result of query to filename chunk by chunk, returning (rows, bytes)"""
+    cur.execute(query, params)
+    rows = cur.fetchmany(chunk_size)
+    if not rows:
+        return 0, 0
+
+    raw = open(filename, 'wb')
+    # Count bytes on the raw file so the figure is the compressed size for .csv.gz
+    sink = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+    f = io.TextIOWrapper(sink, encoding='utf-8', newline='')
+    start = time.perf_counter()
+    row_count = 0
+    try:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        while rows:
+            writer.writerows(rows)
+            row_count += len(rows)
+            f.flush()
+            elapsed = time.perf_counter() - start
+            rate = row_count / elapsed if elapsed > 0 else 0
+            print(f"\r{row_count} rows, {rate:,.0f} rows/sec, {raw.tell():,} bytes written", end='', flush=True)
+            rows = cur.fetchmany(chunk_size)
+    finally:
+        f.close()
+        if compress:
+            raw.close()
+    print()
+    return row_count, os.path.getsize(filename)
+
+# What each export reads, keyed by the name used in filenames and on the command line
+EXPORTS = {
+    'orders': (ORDER_DETAIL_QUERY, ORDER_DETAIL_HEADERS),
+    'customers': ('SELECT * FROM customers', CUSTOMER_HEADERS),
+    'products': ('SELECT * FROM products', PRODUCT_HEADERS),
+}
+
+def export_csv(name, filename=None, compress=False, chunk_size=EXPORT_CHUNK_SIZE, workers=1,
+               split_by='rowid', history=False, date_from=None, date_to=None):
+    """Export orders, customers or products to CSV, returning (filename, rows, bytes).
+
+    Without a filename a timestamped superstore_<name>_<timestamp>.csv[.gz]
+    is written to the current directory. Nothing is written when there are
+    no rows. With more than one worker (None or 0 for one per core), orders
+    are exported in parallel by parallel_export_orders(). history exports
+    orders from the hot database and the archives, limited to any date range.
+    """
+    if name not in EXPORTS:
+        raise ValueError(f"Unknown export '{name}'. Choose from: {', '.join(EXPORTS)}")
+    query, headers = EXPORTS[name]
+    if filename is None:
+        # Create descriptive filename based on choice
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"superstore_{name}_{timestamp}.csv" + (".gz" if compress else "")
+    workers = workers or os.cpu_count() or 1
+    if name == 'orders' and (history or date_from or date_to):
+        if history:
+            attach_archives(date_from, date_to)
+        source = 'temp.order_history' if history else f"({ORDER_DETAIL_QUERY})"
+        where, params = history_conditions(date_from, date_to)
+        try:
+            row_count, size = stream_query_to_csv(f"SELECT * FROM {source}{where}", headers, filename,
+                                                  compress, chunk_size, params)
+        finally:
+            detach_archives()
+    elif name == 'orders' and workers > 1:
+        row_count, size = parallel_export_orders(filename, compress, workers, split_by, chunk_size)
+    else:
+        row_count, size = stream_query_to_csv(query, headers, filename, compress, chunk_size)
+    return filename, row_count, size
+
+# Incremental export for downstream sync. Triggers append the key of every
+# inserted, updated or deleted row to change_log; each consumer's watermark is
+# the last seq it has received. A delta file holds the current row for every
+# key changed since then ("upsert") and a key-only row for every key that no
+# longer exists ("delete"). Orders are exported whole, so an upserted order
+# replaces all of that order's lines downstream.
+DEFAULT_CONSUMER = 'warehouse'
+
+CHANGE_HEADER = 'Change'
+
+def change_sync_status():
+    """(consumer, last seq, synced at, changes pending) for each consumer"""
+    cur.execute("""
+    SELECT w.consumer, w.last_seq, w.synced_at,
+           (SELECT COUNT(*) FROM change_log WHERE seq > w.last_seq)
+    FROM sync_watermarks w
+    ORDER BY w.consumer
+    """)
+    return cur.fetchall()
+
+def trim_change_log(batch_size=CHANGE_LOG_TRIM_BATCH, commit=True):
+    """Delete the change log entries no consumer still needs, batch_size at a time.
+
+    That is every entry up to the lowest watermark, or, with no consumer
+    registered, all but the newest CHANGE_LOG_RETENTION. A consumer that
+    never syncs holds the log back until its watermark is reset. Returns
+    the number of entries deleted.
+    """
+    cur.execute("SELECT COUNT(*), MIN(last_seq) FROM sync_watermarks")
+    consumers, cutoff = cur.fetchone()
+    if not consumers:
+        cur.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'")
+        cutoff = cur.fetchone()[0] - CHANGE_LOG_RETENTION
+    cur.execute("SELECT MIN(seq) FROM change_log")
+    low = cur.fetchone()[0]
+    deleted = 0
+    while low is not None and low <= cutoff:
+        high = min(low + batch_size - 1, cutoff)
+        cur.execute("DELETE FROM change_log WHERE seq BETWEEN ? AND ?", (low, high))
+        deleted += cur.rowcount
+        if commit:
+            con.commit()
+        low = high + 1
+    return deleted
+
+def reset_watermark(consumer=DEFAULT_CONSUMER):
+    """Forget a consumer's watermark so its next export is a full one"""
+    cur.execute("DELETE FROM sync_watermarks WHERE consumer = ?", (consumer,))
+    con.commit()
+
+def export_changes(consumer=DEFAULT_CONSUMER, directory='.', compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write every row changed since the consumer's watermark, then advance it.
+
+    A consumer with no watermark, or whose unsynced changes have already
+    been trimmed (it registered after the log was cut back), gets every row. Writes one
+    superstore_<table>_changes_<from>_<to>.csv[.gz] per export with changes
+    and returns (from seq, to seq, {table: (filename or None, rows, bytes)}).
+    The watermark only moves once every file is written, so an interrupted
+    sync sends the same changes again. The log is then trimmed with
+    trim_change_log().
+    """
+    con.commit()
+    cur.execute("SELECT last_seq FROM sync_watermarks WHERE consumer = ?", (consumer,))
+    row = cur.fetchone()
+    since = row[0] if row else None
+    # The highest seq ever handed out, even if the log has since been trimmed
+    cur.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'")
+    upto = cur.fetchone()[0]
+    if since is not None and since < upto:
+        # Only a prefix of the log is ever trimmed, so a missing entry after since means a gap
+        cur.execute("SELECT MIN(seq) FROM change_log")
+        oldest = cur.fetchone()[0]
+        if oldest is None or oldest > since + 1:
+            since = None
+
+    os.makedirs(directory, exist_ok=True)
+    results = {}
+    for name, (query, headers) in EXPORTS.items():
+        key = next(key for export, key in CHANGE_TRACKED.values() if export == name)
+        if since is None:
+            sql, params = f"SELECT 'upsert', d.* FROM ({query}) d", ()
+        elif since == upto:
+            results[name] = (None, 0, 0)
+            continue
+        else:
+            changed = "SELECT row_key FROM change_log WHERE seq > ? AND seq <= ? AND table_name = ?"
+            padding = ', NULL' * (len(headers) - 1)
+            sql = f"""
+            SELECT 'upsert', d.* FROM ({query}) d WHERE d.{key} IN ({changed})
+            UNION ALL
+            SELECT 'delete', k.row_key{padding}
+            FROM (SELECT DISTINCT row_key FROM ({changed})) k
+            WHERE NOT EXISTS (SELECT 1 FROM {name} t WHERE t.{key} = k.row_key)
+            """
+            params = (since, upto, name) * 2
+        label = f"full_{upto}" if since is None else f"changes_{since}_{upto}"
+        filename = os.path.join(directory, f"superstore_{name}_{label}.csv" + (".gz" if compress else ""))
+        row_count, size = stream_query_to_csv(sql, [CHANGE_HEADER] + headers, filename,
+                                              compress, chunk_size, params)
+        results[name] = (filename if row_count else None, row_count, size)
+
+    cur.execute("""
+    INSERT INTO sync_watermarks VALUES(?, ?, datetime('now'))
+    ON CONFLICT(consumer) DO UPDATE SET last_seq = excluded.last_seq, synced_at = excluded.synced_at
+    """, (consumer, upto))
+    con.commit()
+    trim_change_log()
+    return since, upto, results
+
+# Parallel export and aggregation. The order lines are split into ranges,
+# either evenly by rowid or by order_date quantiles, and each range is handled
+# in a ProcessPoolExecutor worker on its own read-only connection. CSV parts
+# are concatenated in range order; aggregates are summed.
+#
+# Each worker reads its own snapshot, so a clerk committing halfway through
+# could leave the parts describing different databases. Every range stops at
+# the highest rowid when the split was made, which keeps out lines added
+# meanwhile, and run_on_unchanged_database() discards a run that any other
+# connection committed during. After PARALLEL_ATTEMPTS such runs the work is
+# done by one statement on one snapshot instead.
+SPLIT_BY = ['rowid', 'order_date']
+PARALLEL_ATTEMPTS = 2
+
+def run_on_unchanged_database(parallel, serial):
+    """parallel()'s result if no other connection committed while it ran, otherwise serial()'s.
+
+    PRAGMA data_version on this connection changes whenever another
+    connection or process commits, so an unchanged value means every worker
+    saw the same database.
+    """
+    for attempt in range(PARALLEL_ATTEMPTS):
+        con.commit()
+        cur.execute("PRAGMA data_version")
+        before = cur.fetchone()[0]
+        result = parallel()
+        cur.execute("PRAGMA data_version")
+        if cur.fetchone()[0] == before:
+            return result
+        print("The database changed while the workers were reading it, "
+              + ("starting again" if attempt + 1 < PARALLEL_ATTEMPTS else "reading it in one pass instead"))
+    return serial()
+
+def split_order_ranges(parts, split_by='rowid'):
+    """Split the order lines into up to parts (where, params) ranges covering every current line.
+
+    Every range also stops at the highest rowid at the time of the split,
+    so lines inserted while the ranges are being read are left out of all of them.
+    """
+    if split_by not in SPLIT_BY:
+        raise ValueError(f"Cannot split by {split_by}. Choose from: {', '.join(SPLIT_BY)}")
+    cur.execute("SELECT MIN(rowid), MAX(rowid) FROM order_lines")
+    low, high = cur.fetchone()
+    if low is None:
+        return []
+    cap = " AND l.rowid <= ?"
+    if split_by == 'rowid':
+        step = max((high - low + 1 + parts - 1) // parts, 1)
+        return [("l.rowid >= ? AND l.rowid < ?" + cap, (start, start + step, high))
+                for start in range(low, high + 1, step)]
+    cur.execute("SELECT COUNT(*) FROM orders WHERE order_date IS NOT NULL")
+    total = cur.fetchone()[0]
+    bounds = []
+    for part in range(1, parts):
+        cur.execute("SELECT order_date FROM orders WHERE order_date IS NOT NULL "
+                    "ORDER BY order_date LIMIT 1 OFFSET ?", (total * part // parts,))
+        row = cur.fetchone()
+        if row and (not bounds or row[0] > bounds[-1]):
+            bounds.append(row[0])
+    if not bounds:
+        return [("1 = 1" + cap, (high,))]
+    # Orders without a date go with the first range
+    ranges = [("(o.order_date < ? OR o.order_date IS NULL)" + cap, (bounds[0], high))]
+    ranges += [("o.order_date >= ? AND o.order_date < ?" + cap, (start, end, high))
+               for start, end in zip(bounds, bounds[1:])]
+    ranges.append(("o.order_date >= ?" + cap, (bounds[-1], high)))
+    return ranges
+
+def export_orders_range(path, profile, where, params, part_filename, compress, chunk_size):
+    """Worker: write the joined order lines in one range to part_filename, returning the row count"""
+    connection = connect_db(path, profile, read_only=True)
+    try:
+        rows = connection.execute(ORDER_DETAIL_QUERY + " WHERE " + where, params)
+        row_count = 0
+        with open(part_filename, 'wb') as raw:
+            sink = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+            with io.TextIOWrapper(sink, encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                while chunk := rows.fetchmany(chunk_size):
+                    writer.writerows(chunk)
+                    row_count += len(chunk)
+        return row_count
+    finally:
+        connection.close()
+
+def parallel_export_orders(filename, compress=False, workers=None, split_by='rowid',
+                           chunk_size=EXPORT_CHUNK_SIZE):
+    """Export the joined orders using a pool of worker processes, returning (rows, bytes).
+
+    Each worker writes one range to a part file next to filename. The parts
+    are appended to the header in range order; gzip parts are separate gzip
+    members, which together still form one valid .gz file. A run that
+    another connection wrote during is redone (see run_on_unchanged_database).
+    """
+    workers = workers or os.cpu_count() or 1
+    path = database_path(con)
+
+    def export_parts():
+        ranges = split_order_ranges(workers, split_by)
+        if not ranges:
+            return 0, 0
+        part_names = [f"{filename}.part{i}" for i in range(len(ranges))]
+        start = time.perf_counter()
+        row_count = 0
+        try:
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(export_orders_range, path, None, where, params, part, compress, chunk_size)
+                           for (where, params), part in zip(ranges, part_names)]
+                for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                    row_count += future.result()
+                    elapsed = time.perf_counter() - start
+                    rate = row_count / elapsed if elapsed > 0 else 0
+                    print(f"\r{done}/{len(ranges)} parts, {row_count} rows, {rate:,.0f} rows/sec",
+                          end='', flush=True)
+            print()
+            if not row_count:
+                return 0, 0
+
+            with open(filename, 'wb') as out:
+                header = io.StringIO()
+                csv.writer(header).writerow(ORDER_DETAIL_HEADERS)
+                header = header.getvalue().encode('utf-8')
+                out.write(gzip.compress(header) if compress else header)
+                for part in part_names:
+                    with open(part, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+        finally:
+            for part in part_names:
+                if os.path.exists(part):
+                    os.remove(part)
+        return row_count, os.path.getsize(filename)
+
+    return run_on_unchanged_database(
+        export_parts,
+        lambda: stream_query_to_csv(ORDER_DETAIL_QUERY, ORDER_DETAIL_HEADERS, filename, compress, chunk_size))
+
+# SQL for each report dimension over order_lines l, orders o, customers c and products p
+REPORT_DIMENSION_SQL = {
+    'category': "COALESCE(p.category, '')",
+    'sub_category': "COALESCE(p.sub_category, '')",
+    'segment': "COALESCE(c.segment, '')",
+    'region': "COALESCE(c.region, '')",
+    'ship_mode': "COALESCE(o.ship_mode, '')",
+    'month': "COALESCE(substr(o.order_date, 1, 7), '')",
+}
+
+def aggregate_orders_range(path, profile, group_by, where, params):
+    """Worker: totals for one range of order lines, grouped by one report dimension"""
+    connection = connect_db(path, profile, read_only=True)
+    try:
+        return connection.execute(f"""
+        SELECT {REPORT_DIMENSION_SQL[group_by]}, COUNT(*), COALESCE(SUM(l.quantity), 0),
+               COALESCE(SUM(l.sales), 0), COALESCE(SUM(l.profit), 0)
+        FROM order_lines l
+        JOIN orders o ON o.order_id = l.order_id
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN products p ON l.product_id = p.product_id
+        WHERE {where}
+        GROUP BY 1
+        """, params).fetchall()
+    finally:
+        connection.close()
+
+def parallel_sales_report(group_by, workers=None, split_by='rowid'):
+    """sales_report() computed from the order lines themselves, one range per worker process"""
+    if group_by not in REPORT_DIMENSION_SQL:
+        raise ValueError(f"Cannot group by {group_by}")
+    workers = workers or os.cpu_count() or 1
+    path = database_path(con)
+
+    def aggregate_ranges():
+        totals = {}
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(aggregate_orders_range, path, None, group_by, where, params)
+                       for where, params in split_order_ranges(workers, split_by)]
+            for future in concurrent.futures.as_completed(futures):
+                for key, *values in future.result():
+                    current = totals.get(key, (0, 0, 0.0, 0.0))
+                    totals[key] = tuple(a + b for a, b in zip(current, values))
+        return [(key, *totals[key]) for key in sorted(totals)]
+
+    return run_on_unchanged_database(
+        aggregate_ranges, lambda: sorted(aggregate_orders_range(path, None, group_by, "1 = 1", ())))
+
+# Columnar snapshots for analysis. Each export is written column by column
+# with real types, so loading it back needs no parsing:
+#   * with pyarrow installed, one Arrow IPC file (<name>.arrow), which
+#     pyarrow memory-maps without copying;
+#   * otherwise a directory with one .npy file per column. Integers, floats
+#     and dates (datetime64[D], NaT when missing or invalid) are plain arrays;
+#     text columns are int32 codes (-1 for NULL) into a <column>.dict.npy array.
+# Both forms are loaded with load_snapshot().
+SNAPSHOT_FORMATS = ['auto', 'arrow', 'npy']
+
+# Column types of each export, in the order of its query
+SNAPSHOT_TYPES = {
+    'orders': ['str', 'int', 'date', 'date', 'str', 'str', 'str', 'str', 'str', 'str',
+               'str', 'str', 'str', 'int', 'float', 'float', 'float'],
+    'customers': ['str'] * 8,
+    'products': ['str', 'str', 'str', 'str', 'float'],
+}
+
+def snapshot_column_name(header):
+    """'Sub-Category' -> 'sub_category'"""
+    return header.lower().replace(' ', '_').replace('-', '_')
+
+def parse_dates(values):
+    """ISO date strings to datetime.date, None where missing or invalid"""
+    dates = []
+    for value in values:
+        try:
+            dates.append(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            dates.append(None)
+    return dates
+
+class DictionaryColumn:
+    """A dictionary-encoded text column: codes index into dictionary, -1 is NULL"""
+
+    def __init__(self, codes, dictionary):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code < 0 else str(self.dictionary[code])
+
+    def decode(self):
+        """The full column as an object array of str/None"""
+        values = self.dictionary.astype(object)[self.codes]
+        values[self.codes < 0] = None
+        return values
+
+def write_arrow_snapshot(rows, headers, types, filename, chunk_size):
+    """Write rows to an Arrow IPC file one record batch per chunk, returning the row count"""
+    arrow_types = {'str': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'date': pa.date32()}
+    schema = pa.schema([(snapshot_column_name(h), arrow_types[t]) for h, t in zip(headers, types)])
+    row_count = 0
+    with pa.OSFile(filename, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        while chunk := rows.fetchmany(chunk_size):
+            columns = list(zip(*chunk))
+            arrays = [pa.array(parse_dates(values) if t == 'date' else values, type=arrow_types[t])
+                      for values, t in zip(columns, types)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            row_count += len(chunk)
+            print(f"\r{row_count} rows written", end='', flush=True)
+    print()
+    return row_count
+
+def write_npy_snapshot(rows, total, headers, types, directory, chunk_size):
+    """Write rows into preallocated per-column .npy memmaps, returning the row count"""
+    os.makedirs(directory, exist_ok=True)
+    dtypes = {'str': np.int32, 'int': np.int64, 'float': np.float64, 'date': 'datetime64[D]'}
+    names = [snapshot_column_name(h) for h in headers]
+    columns = [np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode='w+',
+                                         dtype=dtypes[t], shape=(total,))
+               for name, t in zip(names, types)]
+    dictionaries = [{} if t == 'str' else None for t in types]
+    null_masks = {}
+
+    row_count = 0
+    while row_count < total and (chunk := rows.fetchmany(min(chunk_size, total - row_count))):
+        end = row_count + len(chunk)
+        for i, (values, t) in enumerate(zip(zip(*chunk), types)):
+            if t == 'str':
+                codes = dictionaries[i]
+                columns[i][row_count:end] = [-1 if v is None else codes.setdefault(v, len(codes))
+                                             for v in values]
+            elif t == 'date':
+                try:
+                    # NumPy parses clean ISO dates itself; None becomes NaT
+                    dates = np.array(values, dtype='datetime64[D]')
+                except ValueError:
+                    dates = np.array(parse_dates(values), dtype='datetime64[D]')
+                columns[i][row_count:end] = dates
+            elif t == 'float':
+                columns[i][row_count:end] = np.array(values, dtype=np.float64)  # None -> nan
+            else:
+                if None in values:
+                    # Integers have no NaN, so missing values are recorded in a mask
+                    if i not in null_masks:
+                        null_masks[i] = np.lib.format.open_memmap(
+                            os.path.join(directory, f"{names[i]}.nulls.npy"), mode='w+',
+                            dtype=np.bool_, shape=(total,))
+                    null_masks[i][row_count:end] = [v is None for v in values]
+                    values = [0 if v is None else v for v in values]
+                columns[i][row_count:end] = values
+        row_count = end
+        print(f"\r{row_count} of {total} rows written", end='', flush=True)
+    print()
+
+    for column in columns + list(null_masks.values()):
+        column.flush()
+    for name, dictionary in zip(names, dictionaries):
+        if dictionary is not None:
+            np.save(os.path.join(directory, f"{name}.dict.npy"),
+                    np.array(list(dictionary) or [''], dtype=str))
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'rows': row_count, 'created': datetime.now().isoformat(timespec='seconds'),
+                   'columns': [{'name': n, 'header': h, 'type': t} for n, h, t in zip(names, headers, types)]},
+                  f, indent=2)
+    return row_count
+
+def export_snapshot(name, path=None, snapshot_format='auto', chunk_size=EXPORT_CHUNK_SIZE):
+    """Write a columnar snapshot of orders, customers or products, returning (path, rows).
+
+    The rows are read inside one transaction on a separate read-only
+    connection, so the row count and the data agree.
+    """
+    if name not in EXPORTS:
+        raise ValueError(f"Unknown export '{name}'. Choose from: {', '.join(EXPORTS)}")
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format '{snapshot_format}'. Choose from: {', '.join(SNAPSHOT_FORMATS)}")
+    if snapshot_format == 'auto':
+        snapshot_format = 'arrow' if pa is not None else 'npy'
+    if snapshot_format == 'arrow' and pa is None:
+        raise ValueError("Arrow snapshots need pyarrow; use the npy format or install pyarrow")
+    if snapshot_format == 'npy' and np is None:
+        raise ValueError("npy snapshots need NumPy; install numpy or pyarrow")
+
+    query, headers = EXPORTS[name]
+    types = SNAPSHOT_TYPES[name]
+    if path is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = f"superstore_{name}_{timestamp}" + (".arrow" if snapshot_format == 'arrow' else "")
+
+    reader = connect_db(database_path(con), read_only=True)
+    try:
+        reader.execute("BEGIN")
+        if snapshot_format == 'arrow':
+            row_count = write_arrow_snapshot(reader.execute(query), headers, types, path, chunk_size)
+        else:
+            total = reader.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+            row_count = write_npy_snapshot(reader.execute(query), total, headers, types, path, chunk_size)
+        reader.rollback()
+    finally:
+        reader.close()
+    return path, row_count
+
+def load_snapshot(path):
+    """Memory-map a snapshot written by export_snapshot().
+
+    Returns a pyarrow Table for .arrow files, or a dict of column name to
+    NumPy array (DictionaryColumn for text) for .npy directories. Nothing is
+    read until the data is used.
+    """
+    if os.path.isdir(path):
+        if np is None:
+            raise ValueError("Loading npy snapshots needs NumPy")
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        columns = {}
+        for column in manifest['columns']:
+            name = column['name']
+            values = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            if column['type'] == 'str':
+                values = DictionaryColumn(values, np.load(os.path.join(path, f"{name}.dict.npy"), mmap_mode='r'))
+            elif os.path.exists(os.path.join(path, f"{name}.nulls.npy")):
+                values = np.ma.masked_array(values, np.load(os.path.join(path, f"{name}.nulls.npy"), mmap_mode='r'))
+            columns[name] = values
+        return columns
+    if pa is None:
+        raise ValueError("Loading Arrow snapshots needs pyarrow")
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+# In-memory analytics. load_order_store() reads every order line once into an
+# OrderStore: one typed array per column instead of a tuple of boxed values per
+# row. Measures are array('d'), dates array('i') day ordinals (0 when missing),
+# and text is dictionary-encoded: array('h')/array('i') codes into a list of
+# the distinct values, seeded from SHIP_MODES, SEGMENTS, REGIONS and
+# CATEGORIES so the usual values always have the same codes (-1 is NULL), with
+# a value -> code dict alongside for lookups. Filters, group-bys and top-N then
+# run over the arrays without SQLite; filters compare whole columns in NumPy
+# when it is installed.
+ORDER_STORE_QUERY = """
+SELECT o.order_id, o.order_date, o.ship_date, o.ship_mode, o.customer_id, c.segment, c.region, c.state,
+       l.product_id, p.category, p.sub_category, l.quantity, l.discount, l.sales, l.profit
+FROM order_lines l
+JOIN orders o ON o.order_id = l.order_id
+JOIN customers c ON o.customer_id = c.customer_id
+JOIN products p ON l.product_id = p.product_id
+"""
+
+# Encoded columns: name -> array typecode, in ORDER_STORE_QUERY order after order_date/ship_date
+ORDER_STORE_CODES = {
+    'order': 'i', 'ship_mode': 'h', 'customer': 'i', 'segment': 'h', 'region': 'h', 'state': 'h',
+    'product': 'i', 'category': 'h', 'sub_category': 'h',
+}
+
+ANALYTICS_DIMENSIONS = ['category', 'sub_category', 'segment', 'region', 'state', 'ship_mode',
+                        'month', 'year', 'customer', 'product', 'order']
+
+ANALYTICS_MEASURES = ['lines', 'quantity', 'sales', 'profit']
+
+class OrderStore:
+    """Order lines held column by column in typed arrays"""
+
+    __slots__ = ('columns', 'dictionaries', 'codes', 'names', 'loaded_at')
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in ORDER_STORE_CODES.items()}
+        self.columns.update(order_date=array('i'), ship_date=array('i'), quantity=array('i'),
+                            discount=array('d'), sales=array('d'), profit=array('d'))
+        self.dictionaries = {name: [] for name in ORDER_STORE_CODES}
+        self.dictionaries.update(ship_mode=list(SHIP_MODES), segment=list(SEGMENTS), region=list(REGIONS),
+                                 category=list(CATEGORIES),
+                                 sub_category=list(dict.fromkeys(s for subs in CATEGORIES.values() for s in subs)))
+        self.codes = {name: {value: code for code, value in enumerate(values)}
+                      for name, values in self.dictionaries.items()}
+        # Display names for customer and product codes
+        self.names = {'customer': [], 'product': []}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self.columns['quantity'])
+
+    def nbytes(self):
+        """Approximate memory held by the columns, dictionaries and names"""
+        total = sum(sys.getsizeof(column) for column in self.columns.values())
+        for values in [*self.dictionaries.values(), *self.names.values()]:
+            total += sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+        return total
+
+    def code(self, dimension, value):
+        """The code of value in an encoded column, or None if it never occurs"""
+        code = self.codes[dimension].get(value)
+        return None if code is None or code < 0 else code
+
+    def label(self, dimension, code):
+        """Display value for a dimension code"""
+        if code < 0:
+            return None
+        if dimension in self.names:
+            return f"{self.names[dimension][code]} ({self.dictionaries[dimension][code]})"
+        return self.dictionaries[dimension][code]
+
+    def select(self, date_from=None, date_to=None, **equals):
+        """Row numbers of the lines matching every dimension=value and the order date range, as an array('l').
+
+        Returns None (every row) when there are no conditions.
+        """
+        codes = {}
+        for dimension, value in equals.items():
+            if dimension not in ORDER_STORE_CODES:
+                raise ValueError(f"Cannot filter on {dimension}. Choose from: {', '.join(ORDER_STORE_CODES)}")
+            codes[dimension] = self.code(dimension, value)
+            if codes[dimension] is None:
+                return array('l')
+        if not codes and not date_from and not date_to:
+            return None
+        low = date.fromisoformat(date_from).toordinal() if date_from else 1
+        high = date.fromisoformat(date_to).toordinal() if date_to else date.max.toordinal()
+        if np is not None:
+            return self._select_numpy(codes, (low, high) if date_from or date_to else None)
+
+        rows = None
+        for dimension, code in codes.items():
+            column = self.columns[dimension]
+            if rows is None:
+                rows = list(compress(range(len(column)), map(code.__eq__, column)))
+            else:
+                rows = [i for i in rows if column[i] == code]
+        if date_from or date_to:
+            dates = self.columns['order_date']
+            if rows is None:
+                rows = [i for i, day in enumerate(dates) if low <= day <= high]
+            else:
+                rows = [i for i in rows if low <= dates[i] <= high]
+        return array('l', rows)
+
+    def _select_numpy(self, codes, date_range):
+        """select() as boolean masks over zero-copy views of the columns"""
+        def view(name):
+            column = self.columns[name]
+            return np.frombuffer(column, dtype=column.typecode) if len(column) else np.empty(0, column.typecode)
+
+        mask = np.ones(len(self), dtype=bool)
+        for dimension, code in codes.items():
+            mask &= view(dimension) == code
+        if date_range:
+            low, high = date_range
+            dates = view('order_date')
+            mask &= (dates >= low) & (dates <= high)
+        rows = array('l')
+        rows.frombytes(np.flatnonzero(mask).astype(rows.typecode).tobytes())
+        return rows
+
+    def take(self, name, rows=None):
+        """A column, or just the given rows of it"""
+        column = self.columns[name]
+        return column if rows is None else [column[i] for i in rows]
+
+    def group_by(self, dimension, rows=None):
+        """(key, lines, quantity, sales, profit) per value of dimension, in key order"""
+        if dimension not in ANALYTICS_DIMENSIONS:
+            raise ValueError(f"Cannot group by {dimension}. Choose from: {', '.join(ANALYTICS_DIMENSIONS)}")
+        if dimension in ('month', 'year'):
+            keys = self.take('order_date', rows)
+        else:
+            keys = self.take(dimension, rows)
+        totals = {}
+        for key, quantity, sales, profit in zip(keys, self.take('quantity', rows),
+                                               self.take('sales', rows), self.take('profit', rows)):
+            group = totals.get(key)
+            if group is None:
+                totals[key] = [1, quantity, sales, profit]
+            else:
+                group[0] += 1
+                group[1] += quantity
+                group[2] += sales
+                group[3] += profit
+
+        labelled = {}
+        for key, group in totals.items():
+            if dimension in ('month', 'year'):
+                day = date.fromordinal(key).isoformat() if key else None
+                label = day and (day[:7] if dimension == 'month' else day[:4])
+            else:
+                label = self.label(dimension, key)
+            if label in labelled:
+                labelled[label] = [a + b for a, b in zip(labelled[label], group)]
+            else:
+                labelled[label] = group
+        return [(key, *labelled[key]) for key in sorted(labelled, key=lambda k: (k is None, k or ''))]
+
+    def top(self, dimension, n=10, measure='sales', rows=None):
+        """The n groups of dimension with the highest measure"""
+        if measure not in ANALYTICS_MEASURES:
+            raise ValueError(f"Cannot rank by {measure}. Choose from: {', '.join(ANALYTICS_MEASURES)}")
+        index = ANALYTICS_MEASURES.index(measure) + 1
+        return heapq.nlargest(n, self.group_by(dimension, rows), key=lambda row: row[index])
+
+def load_order_store(chunk_size=EXPORT_CHUNK_SIZE):
+    """Read every order line into a new OrderStore"""
+    store = OrderStore()
+    encoders = store.codes
+    for codes in encoders.values():
+        codes[None] = -1
+
+    # Customers and products are coded in table order with their names alongside
+    for dimension, query in [('customer', "SELECT customer_id, customer_name FROM customers"),
+                             ('product', "SELECT product_id, product_name FROM products")]:
+        cur.execute(query)
+        for key, name in cur.fetchall():
+            encoders[dimension][key] = len(store.dictionaries[dimension])
+            store.dictionaries[dimension].append(key)
+            store.names[dimension].append(name)
+
+    def encode(name, values):
+        codes = encoders[name]
+        # Almost every value has been seen before, so try plain lookups first
+        encoded = list(map(codes.get, values))
+        if None in encoded:
+            dictionary = store.dictionaries[name]
+            for i, value in enumerate(values):
+                if encoded[i] is None:
+                    encoded[i] = codes.get(value)
+                    if encoded[i] is None:
+                        encoded[i] = codes[value] = len(dictionary)
+                        dictionary.append(value)
+        return encoded
+
+    ordinals = {None: 0}
+    def ordinal(value):
+        day = ordinals.get(value)
+        if day is None:
+            try:
+                day = date.fromisoformat(value).toordinal()
+            except (TypeError, ValueError):
+                day = 0
+            ordinals[value] = day
+        return day
+
+    columns = store.columns
+    cur.execute(ORDER_STORE_QUERY)
+    start = time.perf_counter()
+    while rows := cur.fetchmany(chunk_size):
+        (orders, order_dates, ship_dates, ship_modes, customers, segments, regions, states,
+         products, categories, sub_categories, quantities, discounts, sales, profits) = zip(*rows)
+        for name, values in [('order', orders), ('ship_mode', ship_modes), ('customer', customers),
+                             ('segment', segments), ('region', regions), ('state', states),
+                             ('product', products), ('category', categories), ('sub_category', sub_categories)]:
+            columns[name].extend(encode(name, values))
+        columns['order_date'].extend(map(ordinal, order_dates))
+        columns['ship_date'].extend(map(ordinal, ship_dates))
+        columns['quantity'].extend(quantity or 0 for quantity in quantities)
+        for name, values in [('discount', discounts), ('sales', sales), ('profit', profits)]:
+            columns[name].extend(float('nan') if value is None else value for value in values)
+        elapsed = time.perf_counter() - start
+        print(f"\r{len(store)} order lines loaded, {len(store) / elapsed if elapsed > 0 else 0:,.0f} lines/sec",
+              end='', flush=True)
+    print()
+    store.loaded_at = datetime.now()
+    return store
+
+# The store loaded for this session, kept until reloaded
+_order_store = None
+
+def get_order_store(reload=False):
+    """Return the session's OrderStore, loading it on first use"""
+    global _order_store
+    if _order_store is None or reload:
+        _order_store = None
+        _order_store = load_order_store()
+    return _order_store
+
+def print_analytics(rows, dimension):
+    if not rows:
+        print("No matching order lines.")
+        return
+    print(tabulate([[key, count, quantity, f"${sales:,.2f}", f"${profit:,.2f}"]
+                    for key, count, quantity, sales, profit in rows],
+                   headers=[dimension.replace('_', '-').title(), 'Order Lines', 'Quantity', 'Sales', 'Profit'],
+                   tablefmt='grid'))
+
+def analytics_menu():
+    store = get_order_store()
+    filters, date_from, date_to = {}, None, None
+    rows = None
+    while True:
+        size = store.nbytes()
+        print(f"\nAnalytics: {len(store)} order lines in memory, {size / 2**20:,.1f} MB "
+              f"({size / max(len(store), 1):,.0f} bytes/line), loaded {store.loaded_at:%H:%M:%S}")
+        if filters or date_from or date_to:
+            conditions = [f"{k}={v}" for k, v in filters.items()] + [f"from {date_from}"] * bool(date_from) \
+                         + [f"to {date_to}"] * bool(date_to)
+            print(f"Filter: {', '.join(conditions)} ({len(rows)} lines)")
+        print("1. Group By \n2. Top N \n3. Add Filter \n4. Clear Filters \n5. Reload \n6. Back")
+
+        try:
+            choice = input("Enter your choice: ")
+            if choice in ('1', '2'):
+                dimension = choose_from("Dimension", ANALYTICS_DIMENSIONS)
+                if choice == '1':
+                    print_analytics(store.group_by(dimension, rows), dimension)
+                else:
+                    measure = choose_from("Rank by", ANALYTICS_MEASURES)
+                    n = int(input("How many (default 10): ") or 10)
+                    print_analytics(store.top(dimension, n, measure, rows), dimension)
+            elif choice == '3':
+                dimensions = [d for d in ANALYTICS_DIMENSIONS if d in ORDER_STORE_CODES] + ['order date']
+                dimension = choose_from("Filter on", dimensions)
+                if dimension == 'order date':
+                    date_from, date_to = ask_date_range()
+                elif dimension in store.names or dimension == 'order':
+                    filters[dimension] = input(f"{dimension.title()} ID: ").strip()
+                else:
+                    filters[dimension] = choose_from(dimension.replace('_', '-').title(),
+                                                     [v for v in store.dictionaries[dimension] if v is not None])
+                rows = store.select(date_from, date_to, **filters)
+            elif choice == '4':
+                filters, date_from, date_to, rows = {}, None, None, None
+            elif choice == '5':
+                store = get_order_store(reload=True)
+                rows = store.select(date_from, date_to, **filters)
+            elif choice == '6':
+                break
+            else:
+                print("Invalid choice. Please try again.")
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+
+# Add new function to download as CSV
+def download_as_csv():
+    try:
+        print("\nWhich data would you like to export?")
+        print("1. Orders (with full details)")
+        print("2. Customers")
+        print("3. Products")
+        print("4. Changes since the last sync")
+        choice = input("Enter your choice: ")
+
+        if choice == '4':
+            consumer = input(f"Sync consumer (blank for {DEFAULT_CONSUMER}): ").strip() or DEFAULT_CONSUMER
+            compress = input("Compress with gzip? (y/n): ").lower() == 'y'
+            since, upto, results = export_changes(consumer, compress=compress)
+            print(f"Changes {since or 0} to {upto}" + (" (full export, first sync)" if since is None else ""))
+            for table, (filename, row_count, size) in results.items():
+                if filename:
+                    print(f"{table}: {row_count} rows, {size:,} bytes in {os.path.abspath(filename)}")
+                else:
+                    print(f"{table}: no changes")
+            return
+        
+        name = {'1': 'orders', '2': 'customers', '3': 'products'}.get(choice)
+        if name is None:
+            print("Invalid choice")
+            return
+
+        history, date_from, date_to = False, None, None
+        if name == 'orders' and archive_files():
+            history = input("Include archived orders? (y/n): ").lower() == 'y'
+            if history:
+                date_from, date_to = ask_date_range()
+        compress = input("Compress with gzip? (y/n): ").lower() == 'y'
+            
+        # Orders are split across every core; the other tables are small
+        filename, row_count, size = export_csv(name, compress=compress, workers=None,
+                                               history=history, date_from=date_from, date_to=date_to)
+        if not row_count:
+            print("No data to export.")
+            return
+        
+        print(f"Data successfully exported to {filename}")
+        print(f"Rows: {row_count}, Size: {size:,} bytes")
+        print(f"Full path: {os.path.abspath(filename)}")
+    
+    except Exception as e:
+        print(f"Error exporting to CSV: {str(e)}")
+
+# Rows written per executemany() call and transaction while importing
+IMPORT_BATCH_SIZE = 10000
+
+def open_csv_for_read(filename):
+    """Open a .csv or .csv.gz file for csv.reader"""
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt', encoding='utf-8', newline='')
+    return open(filename, 'r', encoding='utf-8', newline='')
+
+def insert_batch(sql, batch, source_rows, rejects):
+    """executemany() one batch, falling back to row by row to find rejected rows"""
+    try:
+        cur.executemany(sql, batch)
+        con.commit()
+        return len(batch)
+    except sqlite3.IntegrityError:
+        con.rollback()
+
+    inserted = 0
+    for params, source in zip(batch, source_rows):
+        try:
+            cur.execute(sql, params)
+            inserted += 1
+        except sqlite3.IntegrityError as e:
+            rejects.append(source + [f"Duplicate or invalid row: {e}"])
+    con.commit()
+    return inserted
+
+def prepare_customer_rows(rows, columns, seen, rejects):
+    """Turn CSV rows into customers INSERT parameters"""
+    batch, sources = [], []
+    for row in rows:
+        params = tuple(row[columns[h]] for h in CUSTOMER_HEADERS)
+        if params[0] in seen:
+            rejects.append(row + ["Duplicate Customer ID in file"])
+            continue
+        seen.add(params[0])
+        batch.append(params)
+        sources.append(row)
+    return batch, sources
+
+def prepare_product_rows(rows, columns, seen, rejects):
+    """Turn CSV rows into products INSERT parameters"""
+    batch, sources = [], []
+    for row in rows:
+        params = [row[columns[h]] for h in PRODUCT_HEADERS]
+        try:
+            params[4] = float(params[4])
+        except ValueError:
+            rejects.append(row + ["Invalid Unit Price"])
+            continue
+        if params[0] in seen:
+            rejects.append(row + ["Duplicate Product ID in file"])
+            continue
+        seen.add(params[0])
+        batch.append(tuple(params))
+        sources.append(row)
+    return batch, sources
+
+def prepare_order_rows(rows, columns, seen, rejects, lookups):
+    """Validate CSV order rows and price them with calculate_financials_batch.
+
+    Rows sharing an Order ID are lines of one order; the header is taken from
+    the first of them. seen maps each Order ID to the last line number used,
+    or None once the order has been rejected. Returns (header or None, line)
+    pairs with the rows they came from.
+    """
+    prices, customer_ids, customers_by_name, products_by_name = lookups
+    by_id = 'Customer ID' in columns
+    batch, sources = [], []
+    for row in rows:
+        order_id = row[columns['Order ID']]
+        if by_id:
+            customer_id = row[columns['Customer ID']]
+            product_id = row[columns['Product ID']]
+        else:
+            # Exported layout: resolve names back to IDs
+            customer_id = customers_by_name.get(row[columns['Customer']])
+            product_id = products_by_name.get(row[columns['Product']])
+        if customer_id not in customer_ids:
+            rejects.append(row + ["Unknown or ambiguous customer"])
+            continue
+        if product_id not in prices:
+            rejects.append(row + ["Unknown or ambiguous product"])
+            continue
+        if order_id in seen and seen[order_id] is None:
+            rejects.append(row + ["Order rejected earlier in file"])
+            continue
+        try:
+            quantity = int(row[columns['Quantity']])
+            line_number = int(row[columns['Line']]) if 'Line' in columns else seen.get(order_id, 0) + 1
+            check_quantity(product_id, quantity)
+        except ValueError:
+            rejects.append(row + ["Invalid Quantity or Line"])
+            continue
+        header = None
+        if order_id not in seen:
+            try:
+                order_date, ship_date = check_order_dates(row[columns['Order Date']], row[columns['Ship Date']])
+            except ValueError as e:
+                seen[order_id] = None
+                rejects.append(row + [f"Invalid Order Date or Ship Date: {e}"])
+                continue
+            try:
+                check_ship_mode(row[columns['Ship Mode']])
+            except ValueError as e:
+                seen[order_id] = None
+                rejects.append(row + [str(e)])
+                continue
+            header = (order_id, order_date, ship_date, row[columns['Ship Mode']], customer_id)
+        seen[order_id] = max(line_number, seen.get(order_id, 0))
+        batch.append((header, (order_id, line_number, product_id, quantity)))
+        sources.append(row)
+
+    # Price the whole batch in one pass
+    if batch:
+        discounts, sales, profits = calculate_financials_batch(
+            [line[3] for _, line in batch], [prices[line[2]] for _, line in batch])
+        batch = [(header, line + (float(d), float(s), float(p)))
+                 for (header, line), d, s, p in zip(batch, discounts, sales, profits)]
+    return batch, sources
+
+ORDER_HEADER_INSERT = """
+INSERT INTO orders(order_id, order_date, ship_date, ship_mode, customer_id) VALUES(?, ?, ?, ?, ?)
+"""
+
+ORDER_LINE_INSERT = "INSERT INTO order_lines VALUES(?, ?, ?, ?, ?, ?, ?)"
+
+def insert_order_batch(batch, source_rows, rejects, seen):
+    """Insert one batch of order headers and lines, falling back to order by order"""
+    try:
+        cur.executemany(ORDER_HEADER_INSERT, [header for header, _ in batch if header])
+        cur.executemany(ORDER_LINE_INSERT, [line for _, line in batch])
+        con.commit()
+        return len(batch)
+    except sqlite3.IntegrityError:
+        con.rollback()
+
+    inserted = 0
+    for (header, line), source in zip(batch, source_rows):
+        order_id = line[0]
+        if seen[order_id] is None:
+            rejects.append(source + ["Order rejected earlier in file"])
+            continue
+        try:
+            if header:
+                cur.execute(ORDER_HEADER_INSERT, header)
+            cur.execute(ORDER_LINE_INSERT, line)
+            inserted += 1
+        except sqlite3.IntegrityError as e:
+            if header:
+                # Without its header none of the order's lines can go in
+                seen[order_id] = None
+            rejects.append(source + [f"Duplicate or invalid row: {e}"])
+    con.commit()
+    return inserted
+
+def load_order_lookups():
+    """Pre-load the maps needed to validate and price orders without per-row queries"""
+    prices, products_by_name = {}, {}
+    for product_id, (product_name, _, _, unit_price) in get_product_catalog().items():
+        prices[product_id] = unit_price
+        # A name shared by several products can't be resolved, so map it to None
+        products_by_name[product_name] = None if product_name in products_by_name else product_id
+
+    cur.execute("SELECT customer_id, customer_name FROM customers")
+    customer_ids, customers_by_name = set(), {}
+    for customer_id, customer_name in cur.fetchall():
+        customer_ids.add(customer_id)
+        customers_by_name[customer_name] = None if customer_name in customers_by_name else customer_id
+    return prices, customer_ids, customers_by_name, products_by_name
+
+def bulk_import_csv(table_name, filename, batch_size=IMPORT_BATCH_SIZE):
+    """Load a CSV in the download_as_csv() layout into table_name.
+
+    Rows are inserted with executemany() in batches of batch_size, one
+    transaction per batch. Rejected rows are written to a side file next to
+    the input. Returns (inserted, rejected, rejects_filename).
+    """
+    with open_csv_for_read(filename) as f:
+        reader = csv.reader(f)
+        headers = next(reader, None)
+        if headers is None:
+            raise ValueError("The file is empty")
+        columns = {h.strip(): i for i, h in enumerate(headers)}
+
+        seen, rejects = set(), []
+        if table_name == 'customers':
+            required = CUSTOMER_HEADERS
+            prepare = prepare_customer_rows
+        elif table_name == 'products':
+            required = PRODUCT_HEADERS
+            prepare = prepare_product_rows
+        else:
+            # Orders can reference customers/products by ID or, as exported, by name
+            if 'Customer ID' in columns:
+                required = ['Order ID', 'Order Date', 'Ship Date', 'Ship Mode',
+                            'Customer ID', 'Product ID', 'Quantity']
+            else:
+                required = ['Order ID', 'Order Date', 'Ship Date', 'Ship Mode',
+                            'Customer', 'Product', 'Quantity']
+            # A file may hold several lines per order, optionally numbered in a 'Line' column
+            seen = {}
+            lookups = load_order_lookups()
+            def prepare(rows, columns, seen, rejects):
+                return prepare_order_rows(rows, columns, seen, rejects, lookups)
+
+        missing = [h for h in required if h not in columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        if table_name == 'orders':
+            def insert(batch, sources, rejects):
+                return insert_order_batch(batch, sources, rejects, seen)
+        else:
+            sql = f"INSERT INTO {table_name} VALUES({', '.join(['?'] * len(required))})"
+            def insert(batch, sources, rejects):
+                return insert_batch(sql, batch, sources, rejects)
+        inserted = rejected = 0
+        rejects_filename = None
+        start = time.perf_counter()
+
+        while True:
+            rows = [row for _, row in zip(range(batch_size), reader)]
+            if not rows:
+                break
+            valid = [row for row in rows if len(row) >= len(headers)]
+            rejects.extend(row + ["Wrong number of columns"] for row in rows if len(row) < len(headers))
+            batch, sources = prepare(valid, columns, seen, rejects)
+            inserted += insert(batch, sources, rejects)
+
+            if rejects:
+                if rejects_filename is None:
+                    rejects_filename = filename.rsplit('.csv', 1)[0] + '_rejects.csv'
+                    with open(rejects_filename, 'w', newline='', encoding='utf-8') as rf:
+                        csv.writer(rf).writerow(headers + ['Reason'])
+                with open(rejects_filename, 'a', newline='', encoding='utf-8') as rf:
+                    csv.writer(rf).writerows(rejects)
+                rejected += len(rejects)
+                rejects = []
+
+            elapsed = time.perf_counter() - start
+            rate = inserted / elapsed if elapsed > 0 else 0
+            print(f"\r{inserted} rows imported, {rejected} rejected, {rate:,.0f} rows/sec", end='', flush=True)
+    print()
+    if table_name == 'products':
+        invalidate_product_catalog()
+    return inserted, rejected, rejects_filename
+
+def import_from_csv():
+    try:
+        print("\nWhich data would you like to import?")
+        print("1. Orders")
+        print("2. Customers")
+        print("3. Products")
+        choice = input("Enter your choice: ")
+
+        table_name = {'1': 'orders', '2': 'customers', '3': 'products'}.get(choice)
+        if table_name is None:
+            print("Invalid choice")
+            return
+
+        filename = input("Enter the CSV file to import (.csv or .csv.gz): ").strip()
+        inserted, rejected, rejects_filename = bulk_import_csv(table_name, filename)
+
+        print(f"Imported {inserted} rows into {table_name}")
+        if rejected:
+            print(f"{rejected} rows rejected, see {os.path.abspath(rejects_filename)}")
+
+    except FileNotFoundError:
+        print("File not found.")
+    except Exception as e:
+        print(f"Error importing CSV: {str(e)}")
+
+# Add these functions before the main menu loop:
+
+# Fields that can be changed on each table, keyed by that table's primary key.
+# Order lines are identified by (order_id, line_number).
+UPDATABLE_FIELDS = {
+    'orders': ('order_id', ['order_date', 'ship_date', 'ship_mode', 'customer_id']),
+    'order_lines': (('order_id', 'line_number'), ['product_id', 'quantity', 'discount', 'sales', 'profit']),
+    'customers': ('customer_id', ['customer_name', 'segment', 'country', 'city',
+                                  'state', 'postal_code', 'region']),
+    'products': ('product_id', ['category', 'sub_category', 'product_name', 'unit_price']),
+}
+
+# Fields restricted to a fixed list of values
+FIELD_CHOICES = {'ship_mode': SHIP_MODES, 'segment': SEGMENTS, 'region': REGIONS,
+                 'category': list(CATEGORIES)}
+
+# Predicates a bulk update can filter on, as conditions on the updated table
+# (aliased t) taking one parameter each. Several filters are ANDed together.
+BULK_FILTERS = {
+    'orders': {
+        'order_date_from': "t.order_date >= ?",
+        'order_date_to': "t.order_date <= ?",
+        'ship_mode': "t.ship_mode = ?",
+        'customer_id': "t.customer_id = ?",
+        'region': "t.customer_id IN (SELECT customer_id FROM customers WHERE region = ?)",
+        'segment': "t.customer_id IN (SELECT customer_id FROM customers WHERE segment = ?)",
+    },
+    'order_lines': {
+        'order_id': "t.order_id = ?",
+        'product_id': "t.product_id = ?",
+        'category': "t.product_id IN (SELECT product_id FROM products WHERE category = ?)",
+        'sub_category': "t.product_id IN (SELECT product_id FROM products WHERE sub_category = ?)",
+        'order_date_from': "t.order_id IN (SELECT order_id FROM orders WHERE order_date >= ?)",
+        'order_date_to': "t.order_id IN (SELECT order_id FROM orders WHERE order_date <= ?)",
+        'region': """t.order_id IN (SELECT o.order_id FROM orders o
+                     JOIN customers c ON c.customer_id = o.customer_id WHERE c.region = ?)""",
+    },
+    'customers': {
+        'segment': "t.segment = ?",
+        'region': "t.region = ?",
+        'country': "t.country = ?",
+        'state': "t.state = ?",
+        'city': "t.city = ?",
+    },
+    'products': {
+        'category': "t.category = ?",
+        'sub_category': "t.sub_category = ?",
+    },
+}
+
+def iso_date(value):
+    """normalize_date() for SQL: unreadable dates come back unchanged rather than raising"""
+    try:
+        return normalize_date(value)
+    except ValueError:
+        return value
+
+def register_sql_functions(connection):
+    """Expose calculate_financials to SQL as line_discount/line_sales/line_profit(quantity, unit_price)
+    and normalize_date as iso_date(value)"""
+    for index, name in enumerate(['line_discount', 'line_sales', 'line_profit']):
+        def financial(quantity, unit_price, index=index):
+            if quantity is None or unit_price is None:
+                return None
+            return calculate_financials(quantity, unit_price)[index]
+        connection.create_function(name, 2, financial, deterministic=True)
+    connection.create_function('iso_date', 1, iso_date, deterministic=True)
+
+def check_update_value(table_name, field, value):
+    """Validate a new value for table_name.field and convert it to the column's type"""
+    if table_name not in UPDATABLE_FIELDS:
+        raise ValueError(f"Unknown table '{table_name}'")
+    fields = UPDATABLE_FIELDS[table_name][1]
+    if field not in fields:
+        raise ValueError(f"Cannot update {table_name}.{field}. Choose from: {', '.join(fields)}")
+
+    if field in FIELD_CHOICES and value not in FIELD_CHOICES[field]:
+        raise ValueError(f"Unknown {field} '{value}'. Choose from: {', '.join(FIELD_CHOICES[field])}")
+    if field == 'quantity':
+        value = int(value)
+        if value <= 0:
+            raise ValueError("Quantity must be positive")
+    elif field in ('discount', 'sales', 'profit', 'unit_price'):
+        value = float(value)
+    elif field in ('order_date', 'ship_date'):
+        value = normalize_date(value)
+    elif field == 'product_id' and value not in get_product_catalog():
+        raise ValueError(f"Invalid Product ID '{value}'")
+    elif field == 'customer_id':
+        cur.execute("SELECT 1 FROM customers WHERE customer_id = ?", (value,))
+        if not cur.fetchone():
+            raise ValueError(f"Invalid Customer ID '{value}'")
+    return value
+
+def load_bulk_ids(filename):
+    """Load one ID per line of filename into temp.bulk_ids, returning how many were read"""
+    with open(filename, 'r', newline='') as file:
+        ids = [(line.strip(),) for line in file if line.strip()]
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids(id TEXT PRIMARY KEY)")
+    cur.execute("DELETE FROM temp.bulk_ids")
+    cur.executemany("INSERT OR IGNORE INTO temp.bulk_ids VALUES(?)", ids)
+    con.commit()
+    return len(ids)
+
+def bulk_conditions(table_name, filters=None, ids_file=None):
+    """WHERE conditions and parameters selecting the rows a bulk update touches.
+
+    filters maps BULK_FILTERS names to values. ids_file lists primary keys,
+    or order IDs when updating order_lines.
+    """
+    conditions, params = [], []
+    for name, value in (filters or {}).items():
+        if name not in BULK_FILTERS[table_name]:
+            raise ValueError(f"Cannot filter {table_name} by '{name}'. "
+                             f"Choose from: {', '.join(BULK_FILTERS[table_name])}")
+        conditions.append(BULK_FILTERS[table_name][name])
+        params.append(value)
+    if ids_file:
+        load_bulk_ids(ids_file)
+        key = UPDATABLE_FIELDS[table_name][0]
+        key = key[0] if isinstance(key, tuple) else key
+        conditions.append(f"t.{key} IN (SELECT id FROM temp.bulk_ids)")
+    if not conditions:
+        raise ValueError("A bulk update needs at least one filter or an ID file")
+    return conditions, params
+
+def count_matching(table_name, conditions, params):
+    """Number of rows of table_name matching conditions, for previewing an update"""
+    cur.execute(f"SELECT COUNT(*) FROM {table_name} AS t WHERE {' AND '.join(conditions)}", params)
+    return cur.fetchone()[0]
+
+def apply_update(table_name, field, value, conditions, params):
+    """Set field to value on every row matching conditions with one UPDATE statement.
+
+    Changing an order line's quantity or product recomputes its discount,
+    sales and profit through calculate_financials in the same statement.
+    Returns the number of rows changed.
+    """
+    value = check_update_value(table_name, field, value)
+    if table_name == 'orders' and field in ('order_date', 'ship_date'):
+        # Every matched order has to keep shipping on or after the day it was placed
+        clash = "t.ship_date < ?" if field == 'order_date' else "t.order_date > ?"
+        clashing = count_matching(table_name, conditions + [clash], list(params) + [value])
+        if clashing:
+            raise ValueError(f"{clashing} matching orders would ship before they were placed")
+    source = ""
+    if table_name == 'order_lines' and field == 'quantity':
+        # Reprice each line from its own product
+        assignments = ("quantity = ?, discount = line_discount(?, p.unit_price), "
+                       "sales = line_sales(?, p.unit_price), profit = line_profit(?, p.unit_price)")
+        source = "FROM products p"
+        conditions = ["p.product_id = t.product_id"] + conditions
+        params = [value] * 4 + list(params)
+    elif table_name == 'order_lines' and field == 'product_id':
+        # Reprice each line from the new product
+        assignments = ("product_id = p.product_id, discount = line_discount(t.quantity, p.unit_price), "
+                       "sales = line_sales(t.quantity, p.unit_price), profit = line_profit(t.quantity, p.unit_price)")
+        source = "FROM products p"
+        conditions = ["p.product_id = ?"] + conditions
+        params = [value] + list(params)
+    else:
+        assignments = f"{field} = ?"
+        params = [value] + list(params)
+
+    try:
+        cur.execute(f"UPDATE {table_name} AS t SET {assignments} {source} WHERE {' AND '.join(conditions)}",
+                    params)
+        changed = cur.rowcount
+        con.commit()
+    except sqlite3.Error:
+        con.rollback()
+        raise
+    if table_name == 'products':
+        invalidate_product_catalog()
+    return changed
+
+def update_field(table_name, record_id, field, value):
+    """Set one field of one record, identified by its primary key. Returns rows changed.
+
+    record_id is a tuple of key values for tables with a composite key.
+    """
+    if table_name not in UPDATABLE_FIELDS:
+        raise ValueError(f"Unknown table '{table_name}'")
+    key = UPDATABLE_FIELDS[table_name][0]
+    if isinstance(key, tuple):
+        conditions, key_values = [f"t.{column} = ?" for column in key], list(record_id)
+    else:
+        conditions, key_values = [f"t.{key} = ?"], [record_id]
+    return apply_update(table_name, field, value, conditions, key_values)
+
+def bulk_update(table_name, field, value, filters=None, ids_file=None):
+    """Set field to value on every record matching filters and/or listed in ids_file. Returns rows changed."""
+    conditions, params = bulk_conditions(table_name, filters, ids_file)
+    return apply_update(table_name, field, value, conditions, params)
+
+def choose_from(label, options):
+    """Print a numbered list of options and return the one picked"""
+    for i, option in enumerate(options, 1):
+        print(f"{i}. {option}")
+    choice = int(input(f"Choose {label} (enter number): "))
+    if not 1 <= choice <= len(options):
+        raise ValueError(f"No {label} number {choice}")
+    return options[choice - 1]
+
+def prompt_update_value(field):
+    """Ask for a new value of field, offering a list where the values are fixed"""
+    if field in FIELD_CHOICES:
+        return choose_from(field.replace('_', ' ').title(), FIELD_CHOICES[field])
+    if field == 'sub_category':
+        return choose_from('Sub-Category', [sub for subs in CATEGORIES.values() for sub in subs])
+    if field == 'product_id':
+        return choose_product()
+    hint = " (YYYY-MM-DD)" if field in ('order_date', 'ship_date') else ""
+    return input(f"Enter new {field.replace('_', ' ').title()}{hint}: ").strip()
+
+UPDATE_TABLES = [('Order', 'orders'), ('Order Line', 'order_lines'),
+                 ('Customer', 'customers'), ('Product', 'products')]
+
+def update_table():
+    while True:
+        print("\n1. Update Order Details \n2. Update Order Line Details \n3. Update Customer Details")
+        print("4. Update Product Details \n5. Bulk Update by Filter \n6. Bulk Update from ID File \n7. Exit")
+        choice = input("Enter your choice: ")
+
+        try:
+            if choice in ['1', '2', '3', '4']:
+                label, table_name = UPDATE_TABLES[int(choice) - 1]
+                key = UPDATABLE_FIELDS[table_name][0]
+                if isinstance(key, tuple):
+                    record_id = (input("Enter Order ID of the record to update: ").strip(),
+                                 int(input("Enter Line number: ")))
+                else:
+                    record_id = input(f"Enter {label} ID of the record to update: ").strip()
+                print()
+                field = choose_from('field to update', UPDATABLE_FIELDS[table_name][1])
+                if update_field(table_name, record_id, field, prompt_update_value(field)):
+                    print("Record updated successfully!")
+                else:
+                    print(f"No {label.lower()} found with that ID.")
+
+            elif choice in ['5', '6']:
+                print()
+                table_name = choose_from('table', [table for _, table in UPDATE_TABLES])
+                filters, ids_file = {}, None
+                if choice == '5':
+                    print("\nFilters (leave blank to skip):")
+                    for name in BULK_FILTERS[table_name]:
+                        value = input(f"  {name}: ").strip()
+                        if value:
+                            filters[name] = value
+                else:
+                    ids_file = input("Enter file with one ID per line"
+                                     f"{' (order IDs)' if table_name == 'order_lines' else ''}: ")
+                conditions, params = bulk_conditions(table_name, filters, ids_file)
+
+                matching = count_matching(table_name, conditions, params)
+                if not matching:
+                    print("No records match.")
+                    continue
+                print(f"\n{matching} {table_name} records match.")
+                field = choose_from('field to update', UPDATABLE_FIELDS[table_name][1])
+                value = prompt_update_value(field)
+                if input(f"Set {field} to '{value}' on {matching} records? (y/n): ").lower() != 'y':
+                    print("Update cancelled.")
+                    continue
+                changed = apply_update(table_name, field, value, conditions, params)
+                print(f"{changed} records updated successfully!")
+
+            elif choice == '7':
+                print("Exiting update menu.")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+        except FileNotFoundError:
+            print("File not found.")
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+def count_orders_for(column, value):
+    """Number of orders for a customer_id, or holding a line for a product_id"""
+    if column == 'customer_id':
+        cur.execute("SELECT COUNT(*) FROM orders WHERE customer_id = ?", (value,))
+    elif column == 'product_id':
+        cur.execute("SELECT COUNT(DISTINCT order_id) FROM order_lines WHERE product_id = ?", (value,))
+    else:
+        raise ValueError(f"Cannot count orders by {column}")
+    return cur.fetchone()[0]
+
+def delete_order(order_id):
+    """Delete one order and its lines, returning True if it existed"""
+    cur.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+    deleted = cur.rowcount > 0
+    con.commit()
+    return deleted
+
+def delete_customer(customer_id):
+    """Delete a customer and all of their orders, returning the number of orders deleted"""
+    cur.execute("DELETE FROM orders WHERE customer_id = ?", (customer_id,))
+    order_count = cur.rowcount
+    cur.execute("DELETE FROM customers WHERE customer_id = ?", (customer_id,))
+    con.commit()
+    return order_count
+
+def delete_product(product_id):
+    """Delete a product and its order lines, returning the number of orders it was on.
+
+    Orders left without any lines are deleted as well.
+    """
+    cur.execute("SELECT DISTINCT order_id FROM order_lines WHERE product_id = ?", (product_id,))
+    order_ids = cur.fetchall()
+    order_count = len(order_ids)
+    cur.execute("DELETE FROM order_lines WHERE product_id = ?", (product_id,))
+    cur.executemany("""
+    DELETE FROM orders WHERE order_id = ?
+    AND NOT EXISTS (SELECT 1 FROM order_lines WHERE order_id = ?)
+    """, [(order_id, order_id) for order_id, in order_ids])
+    cur.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+    con.commit()
+    invalidate_product_catalog()
+    return order_count
+
+# Batched purges. A purge deletes matching rows a chunk at a time, each chunk
+# in its own short transaction that also advances the job's cursor in
+# purge_jobs, then pauses so clerks' inserts get the write lock in between.
+# The cursor is an Order ID, the same key the pager walks, so it stays valid
+# across a VACUUM (which may renumber rowids). Chunks go up to the highest
+# Order ID when the job was created, so a purge always finishes. An
+# interrupted job resumes from its cursor.
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE = 0.05  # seconds between chunks
+
+# Kind of purge -> table whose rows are deleted chunk by chunk
+PURGE_TARGETS = {'orders': 'orders', 'customer': 'orders', 'product': 'order_lines'}
+
+def purge_conditions(kind, filters):
+    """WHERE conditions on alias t and parameters for a purge's target rows"""
+    if kind == 'customer':
+        return ["t.customer_id = ?"], [filters['customer_id']]
+    if kind == 'product':
+        return ["t.product_id = ?"], [filters['product_id']]
+    if kind == 'orders':
+        return bulk_conditions('orders', filters)
+    raise ValueError(f"Unknown purge '{kind}'. Choose from: {', '.join(PURGE_TARGETS)}")
+
+def count_purge(kind, filters):
+    """Dry run: how many rows a purge would delete (orders, or order lines for a product)"""
+    conditions, params = purge_conditions(kind, filters)
+    return count_matching(PURGE_TARGETS[kind], conditions, params)
+
+def create_purge(kind, filters):
+    """Record a new purge job and return its ID; nothing is deleted yet"""
+    purge_conditions(kind, filters)
+    cur.execute(f"SELECT COALESCE(MAX(order_id), '') FROM {PURGE_TARGETS[kind]}")
+    high = cur.fetchone()[0]
+    cur.execute("""
+    INSERT INTO purge_jobs(kind, filters, last_key, high_key, deleted, status, started_at)
+    VALUES(?, ?, '', ?, 0, 'running', datetime('now'))
+    """, (kind, json.dumps(filters), high))
+    con.commit()
+    return cur.lastrowid
+
+def purge_jobs(unfinished=False):
+    """(job, kind, filters, deleted, status, started, finished) for purge jobs, newest first"""
+    cur.execute(f"""
+    SELECT job_id, kind, filters, deleted, status, started_at, finished_at FROM purge_jobs
+    {"WHERE status = 'running'" if unfinished else ""}
+    ORDER BY job_id DESC
+    """)
+    return cur.fetchall()
+
+def purge_chunk(job_id, kind, table_name, where, params, low, high, batch_size):
+    """Delete the next batch_size matching rows with an Order ID above low (and up to high, if given).
+
+    Runs in one transaction that also moves the job's cursor. Returns
+    (Order ID the chunk ended at or None when nothing was left, rows deleted).
+    """
+    bounds = "t.order_id > ?" + (" AND t.order_id <= ?" if high is not None else "")
+    keys = (low, high) if high is not None else (low,)
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        # The chunk ends at the Order ID of the batch_size-th matching row after the cursor,
+        # so every line of an order goes in the same chunk
+        cur.execute(f"""
+        SELECT MAX(order_id) FROM (
+            SELECT t.order_id FROM {table_name} AS t WHERE {bounds} AND {where}
+            ORDER BY t.order_id LIMIT ?)
+        """, (*keys, *params, batch_size))
+        upto = cur.fetchone()[0]
+        deleted = 0
+        if upto is not None:
+            window = f"t.order_id > ? AND t.order_id <= ? AND {where}"
+            if kind == 'product':
+                # Orders left without any lines go too, as in delete_product()
+                cur.execute(f"SELECT json_group_array(DISTINCT t.order_id) FROM order_lines AS t WHERE {window}",
+                            (low, upto, *params))
+                order_ids = cur.fetchone()[0]
+            cur.execute(f"DELETE FROM {table_name} AS t WHERE {window}", (low, upto, *params))
+            deleted = cur.rowcount
+            if kind == 'product':
+                cur.execute("""
+                DELETE FROM orders WHERE order_id IN (SELECT value FROM json_each(?))
+                AND NOT EXISTS (SELECT 1 FROM order_lines l WHERE l.order_id = orders.order_id)
+                """, (order_ids,))
+        cur.execute("UPDATE purge_jobs SET last_key = ?, deleted = deleted + ? WHERE job_id = ?",
+                    (upto if upto is not None else high if high is not None else low, deleted, job_id))
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    return upto, deleted
+
+def run_purge(job_id, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE):
+    """Run (or resume) a purge job to the end, returning the rows it has deleted in total"""
+    cur.execute("SELECT kind, filters, last_key, high_key, deleted, status FROM purge_jobs WHERE job_id = ?",
+                (job_id,))
+    job = cur.fetchone()
+    if job is None:
+        raise ValueError(f"No purge job {job_id}")
+    kind, filters, low, high, deleted, status = job
+    if status == 'done':
+        return deleted
+    filters = json.loads(filters)
+    table_name = PURGE_TARGETS[kind]
+    conditions, params = purge_conditions(kind, filters)
+    where = ' AND '.join(conditions)
+
+    # Order IDs are text, so progress is counted in rows against what was left to do
+    remaining = count_matching(table_name, conditions + ["t.order_id > ?", "t.order_id <= ?"],
+                               [*params, low, high])
+    done_now, start = 0, time.perf_counter()
+    while low < high:
+        upto, count = purge_chunk(job_id, kind, table_name, where, params, low, high, batch_size)
+        low = high if upto is None else upto
+        deleted += count
+        done_now += count
+
+        elapsed = time.perf_counter() - start
+        done = min(done_now / remaining, 1.0) if remaining else 1.0
+        eta = elapsed / done - elapsed if done else 0
+        print(f"\r{deleted:,} {table_name} rows deleted, {done:.0%} done, ETA {eta:,.0f}s ",
+              end='', flush=True)
+        if low < high:
+            time.sleep(pause)
+    print()
+
+    if kind in ('customer', 'product'):
+        # Rows added since the job started, on either side of the cursor, go in batches too
+        low = ''
+        while low is not None:
+            low, count = purge_chunk(job_id, kind, table_name, where, params, low, None, batch_size)
+            deleted += count
+            if low is not None:
+                time.sleep(pause)
+
+    # The parent row goes last, with anything added in the moments since the sweep
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        if kind == 'customer':
+            cur.execute("DELETE FROM orders WHERE customer_id = ?", params)
+            deleted += cur.rowcount
+            cur.execute("DELETE FROM customers WHERE customer_id = ?", params)
+        elif kind == 'product':
+            cur.execute("SELECT DISTINCT order_id FROM order_lines WHERE product_id = ?", params)
+            order_ids = cur.fetchall()
+            cur.execute("DELETE FROM order_lines WHERE product_id = ?", params)
+            deleted += cur.rowcount
+            cur.executemany("""
+            DELETE FROM orders WHERE order_id = ?
+            AND NOT EXISTS (SELECT 1 FROM order_lines WHERE order_id = ?)
+            """, [(order_id, order_id) for order_id, in order_ids])
+            cur.execute("DELETE FROM products WHERE product_id = ?", params)
+        cur.execute("""
+        UPDATE purge_jobs SET last_key = high_key, deleted = ?, status = 'done', finished_at = datetime('now')
+        WHERE job_id = ?
+        """, (deleted, job_id))
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    if kind == 'product':
+        invalidate_product_catalog()
+    return deleted
+
+def purge(kind, filters, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE):
+    """Create a purge job and run it, returning (job ID, rows deleted)"""
+    job_id = create_purge(kind, filters)
+    return job_id, run_purge(job_id, batch_size, pause)
+
+def delete_records():
+    while True:
+        print("\n1. Delete by Order ID")
+        print("2. Delete by Customer ID (will delete all related orders)")
+        print("3. Delete by Product ID (will delete its lines from all related orders)")
+        print("4. Purge Orders Matching Filters")
+        print("5. Resume Unfinished Purges")
+        print("6. Exit")
+        choice = input("Enter your choice: ")
+
+        try:
+            if choice == '1':
+                order_id = input("Enter the Order ID to delete: ")
+                if delete_order(order_id):
+                    print(f"Order {order_id} deleted successfully")
+                else:
+                    print("Order not found")
+
+            elif choice == '2':
+                # Orders go in short batches so clerks can keep entering orders meanwhile
+                customer_id = input("Enter the Customer ID: ")
+                order_count = count_orders_for('customer_id', customer_id)
+                if order_count > 0:
+                    confirm = input(f"This will delete {order_count} orders. Continue? (y/n): ")
+                    if confirm.lower() == 'y':
+                        _, order_count = purge('customer', {'customer_id': customer_id})
+                        print(f"Customer and {order_count} orders deleted")
+                else:
+                    delete_customer(customer_id)
+                    print("Customer deleted")
+
+            elif choice == '3':
+                product_id = input("Enter the Product ID: ")
+                order_count = count_orders_for('product_id', product_id)
+                if order_count > 0:
+                    confirm = input(f"This will change or delete {order_count} orders. Continue? (y/n): ")
+                    if confirm.lower() == 'y':
+                        _, line_count = purge('product', {'product_id': product_id})
+                        print(f"Product deleted and removed from {line_count} order lines")
+                else:
+                    delete_product(product_id)
+                    print("Product deleted")
+
+            elif choice == '4':
+                print("\nFilters (leave blank to skip):")
+                filters = {}
+                for name in BULK_FILTERS['orders']:
+                    value = input(f"  {name}: ").strip()
+                    if value:
+                        filters[name] = value
+                matching = count_purge('orders', filters)
+                if not matching:
+                    print("No orders match.")
+                    continue
+                if input(f"{matching} orders match. Delete them and their lines? (y/n): ").lower() == 'y':
+                    job_id, deleted = purge('orders', filters)
+                    print(f"Purge {job_id} deleted {deleted} orders")
+
+            elif choice == '5':
+                jobs = purge_jobs(unfinished=True)
+                if not jobs:
+                    print("No unfinished purges.")
+                for job_id, kind, filters, deleted, _, started, _ in jobs:
+                    print(f"Resuming purge {job_id} ({kind} {filters}, started {started}, {deleted} deleted so far)")
+                    print(f"Purge {job_id} finished: {run_purge(job_id)} rows deleted")
+
+            elif choice == '6':
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+# Identifiers typed into Alter Table are interpolated into SQL, so they are
+# checked first: names must be plain identifiers, types a type name with an
+# optional size, and existing columns must appear in PRAGMA table_info.
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+TYPE_PATTERN = re.compile(r'[A-Za-z]+( [A-Za-z]+)*( ?\(\s*\d+\s*(,\s*\d+\s*)?\))?\Z')
+
+def validate_identifier(name, what='name'):
+    """Return name stripped, or raise ValueError unless it is a plain identifier"""
+    name = name.strip()
+    if not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid {what} '{name}': use letters, digits and underscores, not starting with a digit")
+    return name
+
+def validate_type(datatype):
+    """Return datatype stripped, or raise ValueError unless it looks like TEXT, INT or VARCHAR(50)"""
+    datatype = datatype.strip()
+    if not TYPE_PATTERN.match(datatype):
+        raise ValueError(f"Invalid data type '{datatype}'")
+    return datatype
+
+def table_columns(table_name):
+    """Column names of one of TABLES, from PRAGMA table_info"""
+    if table_name not in TABLES:
+        raise ValueError(f"Unknown table '{table_name}'")
+    cur.execute(f"PRAGMA table_info({table_name})")
+    return [row[1] for row in cur.fetchall()]
+
+def check_column(table_name, column):
+    """Return column stripped, or raise ValueError unless table_name has it"""
+    column = column.strip()
+    if column not in table_columns(table_name):
+        raise ValueError(f"{table_name} has no column '{column}'")
+    return column
+
+def add_column(table_name, colname, datatype):
+    """ALTER TABLE ... ADD COLUMN on one of TABLES"""
+    colname = validate_identifier(colname, 'column name')
+    if colname in table_columns(table_name):
+        raise ValueError(f"{table_name} already has a column '{colname}'")
+    datatype = validate_type(datatype)
+    cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {colname} {datatype}")
+    con.commit()
+    if table_name == 'products':
+        invalidate_product_catalog()
+
+def rename_column(table_name, oldcol, newcol):
+    """ALTER TABLE ... RENAME COLUMN on one of TABLES"""
+    oldcol = check_column(table_name, oldcol)
+    newcol = validate_identifier(newcol, 'column name')
+    if newcol in table_columns(table_name):
+        raise ValueError(f"{table_name} already has a column '{newcol}'")
+    cur.execute(f"ALTER TABLE {table_name} RENAME COLUMN {oldcol} TO {newcol}")
+    con.commit()
+    if table_name == 'products':
+        invalidate_product_catalog()
+
+def rename_table(table_name, newtable):
+    """ALTER TABLE ... RENAME TO on one of TABLES"""
+    if table_name not in TABLES:
+        raise ValueError(f"Unknown table '{table_name}'")
+    newtable = validate_identifier(newtable, 'table name')
+    cur.execute(f"ALTER TABLE {table_name} RENAME TO {newtable}")
+    con.commit()
+    if table_name == 'products':
+        invalidate_product_catalog()
+
+# Online schema changes. SQLite can only add and rename columns in place;
+# changing a type, dropping a column or adding a constraint means rebuilding
+# the table. online_alter() does that without holding the write lock for the
+# whole copy: it creates <table>_rebuild with the new definition, adds
+# triggers that mirror every write on the table into it, copies the rows in
+# rowid order one short transaction per batch, then in one last transaction
+# drops the old table, renames the new one and recreates its indexes and
+# triggers. Rowids are kept, so the full-text indexes stay valid.
+ONLINE_ALTER_BATCH_SIZE = 10000
+ONLINE_ALTER_PAUSE = 0.01  # seconds between batches, so writers can get in
+REBUILD_SUFFIX = '_rebuild'
+
+# Columns the program itself reads; they can change type but not be dropped
+CORE_COLUMNS = {
+    'orders': ['order_id', 'order_date', 'ship_date', 'ship_mode', 'customer_id'],
+    'order_lines': ['order_id', 'line_number'] + ORDER_LINE_COLUMNS,
+    'customers': ['customer_id', 'customer_name', 'segment', 'country', 'city', 'state', 'postal_code', 'region'],
+    'products': ['product_id', 'category', 'sub_category', 'product_name', 'unit_price'],
+}
+
+TABLE_CONSTRAINT_WORDS = ('CONSTRAINT', 'PRIMARY', 'UNIQUE', 'CHECK', 'FOREIGN')
+
+COLUMN_DEFINITION = re.compile(
+    r'(?P<name>\S+)\s*(?P<type>.*?)'
+    r'(?P<constraints>\s+(?:CONSTRAINT|PRIMARY|NOT|NULL|UNIQUE|CHECK|DEFAULT|COLLATE|REFERENCES|GENERATED|AS)\b.*)?\Z',
+    re.IGNORECASE | re.DOTALL)
+
+def split_definitions(body):
+    """Split the body of a CREATE TABLE at the commas that are not inside brackets or quotes"""
+    items, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(body):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(body[start:i].strip())
+            start = i + 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+def table_definition(table_name):
+    """({column: definition}, [table constraints]) from the table's CREATE TABLE statement"""
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    sql = cur.fetchone()[0]
+    columns, constraints = {}, []
+    for item in split_definitions(sql[sql.index('(') + 1:sql.rindex(')')]):
+        if item.split(None, 1)[0].upper() in TABLE_CONSTRAINT_WORDS:
+            constraints.append(item)
+        else:
+            columns[item.split(None, 1)[0].strip('"`[]')] = item
+    return columns, constraints
+
+def rebuild_triggers(table_name, columns):
+    """(name, CREATE TRIGGER statement) for the triggers mirroring writes on table_name into its rebuild"""
+    new = table_name + REBUILD_SUFFIX
+    cur.execute(f"PRAGMA table_info({table_name})")
+    keys = [row[1] for row in sorted(cur.fetchall(), key=lambda row: row[5]) if row[5]]
+    column_list = ', '.join(columns)
+    values = ', '.join(f"NEW.{column}" for column in columns)
+    # A row replaced under the same key arrives with a new rowid, so clear both
+    same_key = f" OR ({', '.join(keys)}) = ({', '.join(f'NEW.{k}' for k in keys)})" if keys else ''
+    upsert = f"""
+            DELETE FROM {new} WHERE rowid = NEW.rowid{same_key};
+            INSERT INTO {new}(rowid, {column_list}) VALUES(NEW.rowid, {values});"""
+    return [(f"{new}_insert", f"""
+        CREATE TRIGGER {new}_insert AFTER INSERT ON {table_name}
+        BEGIN{upsert}
+        END"""), (f"{new}_update", f"""
+        CREATE TRIGGER {new}_update AFTER UPDATE ON {table_name}
+        BEGIN
+            DELETE FROM {new} WHERE rowid = OLD.rowid;{upsert}
+        END"""), (f"{new}_delete", f"""
+        CREATE TRIGGER {new}_delete AFTER DELETE ON {table_name}
+        BEGIN
+            DELETE FROM {new} WHERE rowid = OLD.rowid;
+        END""")]
+
+def drop_rebuild(table_name):
+    """Remove a rebuild table and its triggers, e.g. one left behind by an interrupted online_alter()"""
+    con.rollback()
+    cur.execute("BEGIN IMMEDIATE")
+    for name, _ in rebuild_triggers(table_name, []):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cur.execute(f"DROP TABLE IF EXISTS {table_name}{REBUILD_SUFFIX}")
+    con.commit()
+
+def plan_online_alter(table_name, types=None, drop=(), not_null=(), unique=(), checks=()):
+    """Validate the changes against the table and return (CREATE TABLE body items, kept columns).
+
+    Raises ValueError when a name is unknown or invalid, a column is still
+    needed, or existing rows break a new constraint.
+    """
+    types = {check_column(table_name, column): validate_type(datatype) for column, datatype in (types or {}).items()}
+    drop = [check_column(table_name, column) for column in drop]
+    not_null = [check_column(table_name, column) for column in not_null]
+    unique = [[check_column(table_name, column) for column in group] for group in unique]
+    if not (types or drop or not_null or unique or checks):
+        raise ValueError("Nothing to change")
+
+    definitions, constraints = table_definition(table_name)
+    for column in drop:
+        if column in CORE_COLUMNS[table_name]:
+            raise ValueError(f"{table_name}.{column} is used by the program and cannot be dropped")
+        cur.execute("SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL AND type IN ('index', 'trigger') "
+                    "AND name NOT LIKE ?", (f"{table_name}{REBUILD_SUFFIX}%",))
+        users = [name for name, sql in cur.fetchall() if re.search(rf'\b{column}\b', sql)]
+        users += [c for c in constraints if re.search(rf'\b{column}\b', c)]
+        if users:
+            raise ValueError(f"{table_name}.{column} is still used by {', '.join(users)}")
+        if len(drop) >= len(definitions):
+            raise ValueError("Cannot drop every column")
+
+    # Existing rows must already satisfy the new constraints
+    for column in not_null:
+        cur.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {column} IS NULL")
+        missing = cur.fetchone()[0]
+        if missing:
+            raise ValueError(f"{missing} {table_name} rows have no {column}")
+    for group in unique:
+        columns = ', '.join(group)
+        cur.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {table_name} GROUP BY {columns} HAVING COUNT(*) > 1)")
+        duplicates = cur.fetchone()[0]
+        if duplicates:
+            raise ValueError(f"{duplicates} values of ({columns}) appear more than once in {table_name}")
+    for expression in checks:
+        if ';' in expression:
+            raise ValueError("A CHECK expression cannot contain ';'")
+        try:
+            cur.execute(f"SELECT COUNT(*) FROM {table_name} WHERE NOT ({expression})")
+        except sqlite3.Error as e:
+            raise ValueError(f"Invalid CHECK expression: {e}") from e
+        failing = cur.fetchone()[0]
+        if failing:
+            raise ValueError(f"{failing} {table_name} rows fail CHECK ({expression})")
+
+    items = []
+    for column, definition in definitions.items():
+        if column in drop:
+            continue
+        if column in types or column in not_null:
+            parts = COLUMN_DEFINITION.match(definition)
+            column_constraints = parts['constraints'] or ''
+            if column in not_null and not re.search(r'\bNOT\s+NULL\b', column_constraints, re.IGNORECASE):
+                column_constraints += ' NOT NULL'
+            definition = f"{column} {types.get(column, parts['type'])}{column_constraints}".rstrip()
+        items.append(definition)
+    items += constraints
+    for group in unique:
+        items.append(f"CONSTRAINT {table_name}_{'_'.join(group)}_unique UNIQUE ({', '.join(group)})")
+    count = sum(1 for c in constraints if c.upper().startswith(f"CONSTRAINT {table_name}_CHECK_".upper()))
+    for number, expression in enumerate(checks, count + 1):
+        items.append(f"CONSTRAINT {table_name}_check_{number} CHECK ({expression})")
+    # Generated columns (absent from PRAGMA table_info) are computed by the new table, not copied
+    stored = table_columns(table_name)
+    return items, [column for column in definitions if column not in drop and column in stored]
+
+def online_alter(table_name, types=None, drop=(), not_null=(), unique=(), checks=(),
+                 batch_size=ONLINE_ALTER_BATCH_SIZE, pause=ONLINE_ALTER_PAUSE):
+    """Change column types, drop columns or add NOT NULL / UNIQUE / CHECK constraints without locking writers out.
+
+    types maps column -> new type; unique is a list of column groups. The
+    store stays usable while the rows are copied; writers only wait for
+    one batch at a time and for the final swap. Returns the rows copied.
+    """
+    items, columns = plan_online_alter(table_name, types, drop, not_null, unique, checks)
+    new = table_name + REBUILD_SUFFIX
+    column_list = ', '.join(columns)
+
+    con.commit()
+    drop_rebuild(table_name)
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(f"CREATE TABLE {new}(\n    " + ",\n    ".join(items) + "\n)")
+        for _, statement in rebuild_triggers(table_name, columns):
+            cur.execute(statement)
+        # Rows written from here on reach the new table through the triggers
+        cur.execute(f"SELECT COUNT(*), MIN(rowid), MAX(rowid) FROM {table_name}")
+        total, first, last = cur.fetchone()
+        con.commit()
+
+        copied = 0
+        low = (first or 1) - 1
+        start = time.perf_counter()
+        while last is not None and low < last:
+            cur.execute(f"SELECT rowid FROM {table_name} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?",
+                        (low, batch_size - 1))
+            row = cur.fetchone()
+            high = min(row[0], last) if row else last
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(f"DELETE FROM {new} WHERE rowid > ? AND rowid <= ?", (low, high))
+            cur.execute(f"INSERT INTO {new}(rowid, {column_list}) "
+                        f"SELECT rowid, {column_list} FROM {table_name} WHERE rowid > ? AND rowid <= ?", (low, high))
+            copied += cur.rowcount
+            con.commit()
+            low = high
+
+            elapsed = time.perf_counter() - start
+            rate = copied / elapsed if elapsed > 0 else 0
+            eta = (total - copied) / rate if rate else 0
+            print(f"\r{copied:,} of {total:,} rows copied ({copied / max(total, 1):.0%}), "
+                  f"{rate:,.0f} rows/sec, ETA {max(eta, 0):,.0f}s ", end='', flush=True)
+            time.sleep(pause)
+        print()
+
+        swap_rebuild(table_name)
+    except BaseException:
+        # Leave the original table as it was and stop mirroring writes
+        drop_rebuild(table_name)
+        raise
+    if table_name == 'products':
+        invalidate_product_catalog()
+    cur.execute(f"ANALYZE {table_name}")
+    con.commit()
+    return copied
+
+def swap_rebuild(table_name):
+    """Replace table_name with its caught-up rebuild in one transaction"""
+    new = table_name + REBUILD_SUFFIX
+    cur.execute("PRAGMA foreign_keys")
+    foreign_keys = cur.fetchone()[0]
+    # Foreign keys and the modern RENAME both check other tables mid-swap,
+    # while the old table is gone; both are settings that can't change inside a transaction
+    cur.execute("PRAGMA foreign_keys = OFF")
+    cur.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(f"SELECT (SELECT COUNT(*) FROM {table_name}), (SELECT COUNT(*) FROM {new})")
+        expected, actual = cur.fetchone()
+        if expected != actual:
+            raise sqlite3.DatabaseError(f"Rebuilt {table_name} has {actual} rows, expected {expected}")
+
+        cur.execute("SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? "
+                    "AND sql IS NOT NULL AND name NOT LIKE ? ORDER BY type", (table_name, f"{new}%"))
+        statements = [row[0] for row in cur.fetchall()]
+        for name, _ in rebuild_triggers(table_name, []):
+            cur.execute(f"DROP TRIGGER {name}")
+        cur.execute(f"DROP TABLE {table_name}")
+        cur.execute(f"ALTER TABLE {new} RENAME TO {table_name}")
+        for statement in statements:
+            cur.execute(statement)
+        if foreign_keys:
+            cur.execute(f"PRAGMA foreign_key_check({table_name})")
+            if cur.fetchone():
+                raise sqlite3.IntegrityError(f"Rebuilt {table_name} breaks a foreign key")
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        cur.execute("PRAGMA legacy_alter_table = OFF")
+        cur.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+def alter_table():
+    while True:
+        print("\nWhich table would you like to alter?")
+        print("1. Orders")
+        print("2. Order Lines")
+        print("3. Customers")
+        print("4. Products")
+        print("5. Back to main menu")
+        
+        table_choice = input("Enter your choice: ")
+        
+        if table_choice == '5':
+            break
+            
+        if table_choice not in ['1', '2', '3', '4']:
+            print("Invalid choice. Please try again.")
+            continue
+            
+        table_name = {
+            '1': 'orders',
+            '2': 'order_lines',
+            '3': 'customers',
+            '4': 'products'
+        }[table_choice]
+        
+        print(f"\nAltering {table_name} table:")
+        print("1. Add Column")
+        print("2. Rename Column")
+        print("3. Rename Table")
+        print("4. Change Column Type (online rebuild)")
+        print("5. Drop Column (online rebuild)")
+        print("6. Add Constraint (online rebuild)")
+        print("7. Back to table selection")
+        
+        try:
+            choice = int(input("Enter your choice: "))
+            
+            if choice == 1:
+                colname = input("Enter the new column name: ")
+                datatype = input("Enter the data type for the new column: ")
+                add_column(table_name, colname, datatype)
+                print(f"Column '{colname}' successfully added to {table_name} table.")
+
+            elif choice == 2:
+                oldcol = input("Enter the current column name: ")
+                newcol = input("Enter the new column name: ")
+                rename_column(table_name, oldcol, newcol)
+                print(f"Column renamed from '{oldcol}' to '{newcol}' in {table_name} table")
+
+            elif choice == 3:
+                newtable = input("Enter the new table name: ")
+                rename_table(table_name, newtable)
+                print(f"Table '{table_name}' renamed to '{newtable}'")
+
+            elif choice in (4, 5, 6):
+                changes = {}
+                column = choose_from('Column', table_columns(table_name)) if choice != 6 else None
+                if choice == 4:
+                    changes['types'] = {column: input(f"New data type for {column}: ")}
+                elif choice == 5:
+                    changes['drop'] = [column]
+                else:
+                    kind = choose_from('Constraint', ['NOT NULL', 'UNIQUE', 'CHECK'])
+                    if kind == 'NOT NULL':
+                        changes['not_null'] = [choose_from('Column', table_columns(table_name))]
+                    elif kind == 'UNIQUE':
+                        columns = input("Column(s) that must be unique, comma separated: ")
+                        changes['unique'] = [[c for c in columns.split(',') if c.strip()]]
+                    else:
+                        changes['checks'] = [input("CHECK expression, e.g. quantity > 0: ")]
+                cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+                rows = cur.fetchone()[0]
+                confirm = input(f"This copies all {rows} rows of {table_name} into a new table while the "
+                                f"store stays in use. Continue? (y/n): ")
+                if confirm.lower() == 'y':
+                    copied = online_alter(table_name, **changes)
+                    print(f"{table_name} rebuilt with {copied} rows")
+
+            elif choice == 7:
+                continue
+
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+
+def describe_table(table_name):
+    """Return (name, data type, nullable, primary key) for each column of table_name"""
+    if table_name not in TABLES:
+        raise ValueError(f"Unknown table '{table_name}'")
+    cur.execute(f"PRAGMA table_info({table_name})")
+    return [(col[1], col[2], "No" if col[3] else "Yes", "Yes" if col[5] else "No")
+            for col in cur.fetchall()]
+
+def describe():
+    while True:
+        print("\nWhich table would you like to describe?")
+        print("1. Orders")
+        print("2. Order Lines")
+        print("3. Customers")
+        print("4. Products")
+        print("5. Back to main menu")
+        
+        choice = input("Enter your choice: ")
+        
+        if choice == '5':
+            break
+            
+        if choice not in ['1', '2', '3', '4']:
+            print("Invalid choice. Please try again.")
+            continue
+            
+        table_name = {
+            '1': 'orders',
+            '2': 'order_lines',
+            '3': 'customers',
+            '4': 'products'
+        }[choice]
+        
+        try:
+            columns = describe_table(table_name)
+            
+            if columns:
+                print(f"\n{table_name.title()} Table Structure:")
+                print("-" * 80)
+                print(f"{'Column Name':<20} {'Data Type':<15} {'Nullable':<10} {'Primary Key':<12}")
+                print("-" * 80)
+                
+                for name, data_type, nullable, pk in columns:
+                    print(f"{name:<20} {data_type:<15} {nullable:<10} {pk:<12}")
+            else:
+                print(f"No table named '{table_name}' found.")
+                
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+# Sales/profit totals kept per month, category, sub-category, segment, region and
+# ship mode. order_count counts order lines. Triggers on order_lines, orders,
+# customers and products apply each change as a delta in the same transaction,
+# so reports read this small table instead of scanning the orders.
+SUMMARY_DIMENSIONS = ['category', 'sub_category', 'segment', 'region', 'ship_mode', 'month']
+
+SUMMARY_KEY = "month, category, sub_category, segment, region, ship_mode"
+
+SUMMARY_UPSERT = f"""
+ON CONFLICT ({SUMMARY_KEY}) DO UPDATE SET
+    order_count = order_count + excluded.order_count,
+    quantity = quantity + excluded.quantity,
+    sales = sales + excluded.sales,
+    profit = profit + excluded.profit"""
+
+def summary_aggregate_query(schema=None):
+    """Fresh aggregate over the order lines of the main database or of an attached archive schema"""
+    prefix, join = (f"{schema}.", "LEFT JOIN") if schema else ("", "JOIN")
+    return f"""
+SELECT COALESCE(substr(o.order_date, 1, 7), ''), COALESCE(p.category, ''), COALESCE(p.sub_category, ''),
+       COALESCE(c.segment, ''), COALESCE(c.region, ''), COALESCE(o.ship_mode, ''),
+       COUNT(*), COALESCE(SUM(l.quantity), 0), COALESCE(SUM(l.sales), 0), COALESCE(SUM(l.profit), 0)
+FROM {prefix}order_lines l
+JOIN {prefix}orders o ON o.order_id = l.order_id
+{join} customers c ON o.customer_id = c.customer_id
+{join} products p ON l.product_id = p.product_id
+GROUP BY 1, 2, 3, 4, 5, 6
+"""
+
+# Used to rebuild and to check the summary table
+SUMMARY_AGGREGATE_QUERY = summary_aggregate_query()
+
+def summary_delta_sql(sign, line, dimensions, source):
+    """SQL adding (sign '') or removing (sign '-') the order lines picked out by source.
+
+    line is the alias or trigger row (NEW/OLD) holding the line's measures and
+    dimensions the six expressions for month, category, sub-category,
+    segment, region and ship mode.
+    """
+    month, category, sub_category, segment, region, ship_mode = dimensions
+    return f"""
+    INSERT INTO sales_summary
+    SELECT COALESCE(substr({month}, 1, 7), ''), COALESCE({category}, ''), COALESCE({sub_category}, ''),
+           COALESCE({segment}, ''), COALESCE({region}, ''), COALESCE({ship_mode}, ''),
+           {sign}COUNT(*), {sign}COALESCE(SUM({line}.quantity), 0),
+           {sign}COALESCE(SUM({line}.sales), 0), {sign}COALESCE(SUM({line}.profit), 0)
+    {source}
+    GROUP BY 1, 2, 3, 4, 5, 6
+    {SUMMARY_UPSERT};
+    """
+
+def line_delta_sql(ref, sign):
+    """SQL adding or removing one order line"""
+    return summary_delta_sql(sign, ref,
+                             ('o.order_date', 'p.category', 'p.sub_category', 'c.segment', 'c.region', 'o.ship_mode'),
+                             f"""FROM orders o, products p, customers c
+    WHERE o.order_id = {ref}.order_id AND p.product_id = {ref}.product_id AND c.customer_id = o.customer_id""")
+
+def line_cleanup_sql(ref):
+    """SQL dropping the summary rows an order line left empty"""
+    return f"""
+    DELETE FROM sales_summary
+    WHERE order_count = 0
+      AND month = (SELECT COALESCE(substr(order_date, 1, 7), '') FROM orders WHERE order_id = {ref}.order_id);
+    """
+
+def header_delta_sql(ref, sign):
+    """SQL moving all lines of one order into or out of its date/ship mode/customer buckets"""
+    return summary_delta_sql(sign, 'l',
+                             (f'{ref}.order_date', 'p.category', 'p.sub_category', 'c.segment', 'c.region', f'{ref}.ship_mode'),
+                             f"""FROM order_lines l
+    JOIN products p ON p.product_id = l.product_id
+    JOIN customers c ON c.customer_id = {ref}.customer_id
+    WHERE l.order_id = {ref}.order_id""")
+
+def customer_delta_sql(ref, sign):
+    """SQL moving all of a customer's order lines into or out of its segment/region buckets"""
+    return summary_delta_sql(sign, 'l',
+                             ('o.order_date', 'p.category', 'p.sub_category', f'{ref}.segment', f'{ref}.region', 'o.ship_mode'),
+                             f"""FROM orders o
+    JOIN order_lines l ON l.order_id = o.order_id
+    JOIN products p ON p.product_id = l.product_id
+    WHERE o.customer_id = {ref}.customer_id""")
+
+def product_delta_sql(ref, sign):
+    """SQL moving all of a product's order lines into or out of its category buckets"""
+    return summary_delta_sql(sign, 'l',
+                             ('o.order_date', f'{ref}.category', f'{ref}.sub_category', 'c.segment', 'c.region', 'o.ship_mode'),
+                             f"""FROM order_lines l
+    JOIN orders o ON o.order_id = l.order_id
+    JOIN customers c ON c.customer_id = o.customer_id
+    WHERE l.product_id = {ref}.product_id""")
+
+# Triggers created by earlier schema versions, dropped before the current set is created
+SALES_SUMMARY_TRIGGERS = [
+    'sales_summary_order_insert', 'sales_summary_order_delete', 'sales_summary_order_update',
+    'sales_summary_customer_update', 'sales_summary_product_update',
+    'sales_summary_line_insert', 'sales_summary_line_delete', 'sales_summary_line_update',
+    'order_lines_cascade_delete',
+]
+
+def create_sales_summary():
+    """Create the summary table"""
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS sales_summary(
+        month VARCHAR(7),
+        category VARCHAR(20),
+        sub_category VARCHAR(20),
+        segment VARCHAR(20),
+        region VARCHAR(20),
+        ship_mode VARCHAR(20),
+        order_count INT,
+        quantity INT,
+        sales FLOAT,
+        profit FLOAT,
+        PRIMARY KEY ({SUMMARY_KEY})
+    )""")
+
+def create_sales_summary_triggers():
+    """(Re)create the triggers that keep sales_summary up to date and cascade order deletes"""
+    for trigger in SALES_SUMMARY_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    # Run statement by statement: executescript() would commit the caller's transaction
+    statements = [f"""
+    CREATE TRIGGER sales_summary_line_insert AFTER INSERT ON order_lines
+    BEGIN
+        {line_delta_sql('NEW', '')}
+    END""", f"""
+    CREATE TRIGGER sales_summary_line_delete AFTER DELETE ON order_lines
+    BEGIN
+        {line_delta_sql('OLD', '-')}
+        {line_cleanup_sql('OLD')}
+    END""", f"""
+    CREATE TRIGGER sales_summary_line_update
+    AFTER UPDATE OF order_id, product_id, quantity, sales, profit ON order_lines
+    BEGIN
+        {line_delta_sql('OLD', '-')}
+        {line_delta_sql('NEW', '')}
+        {line_cleanup_sql('OLD')}
+    END""", f"""
+    CREATE TRIGGER order_lines_cascade_delete BEFORE DELETE ON orders
+    BEGIN
+        DELETE FROM order_lines WHERE order_id = OLD.order_id;
+    END""", f"""
+    CREATE TRIGGER sales_summary_order_insert AFTER INSERT ON orders
+    BEGIN
+        {header_delta_sql('NEW', '')}
+    END""", f"""
+    CREATE TRIGGER sales_summary_order_update AFTER UPDATE OF order_date, ship_mode, customer_id ON orders
+    BEGIN
+        {header_delta_sql('OLD', '-')}
+        {header_delta_sql('NEW', '')}
+        DELETE FROM sales_summary WHERE order_count = 0;
+    END""", f"""
+    CREATE TRIGGER sales_summary_customer_update AFTER UPDATE OF segment, region ON customers
+    WHEN OLD.segment IS NOT NEW.segment OR OLD.region IS NOT NEW.region
+    BEGIN
+        {customer_delta_sql('OLD', '-')}
+        {customer_delta_sql('NEW', '')}
+        DELETE FROM sales_summary WHERE order_count = 0;
+    END""", f"""
+    CREATE TRIGGER sales_summary_product_update AFTER UPDATE OF category, sub_category ON products
+    WHEN OLD.category IS NOT NEW.category OR OLD.sub_category IS NOT NEW.sub_category
+    BEGIN
+        {product_delta_sql('OLD', '-')}
+        {product_delta_sql('NEW', '')}
+        DELETE FROM sales_summary WHERE order_count = 0;
+    END"""]
+    for statement in statements:
+        cur.execute(statement)
+
+def rebuild_sales_summary():
+    """Recompute the summary table from scratch in one transaction"""
+    cur.execute("DELETE FROM sales_summary")
+    cur.execute("INSERT INTO sales_summary " + SUMMARY_AGGREGATE_QUERY)
+    con.commit()
+    cur.execute("SELECT COUNT(*) FROM sales_summary")
+    return cur.fetchone()[0]
+
+def check_sales_summary(tolerance=0.01):
+    """Compare the summary table with a fresh aggregate over the order lines, returning the differences"""
+    cur.execute(SUMMARY_AGGREGATE_QUERY)
+    expected = {row[:6]: row[6:] for row in cur.fetchall()}
+    cur.execute(f"SELECT {SUMMARY_KEY}, order_count, quantity, sales, profit FROM sales_summary")
+    actual = {row[:6]: row[6:] for row in cur.fetchall()}
+
+    differences = []
+    for key in expected.keys() | actual.keys():
+        want = expected.get(key, (0, 0, 0.0, 0.0))
+        got = actual.get(key, (0, 0, 0.0, 0.0))
+        if (want[0] != got[0] or want[1] != got[1]
+                or abs(want[2] - got[2]) > tolerance or abs(want[3] - got[3]) > tolerance):
+            differences.append((key, want, got))
+    return differences
+
+def sales_report(group_by, history=False, date_from=None, date_to=None):
+    """Totals from the summary table grouped by one of SUMMARY_DIMENSIONS.
+
+    history adds the archived years that overlap date_from/date_to. The
+    summary is kept by month, so a date range selects whole months.
+    """
+    if group_by not in SUMMARY_DIMENSIONS:
+        raise ValueError(f"Cannot group by {group_by}")
+    where, params = history_conditions(date_from and date_from[:7], date_to and date_to[:7], 'month')
+    if history:
+        attach_archives(date_from, date_to)
+    try:
+        cur.execute(f"""
+        SELECT {group_by}, SUM(order_count), SUM(quantity), SUM(sales), SUM(profit)
+        FROM {'temp.sales_summary_history' if history else 'sales_summary'}{where}
+        GROUP BY {group_by}
+        ORDER BY {group_by}
+        """, params)
+        return cur.fetchall()
+    finally:
+        if history:
+            detach_archives()
+
+# Time dimension: one calendar row per day, keyed by the same ISO text as
+# orders.order_date, so period rollups join on the indexed date instead of
+# running date functions on every order. ISO weeks are worked out in Python
+# because SQLite's strftime() has no %V. period -> (group by, label) column.
+CALENDAR_PERIODS = {
+    'year': ('year', 'year'),
+    'quarter': ('quarter', 'quarter'),
+    'month': ('month', 'month'),
+    'week': ('week', 'week'),
+    'weekday': ('weekday', 'weekday_name'),
+}
+LEAD_TIME_GROUPS = ['ship_mode'] + list(CALENDAR_PERIODS)
+ISO_DATE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+
+def calendar_row(day):
+    """The calendar columns for one datetime.date"""
+    iso_year, iso_week, weekday = day.isocalendar()
+    return (day.isoformat(), day.toordinal(), day.year, f"{day.year}-Q{(day.month - 1) // 3 + 1}",
+            day.strftime('%Y-%m'), f"{iso_year}-W{iso_week:02}", weekday, day.strftime('%A'))
+
+def fill_calendar():
+    """Extend the calendar by whole years until it covers every order date, returning the days added"""
+    # Separate queries so each is a single lookup at one end of idx_orders_order_date
+    cur.execute("SELECT MIN(order_date) FROM orders WHERE order_date GLOB ?", (ISO_DATE_GLOB,))
+    first = cur.fetchone()[0]
+    cur.execute("SELECT MAX(order_date) FROM orders WHERE order_date GLOB ?", (ISO_DATE_GLOB,))
+    last = cur.fetchone()[0]
+    cur.execute("SELECT MIN(day), MAX(day) FROM calendar")
+    have_first, have_last = cur.fetchone()
+    if first is None or (have_first and have_first <= first and last <= have_last):
+        return 0
+    start, end = date(int(first[:4]), 1, 1), date(int(last[:4]), 12, 31)
+    cur.executemany("INSERT OR IGNORE INTO calendar VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                    (calendar_row(start + timedelta(days=n)) for n in range((end - start).days + 1)))
+    return cur.rowcount
+
+def period_rollup(period, date_from=None, date_to=None):
+    """Totals per calendar period as (period, orders, order lines, quantity, sales, profit)"""
+    if period not in CALENDAR_PERIODS:
+        raise ValueError(f"Cannot roll up by {period}")
+    if fill_calendar():
+        con.commit()
+    key, label = CALENDAR_PERIODS[period]
+    where, params = history_conditions(date_from and normalize_date(date_from),
+                                       date_to and normalize_date(date_to), 'o.order_date')
+    # CROSS JOIN keeps orders as the outer loop: a range scan of idx_orders_order_date,
+    # then one calendar lookup per order, rather than the planner's walk of the calendar
+    cur.execute(f"""
+    SELECT k.{label}, COUNT(DISTINCT o.order_id), COUNT(*), SUM(l.quantity), SUM(l.sales), SUM(l.profit)
+    FROM orders o
+    JOIN order_lines l ON l.order_id = o.order_id
+    CROSS JOIN calendar k ON k.day = o.order_date{where}
+    GROUP BY k.{key}
+    ORDER BY k.{key}
+    """, params)
+    return cur.fetchall()
+
+def lead_time_report(group_by='ship_mode', date_from=None, date_to=None):
+    """Days from order to shipping as (group, orders, average, shortest, longest), by ship mode or period"""
+    if group_by not in LEAD_TIME_GROUPS:
+        raise ValueError(f"Cannot group lead times by {group_by}")
+    if group_by == 'ship_mode':
+        key = label = 'o.ship_mode'
+        join = ''
+    else:
+        if fill_calendar():
+            con.commit()
+        key, label = (f"k.{column}" for column in CALENDAR_PERIODS[group_by])
+        join = "\n    CROSS JOIN calendar k ON k.day = o.order_date"
+    where, params = history_conditions(date_from and normalize_date(date_from),
+                                       date_to and normalize_date(date_to), 'o.order_date')
+    # SQLite 3.41+ reads lead_days from idx_orders_lead_time; older versions compute it per row.
+    # Orders with unreadable dates have none.
+    cur.execute(f"""
+    SELECT {label}, COUNT(o.lead_days), AVG(o.lead_days), MIN(o.lead_days), MAX(o.lead_days)
+    FROM orders o{join}{where}
+    GROUP BY {key}
+    HAVING COUNT(o.lead_days) > 0
+    ORDER BY {key}
+    """, params)
+    return cur.fetchall()
+
+def print_period_rollup(rows, period):
+    if not rows:
+        print("No orders in that range.")
+        return
+    print(tabulate([[label, orders, lines, quantity, f"${sales:,.2f}", f"${profit:,.2f}"]
+                    for label, orders, lines, quantity, sales, profit in rows],
+                   headers=[period.title(), 'Orders', 'Order Lines', 'Quantity', 'Sales', 'Profit'],
+                   tablefmt='grid'))
+
+def print_lead_times(rows, group_by):
+    if not rows:
+        print("No orders in that range.")
+        return
+    print(tabulate([[label, orders, f"{average:.1f}", shortest, longest]
+                    for label, orders, average, shortest, longest in rows],
+                   headers=[group_by.replace('_', ' ').title(), 'Orders', 'Average Days', 'Shortest', 'Longest'],
+                   tablefmt='grid'))
+
+def reports():
+    while True:
+        print("\nReports:")
+        for i, dimension in enumerate(SUMMARY_DIMENSIONS, 1):
+            print(f"{i}. Sales by {dimension.replace('_', '-').title()}")
+        print(f"{len(SUMMARY_DIMENSIONS) + 1}. Rebuild Summary Tables")
+        print(f"{len(SUMMARY_DIMENSIONS) + 2}. Check Summary Consistency")
+        print(f"{len(SUMMARY_DIMENSIONS) + 3}. In-Memory Analytics")
+        print(f"{len(SUMMARY_DIMENSIONS) + 4}. Sales by Period")
+        print(f"{len(SUMMARY_DIMENSIONS) + 5}. Ship Lead Times")
+        print(f"{len(SUMMARY_DIMENSIONS) + 6}. Back to main menu")
+
+        try:
+            choice = int(input("Enter your choice: "))
+
+            if 1 <= choice <= len(SUMMARY_DIMENSIONS):
+                dimension = SUMMARY_DIMENSIONS[choice - 1]
+                if archive_files() and input("Include archived years? (y/n): ").lower() == 'y':
+                    rows = sales_report(dimension, True, *ask_date_range())
+                else:
+                    rows = sales_report(dimension)
+                if rows:
+                    formatted_rows = [[key, count, quantity, f"${sales:,.2f}", f"${profit:,.2f}"]
+                                      for key, count, quantity, sales, profit in rows]
+                    headers = [dimension.replace('_', '-').title(), 'Order Lines', 'Quantity', 'Sales', 'Profit']
+                    print(tabulate(formatted_rows, headers=headers, tablefmt='grid'))
+                else:
+                    print("No sales recorded yet.")
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 1:
+                groups = rebuild_sales_summary()
+                print(f"Summary rebuilt with {groups} groups")
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 2:
+                differences = check_sales_summary()
+                if differences:
+                    print(f"{len(differences)} summary groups are out of date:")
+                    for key, want, got in differences[:10]:
+                        print(f"  {key}: expected {want}, found {got}")
+                    print("Run 'Rebuild Summary Tables' to fix them.")
+                else:
+                    print("Summary tables match the orders table.")
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 3:
+                analytics_menu()
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 4:
+                period = choose_from('Period', list(CALENDAR_PERIODS))
+                print_period_rollup(period_rollup(period, *ask_date_range()), period)
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 5:
+                group_by = choose_from('Grouping', LEAD_TIME_GROUPS)
+                print_lead_times(lead_time_report(group_by, *ask_date_range()), group_by)
+
+            elif choice == len(SUMMARY_DIMENSIONS) + 6:
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+# Archiving. Orders dated before a cutoff move out of the hot database into
+# one SQLite file per order year, orders_<year>.db in the archive directory
+# (<database>_archive/ next to the database, or SUPERSTORE_ARCHIVE_DIR). Each
+# archive holds that year's orders, order lines and sales summary; customers
+# and products stay in the hot database. attach_archives() ATTACHes only the
+# archives a date range needs and builds TEMP views that UNION ALL them with
+# the hot tables, so history is there on request without every query paying
+# for it. A closed year's file no longer changes, so it needs backing up once.
+ARCHIVE_PREFIX = 'orders_'
+ARCHIVE_TABLES = ['orders', 'order_lines', 'sales_summary']
+
+def archive_dir():
+    """Directory holding the per-year archive files"""
+    directory = os.environ.get('SUPERSTORE_ARCHIVE_DIR')
+    if directory:
+        return directory
+    return os.path.splitext(database_path(con) or DEFAULT_DB_PATH)[0] + '_archive'
+
+def archive_files(date_from=None, date_to=None):
+    """{year: path} of the archives that can hold orders between date_from and date_to.
+
+    Archives wholly outside the range are left out (partition pruning).
+    """
+    directory = archive_dir()
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    for name in os.listdir(directory):
+        year = name[len(ARCHIVE_PREFIX):-len('.db')]
+        if not (name.startswith(ARCHIVE_PREFIX) and name.endswith('.db') and year.isdigit()):
+            continue
+        if (date_from and f"{year}-12-31" < date_from) or (date_to and f"{year}-01-01" > date_to):
+            continue
+        files[int(year)] = os.path.join(directory, name)
+    return dict(sorted(files.items()))
+
+def ensure_archive_schema(schema):
+    """Create the archive tables in an attached schema, or add columns the hot tables have gained since"""
+    for table in ARCHIVE_TABLES:
+        cur.execute(f"PRAGMA main.table_info({table})")
+        columns = cur.fetchall()
+        cur.execute(f"PRAGMA {schema}.table_info({table})")
+        existing = {row[1] for row in cur.fetchall()}
+        if not existing:
+            keys = [row[1] for row in sorted(columns, key=lambda row: row[5]) if row[5]]
+            definitions = ', '.join(f"{row[1]} {row[2]}" for row in columns)
+            cur.execute(f"CREATE TABLE {schema}.{table}({definitions}, PRIMARY KEY ({', '.join(keys)}))")
+        for row in columns:
+            if existing and row[1] not in existing:
+                cur.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {row[1]} {row[2]}")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_orders_order_date ON orders(order_date)")
+
+def archive_orders(cutoff):
+    """Move every order dated before cutoff (YYYY-MM-DD) into its year's archive.
+
+    Each year moves in one transaction: the rows are copied, the hot sales
+    summary has their totals subtracted in one statement, and they are
+    deleted with the per-row summary triggers suspended. Running it again
+    after an interruption is safe. Returns {year: orders moved}.
+    """
+    datetime.strptime(cutoff, '%Y-%m-%d')
+    cur.execute("SELECT DISTINCT substr(order_date, 1, 4) FROM orders WHERE order_date < ? ORDER BY 1", (cutoff,))
+    years = [row[0] for row in cur.fetchall()]
+    directory = archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    detach_archives()
+
+    moved = {}
+    for year in years:
+        schema = f"archive_{year}"
+        where = "order_date >= ? AND order_date < ?"
+        params = (f"{year}-01-01", min(cutoff, f"{int(year) + 1}-01-01"))
+        line_condition = f"order_id IN (SELECT order_id FROM main.orders WHERE {where})"
+        # ATTACH can't run inside a transaction
+        con.commit()
+        cur.execute(f"ATTACH DATABASE ? AS {schema}", (os.path.join(directory, f"{ARCHIVE_PREFIX}{year}.db"),))
+        try:
+            cur.execute("BEGIN")
+            ensure_archive_schema(schema)
+            for table, condition in [('orders', where), ('order_lines', line_condition)]:
+                cur.execute(f"PRAGMA main.table_info({table})")
+                columns = ', '.join(row[1] for row in cur.fetchall())
+                cur.execute(f"INSERT OR REPLACE INTO {schema}.{table}({columns}) "
+                            f"SELECT {columns} FROM main.{table} WHERE {condition}", params)
+
+            cur.execute(summary_delta_sql('-', 'l', ('o.order_date', 'p.category', 'p.sub_category',
+                                                     'c.segment', 'c.region', 'o.ship_mode'),
+                                          f"""FROM main.order_lines l
+    JOIN main.orders o ON o.order_id = l.order_id
+    JOIN customers c ON c.customer_id = o.customer_id
+    JOIN products p ON p.product_id = l.product_id
+    WHERE o.order_date >= ? AND o.order_date < ?"""), params)
+            cur.execute("DELETE FROM main.sales_summary WHERE order_count = 0")
+            # Archived orders still exist, so they are not logged as deletes for change sync
+            for trigger in SALES_SUMMARY_TRIGGERS:
+                cur.execute(f"DROP TRIGGER IF EXISTS main.{trigger}")
+            drop_change_triggers()
+            cur.execute(f"DELETE FROM main.order_lines WHERE {line_condition}", params)
+            cur.execute(f"DELETE FROM main.orders WHERE {where}", params)
+            moved[int(year)] = cur.rowcount
+            create_sales_summary_triggers()
+            create_change_triggers()
+
+            # The archive's own summary, recomputed so a rerun can't count anything twice
+            cur.execute(f"DELETE FROM {schema}.sales_summary")
+            cur.execute(f"INSERT INTO {schema}.sales_summary " + summary_aggregate_query(schema))
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            cur.execute(f"DETACH DATABASE {schema}")
+    return moved
+
+def detach_archives():
+    """Drop the history views and DETACH every attached archive"""
+    cur.execute("DROP VIEW IF EXISTS temp.order_history")
+    cur.execute("DROP VIEW IF EXISTS temp.sales_summary_history")
+    cur.execute("PRAGMA database_list")
+    for _, name, _ in cur.fetchall():
+        if name.startswith('archive_'):
+            cur.execute(f"DETACH DATABASE {name}")
+
+def attach_archives(date_from=None, date_to=None):
+    """ATTACH the archives overlapping the date range and create the history views.
+
+    temp.order_history has the columns of ORDER_DETAIL_QUERY and
+    temp.sales_summary_history those of sales_summary, each the hot rows
+    UNION ALL the attached archives'. Returns the archive years attached.
+    """
+    con.commit()
+    detach_archives()
+    files = archive_files(date_from, date_to)
+    try:
+        for year, path in files.items():
+            cur.execute(f"ATTACH DATABASE ? AS archive_{year}", (path,))
+    except sqlite3.OperationalError as e:
+        detach_archives()
+        raise ValueError(f"Cannot attach {len(files)} archives at once ({e}); narrow the date range") from e
+    create_history_views([f"archive_{year}" for year in files])
+    return list(files)
+
+def create_history_views(archives):
+    """Create temp.order_history and temp.sales_summary_history over main and the attached archive schemas"""
+    schemas = [None] + archives
+    cur.execute("CREATE TEMP VIEW order_history AS "
+                + "UNION ALL".join(order_detail_query(schema) for schema in schemas))
+    cur.execute("CREATE TEMP VIEW sales_summary_history AS "
+                + " UNION ALL ".join(f"SELECT * FROM {schema or 'main'}.sales_summary" for schema in schemas))
+
+def history_conditions(date_from=None, date_to=None, column='order_date'):
+    """WHERE clause and parameters limiting history to a date range"""
+    conditions, params = [], []
+    if date_from:
+        conditions.append(f"{column} >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append(f"{column} <= ?")
+        params.append(date_to)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+def fetch_history_page(after=None, date_from=None, date_to=None, page_size=PAGE_SIZE):
+    """One page of temp.order_history in (order_id, line_number) order, optionally within a date range"""
+    where, params = history_conditions(date_from, date_to)
+    if after is not None:
+        where += (" AND " if where else " WHERE ") + "(order_id, line_number) > (?, ?)"
+        params += list(after)
+    cur.execute(f"SELECT * FROM temp.order_history{where} ORDER BY order_id, line_number LIMIT ?",
+                (*params, page_size))
+    return cur.fetchall()
+
+def show_history_paged(date_from=None, date_to=None):
+    """Page forward through the hot and archived order lines in a date range"""
+    years = attach_archives(date_from, date_to)
+    try:
+        print(f"Archived years included: {', '.join(map(str, years)) or 'none'}")
+        page = fetch_history_page(None, date_from, date_to)
+        while True:
+            if not page:
+                print("\nNo more orders.")
+                break
+            print(tabulate([format_order_row(r) for r in page], headers=ORDER_DETAIL_HEADERS, tablefmt='grid'))
+            if input("[n]ext, [q]uit: ").strip().lower() != 'n':
+                break
+            page = fetch_history_page(page[-1][:2], date_from, date_to)
+    finally:
+        detach_archives()
+
+def archive_summary():
+    """(year, orders, order lines, bytes) for each archive file"""
+    rows = []
+    for year, path in archive_files().items():
+        archive = sqlite3.connect(path)
+        try:
+            orders, = archive.execute("SELECT COUNT(*) FROM orders").fetchone()
+            lines, = archive.execute("SELECT COUNT(*) FROM order_lines").fetchone()
+        finally:
+            archive.close()
+        rows.append((year, orders, lines, os.path.getsize(path)))
+    return rows
+
+# Orders repriced per chunk, each chunk in its own short transaction
+REPRICE_CHUNK_SIZE = 20000
+
+def reprice_orders(chunk_size=REPRICE_CHUNK_SIZE):
+    """Recompute discount, sales and profit for every order line from current prices"""
+    read_cur = con.cursor()
+    last_rowid = 0
+    updated = 0
+    start = time.perf_counter()
+    while True:
+        read_cur.execute("""
+        SELECT l.rowid, l.quantity, p.unit_price
+        FROM order_lines l
+        JOIN products p ON l.product_id = p.product_id
+        WHERE l.rowid > ?
+        ORDER BY l.rowid
+        LIMIT ?
+        """, (last_rowid, chunk_size))
+        rows = read_cur.fetchall()
+        if not rows:
+            break
+        rowids, quantities, prices = zip(*rows)
+        discounts, sales, profits = calculate_financials_batch(quantities, prices)
+        cur.executemany("UPDATE order_lines SET discount = ?, sales = ?, profit = ? WHERE rowid = ?",
+                        zip(map(float, discounts), map(float, sales), map(float, profits), rowids))
+        con.commit()
+        last_rowid = rowids[-1]
+        updated += len(rows)
+        elapsed = time.perf_counter() - start
+        rate = updated / elapsed if elapsed > 0 else 0
+        print(f"\r{updated} order lines repriced, {rate:,.0f} rows/sec", end='', flush=True)
+    print()
+    return updated
+
+# Every statement the program runs against the database, with whether a scan is
+# expected (exports, listings, or reads bounded by LIMIT). Used by the query plan audit.
+QUERY_CATALOG = [
+    ("Look up customer", "SELECT * FROM customers WHERE customer_id = ?", False),
+    ("Load product catalog", "SELECT product_id, product_name, category, sub_category, unit_price "
+                             "FROM products ORDER BY product_id", True),
+    ("Count orders", "SELECT COUNT(*) FROM orders", True),
+    ("Orders first page", ORDER_DETAIL_QUERY + " ORDER BY l.order_id, l.line_number LIMIT ?", True),
+    ("Orders next page", ORDER_DETAIL_QUERY + " WHERE (l.order_id, l.line_number) > (?, ?)"
+                         " ORDER BY l.order_id, l.line_number LIMIT ?", False),
+    ("Orders previous page", ORDER_DETAIL_QUERY + " WHERE (l.order_id, l.line_number) < (?, ?)"
+                             " ORDER BY l.order_id DESC, l.line_number DESC LIMIT ?", False),
+    ("Count order lines", f"SELECT COUNT(*) FROM ({ORDER_DETAIL_QUERY})", True),
+    ("Orders go to page", ORDER_DETAIL_QUERY + " ORDER BY l.order_id, l.line_number LIMIT 1 OFFSET ?", True),
+    ("Orders jump position", f"SELECT COUNT(*) FROM ({ORDER_DETAIL_QUERY} WHERE l.order_id < ?)", False),
+    ("Show customers", "SELECT * FROM customers", True),
+    ("Customers next page", "SELECT * FROM customers WHERE customer_id > ? ORDER BY customer_id LIMIT ?", False),
+    ("Customers previous page", "SELECT * FROM customers WHERE customer_id < ?"
+                                " ORDER BY customer_id DESC LIMIT ?", False),
+    ("Search customers", "SELECT t.* FROM customers_fts f JOIN customers t ON t.rowid = f.rowid"
+                         " WHERE customers_fts MATCH ? ORDER BY f.rank LIMIT ? OFFSET ?", False),
+    ("Search products", "SELECT t.* FROM products_fts f JOIN products t ON t.rowid = f.rowid"
+                        " WHERE products_fts MATCH ? ORDER BY f.rank LIMIT ? OFFSET ?", False),
+    ("Show products", "SELECT * FROM products", True),
+    ("Export orders", ORDER_DETAIL_QUERY, True),
+    ("Import customer lookups", "SELECT customer_id, customer_name FROM customers", True),
+    ("Delete order", "DELETE FROM orders WHERE order_id = ?", False),
+    ("Delete order lines", "DELETE FROM order_lines WHERE order_id = ?", False),
+    ("Count customer orders", "SELECT COUNT(*) FROM orders WHERE customer_id = ?", False),
+    ("Delete customer orders", "DELETE FROM orders WHERE customer_id = ?", False),
+    ("Delete customer", "DELETE FROM customers WHERE customer_id = ?", False),
+    ("Count product orders", "SELECT COUNT(DISTINCT order_id) FROM order_lines WHERE product_id = ?", False),
+    ("Delete product lines", "DELETE FROM order_lines WHERE product_id = ?", False),
+    ("Delete emptied order", "DELETE FROM orders WHERE order_id = ?"
+                             " AND NOT EXISTS (SELECT 1 FROM order_lines WHERE order_id = ?)", False),
+    ("Delete product", "DELETE FROM products WHERE product_id = ?", False),
+    ("Summary rebuild", SUMMARY_AGGREGATE_QUERY, True),
+    ("Sales report", "SELECT region, SUM(order_count), SUM(quantity), SUM(sales), SUM(profit) "
+                     "FROM sales_summary GROUP BY region ORDER BY region", True),
+    ("Reprice chunk", """
+        SELECT l.rowid, l.quantity, p.unit_price
+        FROM order_lines l
+        JOIN products p ON l.product_id = p.product_id
+        WHERE l.rowid > ?
+        ORDER BY l.rowid
+        LIMIT ?
+        """, False),
+    ("Reprice update", "UPDATE order_lines SET discount = ?, sales = ?, profit = ? WHERE rowid = ?", False),
+    ("Update order line quantity", "UPDATE order_lines AS t SET quantity = ?, "
+                                   "discount = line_discount(?, p.unit_price), sales = line_sales(?, p.unit_price), "
+                                   "profit = line_profit(?, p.unit_price) FROM products p "
+                                   "WHERE p.product_id = t.product_id AND t.order_id = ? AND t.line_number = ?", False),
+    ("Bulk update product lines", "UPDATE order_lines AS t SET quantity = ?, "
+                                  "discount = line_discount(?, p.unit_price), sales = line_sales(?, p.unit_price), "
+                                  "profit = line_profit(?, p.unit_price) FROM products p "
+                                  "WHERE p.product_id = t.product_id AND t.product_id = ?", False),
+    ("Bulk update orders by region", "UPDATE orders AS t SET ship_mode = ? WHERE t.customer_id IN "
+                                     "(SELECT customer_id FROM customers WHERE region = ?)", True),
+    # Batched purges, one chunk per transaction
+    ("Purge chunk end", "SELECT MAX(order_id) FROM (SELECT t.order_id FROM orders AS t"
+                        " WHERE t.order_id > ? AND t.order_id <= ? AND t.ship_mode = ? AND t.order_date <= ?"
+                        " ORDER BY t.order_id LIMIT ?)", False),
+    ("Purge customer chunk end", "SELECT MAX(order_id) FROM (SELECT t.order_id FROM orders AS t"
+                                 " WHERE t.order_id > ? AND t.order_id <= ? AND t.customer_id = ?"
+                                 " ORDER BY t.order_id LIMIT ?)", False),
+    ("Purge product chunk end", "SELECT MAX(order_id) FROM (SELECT t.order_id FROM order_lines AS t"
+                                " WHERE t.order_id > ? AND t.order_id <= ? AND t.product_id = ?"
+                                " ORDER BY t.order_id LIMIT ?)", False),
+    ("Purge window delete", "DELETE FROM orders AS t WHERE t.order_id > ? AND t.order_id <= ?"
+                            " AND t.customer_id = ?", False),
+    ("Purge product window orders", "SELECT json_group_array(DISTINCT t.order_id) FROM order_lines AS t"
+                                    " WHERE t.order_id > ? AND t.order_id <= ? AND t.product_id = ?", False),
+    ("Purge product window delete", "DELETE FROM order_lines AS t WHERE t.order_id > ? AND t.order_id <= ?"
+                                    " AND t.product_id = ?", False),
+    ("Purge emptied orders", "DELETE FROM orders WHERE order_id IN (SELECT value FROM json_each(?))"
+                             " AND NOT EXISTS (SELECT 1 FROM order_lines l WHERE l.order_id = orders.order_id)",
+     False),
+    ("Purge cursor", "UPDATE purge_jobs SET last_key = ?, deleted = deleted + ? WHERE job_id = ?", False),
+    # Archiving, run against a scratch archive_audit schema (see audit_query_plans)
+    ("Archive years", "SELECT DISTINCT substr(order_date, 1, 4) FROM orders WHERE order_date < ? ORDER BY 1", False),
+    ("Archive copy orders", "INSERT OR REPLACE INTO archive_audit.orders"
+                            "(order_id, order_date, ship_date, ship_mode, customer_id)"
+                            " SELECT order_id, order_date, ship_date, ship_mode, customer_id FROM main.orders"
+                            " WHERE order_date >= ? AND order_date < ?", False),
+    ("Archive copy order lines", "INSERT OR REPLACE INTO archive_audit.order_lines"
+                                 " SELECT * FROM main.order_lines WHERE order_id IN"
+                                 " (SELECT order_id FROM main.orders WHERE order_date >= ? AND order_date < ?)",
+     False),
+    ("Archive summary subtract", summary_delta_sql('-', 'l', ('o.order_date', 'p.category', 'p.sub_category',
+                                                              'c.segment', 'c.region', 'o.ship_mode'), """
+    FROM main.order_lines l
+    JOIN main.orders o ON o.order_id = l.order_id
+    JOIN customers c ON c.customer_id = o.customer_id
+    JOIN products p ON p.product_id = l.product_id
+    WHERE o.order_date >= ? AND o.order_date < ?"""), False),
+    ("Archive delete order lines", "DELETE FROM main.order_lines WHERE order_id IN"
+                                   " (SELECT order_id FROM main.orders WHERE order_date >= ? AND order_date < ?)",
+     False),
+    ("Archive delete orders", "DELETE FROM main.orders WHERE order_date >= ? AND order_date < ?", False),
+    ("Archive summary", "INSERT INTO archive_audit.sales_summary " + summary_aggregate_query('archive_audit'), True),
+    ("History page", "SELECT * FROM temp.order_history WHERE order_date >= ? AND order_date <= ?"
+                     " AND (order_id, line_number) > (?, ?) ORDER BY order_id, line_number LIMIT ?", False),
+    ("History export", "SELECT * FROM temp.order_history WHERE order_date >= ? AND order_date <= ?", False),
+    ("History sales report", "SELECT region, SUM(order_count), SUM(quantity), SUM(sales), SUM(profit) "
+                             "FROM temp.sales_summary_history GROUP BY region ORDER BY region", True),
+    # Calendar rollups and lead times
+    ("Calendar bounds", "SELECT MIN(order_date) FROM orders WHERE order_date GLOB ?", False),
+    ("Period rollup", """
+    SELECT k.month, COUNT(DISTINCT o.order_id), COUNT(*), SUM(l.quantity), SUM(l.sales), SUM(l.profit)
+    FROM orders o
+    JOIN order_lines l ON l.order_id = o.order_id
+    CROSS JOIN calendar k ON k.day = o.order_date WHERE o.order_date >= ? AND o.order_date <= ?
+    GROUP BY k.month
+    ORDER BY k.month
+    """, False),
+    ("Lead times by ship mode", """
+    SELECT o.ship_mode, COUNT(o.lead_days), AVG(o.lead_days), MIN(o.lead_days), MAX(o.lead_days)
+    FROM orders o WHERE o.order_date >= ? AND o.order_date <= ?
+    GROUP BY o.ship_mode
+    HAVING COUNT(o.lead_days) > 0
+    ORDER BY o.ship_mode
+    """, False),
+    ("Lead times by week", """
+    SELECT k.week, COUNT(o.lead_days), AVG(o.lead_days), MIN(o.lead_days), MAX(o.lead_days)
+    FROM orders o
+    CROSS JOIN calendar k ON k.day = o.order_date WHERE o.order_date >= ? AND o.order_date <= ?
+    GROUP BY k.week
+    HAVING COUNT(o.lead_days) > 0
+    ORDER BY k.week
+    """, False),
+    # Change export and watermarks
+    ("Change watermark", "SELECT last_seq FROM sync_watermarks WHERE consumer = ?", False),
+    ("Change log high-water mark", "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'",
+     True),
+    ("Change log oldest", "SELECT MIN(seq) FROM change_log", False),
+    ("Changed orders export", f"""
+    SELECT 'upsert', d.* FROM ({ORDER_DETAIL_QUERY}) d WHERE d.order_id IN
+        (SELECT row_key FROM change_log WHERE seq > ? AND seq <= ? AND table_name = ?)
+    UNION ALL
+    SELECT 'delete', k.row_key{', NULL' * (len(ORDER_DETAIL_HEADERS) - 1)}
+    FROM (SELECT DISTINCT row_key FROM change_log WHERE seq > ? AND seq <= ? AND table_name = ?) k
+    WHERE NOT EXISTS (SELECT 1 FROM orders t WHERE t.order_id = k.row_key)
+    """, True),  # the scan is of the distinct changed keys
+    ("Advance watermark", "INSERT INTO sync_watermarks VALUES(?, ?, datetime('now')) ON CONFLICT(consumer)"
+                          " DO UPDATE SET last_seq = excluded.last_seq, synced_at = excluded.synced_at", False),
+    ("Change log trim bound", "SELECT COUNT(*), MIN(last_seq) FROM sync_watermarks", True),
+    ("Change log trim batch", "DELETE FROM change_log WHERE seq BETWEEN ? AND ?", False),
+    ("Change sync status", """
+    SELECT w.consumer, w.last_seq, w.synced_at,
+           (SELECT COUNT(*) FROM change_log WHERE seq > w.last_seq)
+    FROM sync_watermarks w
+    ORDER BY w.consumer
+    """, True),
+    # Live dashboard refreshes
+    ("Dashboard today", DASHBOARD_ORDERS_QUERY + " WHERE o.order_date = ? GROUP BY o.order_id", False),
+    ("Dashboard changed keys", "SELECT row_key FROM change_log WHERE seq > ? AND seq <= ?"
+                               " AND table_name = 'orders'", False),
+    ("Dashboard deltas", DASHBOARD_ORDERS_QUERY + " WHERE o.order_id IN (SELECT row_key FROM change_log"
+                         " WHERE seq > ? AND seq <= ? AND table_name = 'orders') GROUP BY o.order_id", False),
+    # Online rebuilds, copying into a scratch temp.audit_rebuild table
+    ("Online alter bounds", "SELECT COUNT(*), MIN(rowid), MAX(rowid) FROM orders", True),
+    ("Online alter batch end", "SELECT rowid FROM orders WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?", False),
+    ("Online alter clear batch", "DELETE FROM temp.audit_rebuild WHERE rowid > ? AND rowid <= ?", False),
+    ("Online alter copy batch", "INSERT INTO temp.audit_rebuild(rowid, order_id, order_date, ship_date, ship_mode,"
+                                " customer_id) SELECT rowid, order_id, order_date, ship_date, ship_mode, customer_id"
+                                " FROM orders WHERE rowid > ? AND rowid <= ?", False),
+    ("Online alter swap check", "SELECT (SELECT COUNT(*) FROM orders), (SELECT COUNT(*) FROM temp.audit_rebuild)",
+     True),
+]
+
+def audit_query_plans():
+    """Run EXPLAIN QUERY PLAN on every catalogued statement, returning (name, detail, flag) rows.
+
+    Archive and rebuild statements need tables that only exist mid-operation,
+    so an empty in-memory archive_audit schema, the history views over it and
+    a temp.audit_rebuild table stand in for them while the plans are read.
+    """
+    con.commit()
+    detach_archives()
+    cur.execute("ATTACH DATABASE ':memory:' AS archive_audit")
+    results = []
+    try:
+        ensure_archive_schema('archive_audit')
+        create_history_views(['archive_audit'])
+        cur.execute("CREATE TEMP TABLE audit_rebuild AS SELECT * FROM orders WHERE 0")
+        for name, sql, scan_expected in QUERY_CATALOG:
+            params = (0,) * sql.count('?')
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = cur.fetchall()
+            if not plan:
+                results.append((name, "(no plan)", ""))
+            for _, _, _, detail in plan:
+                # FTS5 lookups show up as a SCAN of the virtual table's own index
+                if detail.startswith('SCAN') and 'COVERING INDEX' not in detail and 'VIRTUAL TABLE' not in detail:
+                    flag = "expected" if scan_expected else "FULL SCAN"
+                else:
+                    flag = ""
+                results.append((name, detail, flag))
+    finally:
+        con.rollback()
+        cur.execute("DROP TABLE IF EXISTS temp.audit_rebuild")
+        detach_archives()
+    return results
+
+def benchmark_connection_profiles(insert_orders=2000, report_orders=100000, report_runs=3):
+    """Time clerk-style inserts and the joined orders report under each connection profile.
+
+    Each profile gets a scratch copy of the current schema, so the live
+    database is never touched. Returns one result row per profile.
+    """
+    cur.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'")
+    schema = [row[0] for row in cur.fetchall()]
+    cur.execute("SELECT * FROM products")
+    products = cur.fetchall()
+    if not products:
+        raise ValueError("Add some products before benchmarking")
+    prices = {p[0]: p[4] for p in products}
+
+    rng = random.Random(7)
+    customers = [(f"BENCH-{i}", f"Customer {i}", rng.choice(SEGMENTS), 'United States',
+                  'City', 'State', '00000', rng.choice(REGIONS)) for i in range(500)]
+
+    def make_order(i):
+        """One (header, line) pair for a single-product order"""
+        order_id = f"BENCH-ORD-{i:08}"
+        product_id = rng.choice(products)[0]
+        quantity = rng.randint(1, 60)
+        return ((order_id, '2024-01-15', '2024-01-18', rng.choice(SHIP_MODES), rng.choice(customers)[0]),
+                (order_id, 1, product_id, quantity, *calculate_financials(quantity, prices[product_id])))
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for profile in CONNECTION_PROFILES:
+            bench = connect_db(os.path.join(scratch, f"{profile}.db"), profile, overrides={})
+            for statement in schema:
+                bench.execute(statement)
+            bench.executemany("INSERT INTO products VALUES(?, ?, ?, ?, ?)", products)
+            bench.executemany("INSERT INTO customers VALUES(?, ?, ?, ?, ?, ?, ?, ?)", customers)
+            bench.commit()
+
+            # One order per transaction, the way insert_record() commits
+            start = time.perf_counter()
+            for i in range(insert_orders):
+                header, line = make_order(i)
+                bench.execute(ORDER_HEADER_INSERT, header)
+                bench.execute(ORDER_LINE_INSERT, line)
+                bench.commit()
+            insert_rate = insert_orders / (time.perf_counter() - start)
+
+            orders = [make_order(i) for i in range(insert_orders, insert_orders + report_orders)]
+            bench.executemany(ORDER_HEADER_INSERT, (header for header, _ in orders))
+            bench.executemany(ORDER_LINE_INSERT, (line for _, line in orders))
+            bench.commit()
+
+            start = time.perf_counter()
+            rows = 0
+            for _ in range(report_runs):
+                report = bench.execute(ORDER_DETAIL_QUERY)
+                while True:
+                    chunk = report.fetchmany(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    rows += len(chunk)
+            report_rate = rows / (time.perf_counter() - start)
+            bench.close()
+
+            results.append((profile, insert_rate, report_rate))
+    return results
+
+# Synthetic data. generate_synthetic_data() fills an empty database with a
+# reproducible store: product popularity follows a Zipf distribution, order
+# dates peak before the holidays and dip at weekends, and most orders come
+# from customers who have ordered before. The same seed always gives the same
+# rows, so benchmark runs on different commits measure identical data.
+SYNTHETIC_SEED = 42
+SYNTHETIC_SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+SYNTHETIC_START = date(2021, 1, 1)
+SYNTHETIC_DAYS = 4 * 365
+SYNTHETIC_ZIPF_EXPONENT = 1.1
+SYNTHETIC_REPEAT_RATE = 0.8   # share of orders placed by an existing customer
+SYNTHETIC_MONTH_WEIGHTS = [0.7, 0.6, 0.8, 0.8, 0.9, 0.9, 0.9, 1.0, 1.1, 1.1, 1.5, 1.9]
+SYNTHETIC_WEEKEND_WEIGHT = 0.6
+SYNTHETIC_SHIP_MODES = {  # ship mode -> (share of orders, min days, max days to ship)
+    'Standard Class': (0.60, 4, 7),
+    'Second Class': (0.20, 2, 5),
+    'First Class': (0.15, 1, 3),
+    'Same Day': (0.05, 0, 0),
+}
+SYNTHETIC_LINE_WEIGHTS = [0.55, 0.25, 0.12, 0.05, 0.03]  # orders with 1, 2, ... 5 lines
+SYNTHETIC_SEGMENT_WEIGHTS = [0.5, 0.3, 0.2]
+SYNTHETIC_CITIES = [
+    ('New York City', 'New York', '10024', 'East'), ('Philadelphia', 'Pennsylvania', '19140', 'East'),
+    ('Boston', 'Massachusetts', '02108', 'East'), ('Houston', 'Texas', '77095', 'South'),
+    ('Atlanta', 'Georgia', '30318', 'South'), ('Miami', 'Florida', '33142', 'South'),
+    ('Chicago', 'Illinois', '60610', 'North'), ('Detroit', 'Michigan', '48205', 'North'),
+    ('Minneapolis', 'Minnesota', '55407', 'North'), ('Los Angeles', 'California', '90036', 'West'),
+    ('Seattle', 'Washington', '98105', 'West'), ('Denver', 'Colorado', '80219', 'West'),
+]
+SYNTHETIC_BATCH_SIZE = 50000
+
+def parse_order_count(text):
+    """An order count such as 5000, 10k or 1m"""
+    text = text.strip().lower()
+    if text in SYNTHETIC_SIZES:
+        return SYNTHETIC_SIZES[text]
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    count = int(text[:-1] if multiplier > 1 else text) * multiplier
+    if count <= 0:
+        raise ValueError("The order count must be positive")
+    return count
+
+def generate_synthetic_data(orders, seed=SYNTHETIC_SEED, products=None, batch_size=SYNTHETIC_BATCH_SIZE):
+    """Fill the (empty) open database with a seeded synthetic store of the given number of orders.
+
+    The catalog is topped up to one product per thousand orders, between 100
+    and 10,000. Customers are created as orders need them. Returns row counts per table.
+    """
+    for table in ('orders', 'customers'):
+        cur.execute(f"SELECT EXISTS(SELECT 1 FROM {table})")
+        if cur.fetchone()[0]:
+            raise ValueError(f"Synthetic data needs an empty database, but {table} has rows")
+    rng = random.Random(seed)
+    product_count = products or max(100, min(10000, orders // 1000))
+
+    # The starter catalog is topped up with products spread over every
+    # sub-category, priced log-uniformly from $2 to $2,000
+    prices = {product_id: row[3] for product_id, row in get_product_catalog().items()}
+    sub_categories = [(category, sub) for category, subs in CATEGORIES.items() for sub in subs]
+    product_rows = []
+    for i in range(max(0, product_count - len(prices))):
+        category, sub_category = sub_categories[i % len(sub_categories)]
+        product_rows.append((f"SYN-P{i:05}", category, sub_category, f"{sub_category} {i}",
+                             round(2 * 1000 ** rng.random(), 2)))
+    prices.update((row[0], row[4]) for row in product_rows)
+    product_count = len(prices)
+
+    # Popularity ranks are shuffled so the best sellers aren't simply the first IDs
+    popular = sorted(prices)
+    rng.shuffle(popular)
+    product_weights = list(accumulate(1 / rank ** SYNTHETIC_ZIPF_EXPONENT
+                                      for rank in range(1, product_count + 1)))
+
+    days = [SYNTHETIC_START + timedelta(days=i) for i in range(SYNTHETIC_DAYS)]
+    day_weights = list(accumulate(SYNTHETIC_MONTH_WEIGHTS[day.month - 1]
+                                  * (SYNTHETIC_WEEKEND_WEIGHT if day.weekday() >= 5 else 1)
+                                  for day in days))
+    ship_modes = list(SYNTHETIC_SHIP_MODES)
+    ship_mode_weights = [share for share, _, _ in SYNTHETIC_SHIP_MODES.values()]
+    line_counts = range(1, len(SYNTHETIC_LINE_WEIGHTS) + 1)
+
+    # Bulk loads are much faster without the per-row summary, search and change
+    # triggers, so the summary and search indexes are rebuilt once at the end
+    # and every sync consumer starts again with a full export
+    for trigger in SALES_SUMMARY_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    drop_search_triggers()
+    drop_change_triggers()
+    try:
+        cur.executemany("INSERT INTO products VALUES(?, ?, ?, ?, ?)", product_rows)
+        customer_ids = []
+        line_total = 0
+        start = time.perf_counter()
+        for batch_start in range(0, orders, batch_size):
+            customers, headers, lines = [], [], []
+            for i in range(batch_start, min(batch_start + batch_size, orders)):
+                if customer_ids and rng.random() < SYNTHETIC_REPEAT_RATE:
+                    customer_id = rng.choice(customer_ids)
+                else:
+                    customer_id = f"SYN-C{len(customer_ids):08}"
+                    city, state, postal_code, region = rng.choice(SYNTHETIC_CITIES)
+                    customers.append((customer_id, f"Customer {len(customer_ids)}",
+                                      rng.choices(SEGMENTS, SYNTHETIC_SEGMENT_WEIGHTS)[0],
+                                      'United States', city, state, postal_code, region))
+                    customer_ids.append(customer_id)
+
+                order_id = f"SYN-{i:08}"
+                order_date = rng.choices(days, cum_weights=day_weights)[0]
+                ship_mode = rng.choices(ship_modes, ship_mode_weights)[0]
+                _, min_days, max_days = SYNTHETIC_SHIP_MODES[ship_mode]
+                ship_date = order_date + timedelta(days=rng.randint(min_days, max_days))
+                headers.append((order_id, order_date.isoformat(), ship_date.isoformat(), ship_mode, customer_id))
+
+                # Distinct products, most popular first drawn; small quantities are most common
+                basket = dict.fromkeys(rng.choices(popular, cum_weights=product_weights,
+                                                   k=rng.choices(line_counts, SYNTHETIC_LINE_WEIGHTS)[0]))
+                for line_number, product_id in enumerate(basket, 1):
+                    lines.append((order_id, line_number, product_id, min(60, int(rng.expovariate(1 / 6)) + 1)))
+
+            discounts, sales, profits = calculate_financials_batch([line[3] for line in lines],
+                                                                   [prices[line[2]] for line in lines])
+            cur.executemany("INSERT INTO customers VALUES(?, ?, ?, ?, ?, ?, ?, ?)", customers)
+            cur.executemany(ORDER_HEADER_INSERT, headers)
+            cur.executemany(ORDER_LINE_INSERT, ((*line, float(d), float(s), float(p))
+                                                for line, d, s, p in zip(lines, discounts, sales, profits)))
+            con.commit()
+            line_total += len(lines)
+
+            done = batch_start + len(headers)
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed > 0 else 0
+            print(f"\r{done} of {orders} orders generated, {rate:,.0f} orders/sec", end='', flush=True)
+        print()
+    finally:
+        create_sales_summary_triggers()
+        create_search_triggers()
+        create_change_triggers()
+        cur.execute("DELETE FROM sync_watermarks")
+        cur.execute("DELETE FROM change_log")
+        con.commit()
+    rebuild_search_indexes()
+    rebuild_sales_summary()
+    cur.execute("ANALYZE")
+    invalidate_product_catalog()
+    return {'orders': orders, 'order_lines': line_total,
+            'customers': len(customer_ids), 'products': product_count}
+
+BENCHMARK_INSERT_ORDERS = 1000
+BENCHMARK_DELETE_CUSTOMERS = 100
+BENCHMARK_DESCRIBE_RUNS = 100
+
+def benchmark_result(results, name, count, operation):
+    """Time operation(), recording seconds and count/sec under results[name]. Returns its result."""
+    start = time.perf_counter()
+    value = operation()
+    elapsed = time.perf_counter() - start
+    results[name] = {'seconds': round(elapsed, 6), 'count': count,
+                     'per_sec': round(count / elapsed, 1) if elapsed > 0 else None}
+    return value
+
+def run_benchmarks(orders, seed=SYNTHETIC_SEED, profile=None, cache_dir=None, label=None):
+    """Time the main operations on a synthetic database of the given size and return the results.
+
+    The database is built in a scratch directory, or copied from cache_dir
+    when an identical one (same size and seed) was generated there before.
+    The currently open database is closed first. The result is a JSON-ready
+    dict of {name: {seconds, count, per_sec}} plus the run settings.
+    """
+    close_database()
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'bench.db')
+
+        # Creating every table and index on an empty file
+        benchmark_result(results, 'bootstrap', 1, lambda: open_database(path, profile))
+        close_database()
+        os.remove(path)
+
+        cached = cache_dir and os.path.join(cache_dir, f"synthetic_{orders}_{seed}.db")
+        if cached and os.path.exists(cached):
+            shutil.copyfile(cached, path)
+            open_database(path, profile)
+        else:
+            open_database(path, profile)
+            benchmark_result(results, 'generate', orders, lambda: generate_synthetic_data(orders, seed))
+            if cached:
+                # Closing checkpoints any WAL, so the copy is complete
+                close_database()
+                os.makedirs(cache_dir, exist_ok=True)
+                shutil.copyfile(path, cached)
+                open_database(path, profile)
+
+        try:
+            rng = random.Random(seed)
+            cur.execute("SELECT COUNT(*) FROM order_lines")
+            line_count = cur.fetchone()[0]
+            cur.execute("SELECT customer_id FROM customers ORDER BY customer_id")
+            customer_ids = [row[0] for row in cur.fetchall()]
+            product_ids = list(get_product_catalog())
+
+            # Clerk-style inserts, one order per commit
+            def insert_orders():
+                for i in range(BENCHMARK_INSERT_ORDERS):
+                    lines = [(product_id, rng.randint(1, 60)) for product_id in rng.sample(product_ids, 2)]
+                    add_basket(f"BENCH-{i:06}", '2024-06-01', '2024-06-04', 'Standard Class',
+                               rng.choice(customer_ids), lines)
+            benchmark_result(results, 'order_insert', BENCHMARK_INSERT_ORDERS, insert_orders)
+            line_count += 2 * BENCHMARK_INSERT_ORDERS
+
+            benchmark_result(results, 'orders_first_page', 1, fetch_orders_page)
+            def read_orders():
+                report = cur.execute(ORDER_DETAIL_QUERY)
+                while report.fetchmany(EXPORT_CHUNK_SIZE):
+                    pass
+            benchmark_result(results, 'orders_query', line_count, read_orders)
+            benchmark_result(results, 'csv_export', line_count,
+                             lambda: export_csv('orders', os.path.join(scratch, 'orders.csv')))
+
+            deleted = rng.sample(customer_ids, min(BENCHMARK_DELETE_CUSTOMERS, len(customer_ids)))
+            benchmark_result(results, 'delete_customer', len(deleted),
+                             lambda: [delete_customer(customer_id) for customer_id in deleted])
+            # The best seller is on the most orders
+            cur.execute("SELECT product_id FROM order_lines GROUP BY product_id ORDER BY COUNT(*) DESC LIMIT 1")
+            best_seller = cur.fetchone()[0]
+            benchmark_result(results, 'delete_product', 1, lambda: delete_product(best_seller))
+
+            benchmark_result(results, 'describe', BENCHMARK_DESCRIBE_RUNS * len(TABLES),
+                             lambda: [describe_table(table) for _ in range(BENCHMARK_DESCRIBE_RUNS)
+                                      for table in TABLES])
+            def alter_tables():
+                for table in TABLES:
+                    add_column(table, 'bench_note', 'TEXT')
+                    rename_column(table, 'bench_note', 'bench_comment')
+            benchmark_result(results, 'alter', 2 * len(TABLES), alter_tables)
+        finally:
+            close_database()
+
+    return {
+        'label': label,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'orders': orders,
+        'seed': seed,
+        'profile': profile or load_db_config()['profile'],
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'results': results,
+    }
+
+def compare_benchmarks(baseline, current):
+    """Rows of (name, baseline seconds, current seconds, change %) for two run_benchmarks() results"""
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            rows.append((name, None, result['seconds'], None))
+        else:
+            change = (result['seconds'] - before['seconds']) / before['seconds'] * 100 if before['seconds'] else None
+            rows.append((name, before['seconds'], result['seconds'], change))
+    return rows
+
+# Order ingestion server. Point-of-sale terminals connect over TCP (or a Unix
+# socket) and send one JSON object per line:
+#
+#   {"op": "order", "order_id": "ORD-1", "order_date": "2024-05-01", "ship_date": "2024-05-03",
+#    "ship_mode": "Standard Class", "customer_id": "CUST-1", "lines": [["PROD-004", 3]]}
+#   {"op": "get", "order_id": "ORD-1"}
+#   {"op": "stats"}
+#
+# and get one JSON object back per request. Orders are validated against
+# cached customers and products, then queued for a single writer task that
+# commits them in batches, flushing when INGEST_BATCH_SIZE orders are waiting
+# or INGEST_FLUSH_INTERVAL seconds after the first one arrived. Reads use a
+# separate pool of read-only connections, so they never wait for the writer.
+INGEST_HOST = '127.0.0.1'
+INGEST_PORT = 8765
+INGEST_BATCH_SIZE = 500
+INGEST_FLUSH_INTERVAL = 0.001
+INGEST_READERS = 4
+INGEST_LATENCY_SAMPLES = 100000
+
+def percentile(values, pct):
+    """pct-th percentile (nearest rank) of values, or 0.0 when there are none"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def parse_order_request(request, customer_ids, prices):
+    """Validate an "order" request, returning (header, [(product_id, quantity, unit_price), ...]).
+
+    Raises ValueError with a message for the client when the order is invalid
+    or names a customer/product that isn't in the caches.
+    """
+    fields = ['order_id', 'order_date', 'ship_date', 'ship_mode', 'customer_id']
+    missing = [f for f in fields if not isinstance(request.get(f), str) or not request[f]]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    check_ship_mode(request['ship_mode'])
+    if request['customer_id'] not in customer_ids:
+        raise ValueError(f"Invalid Customer ID '{request['customer_id']}'")
+    order_date, ship_date = check_order_dates(request['order_date'], request['ship_date'])
+
+    lines = request.get('lines')
+    if lines is None and 'product_id' in request:
+        lines = [[request['product_id'], request.get('quantity')]]
+    if not isinstance(lines, list) or not lines:
+        raise ValueError("An order needs at least one line")
+    parsed = []
+    for line in lines:
+        if not isinstance(line, list) or len(line) != 2:
+            raise ValueError("Each line must be [product_id, quantity]")
+        product_id, quantity = line
+        if product_id not in prices:
+            raise ValueError(f"Invalid Product ID '{product_id}'")
+        check_quantity(product_id, quantity)
+        parsed.append((product_id, quantity, prices[product_id]))
+    return (request['order_id'], order_date, ship_date, request['ship_mode'], request['customer_id']), parsed
+
+class IngestServer:
+    """Accepts orders from many clients and commits them in batches on one writer connection"""
+
+    def __init__(self, path, profile=None, batch_size=INGEST_BATCH_SIZE,
+                 flush_interval=INGEST_FLUSH_INTERVAL, readers=INGEST_READERS):
+        self.path = path
+        self.profile = profile
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.reader_count = readers
+        self.writer = None
+        self.readers = None
+        self.queue = None
+        self.customer_ids = set()
+        self.prices = {}
+        self.latencies = []
+        self.committed = self.rejected = self.batches = 0
+        self.started = None
+
+    def open(self):
+        """Open the writer and reader connections and load the validation caches"""
+        # Worker threads take turns with each connection, never share one at the same time
+        self.writer = connect_db(self.path, self.profile, isolation_level=None, check_same_thread=False)
+        # The read-only connections can only read while the writer commits under WAL.
+        # Journal mode belongs to the profile (and sticks to the file once set), so
+        # refuse to start rather than quietly switching the database over.
+        journal_mode = self.writer.execute("PRAGMA journal_mode").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            self.close()
+            raise ValueError(f"The ingest server needs a WAL database, but this one uses journal_mode = "
+                             f"{journal_mode}. Start it with a WAL profile, e.g. --profile performance")
+        self.readers = asyncio.Queue()
+        for _ in range(self.reader_count):
+            self.readers.put_nowait(connect_db(self.path, self.profile, read_only=True,
+                                               check_same_thread=False))
+        self.customer_ids = {row[0] for row in self.writer.execute("SELECT customer_id FROM customers")}
+        self.prices = dict(self.writer.execute("SELECT product_id, unit_price FROM products"))
+        self.queue = asyncio.Queue()
+        self.started = time.perf_counter()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        while self.readers is not None and not self.readers.empty():
+            self.readers.get_nowait().close()
+
+    async def read(self, sql, params=()):
+        """Run a query on a pooled read-only connection"""
+        reader = await self.readers.get()
+        try:
+            return await asyncio.to_thread(lambda: reader.execute(sql, params).fetchall())
+        finally:
+            self.readers.put_nowait(reader)
+
+    async def refresh_caches(self, customer_id):
+        """Pick up customers and products added since the server started"""
+        if await self.read("SELECT 1 FROM customers WHERE customer_id = ?", (customer_id,)):
+            self.customer_ids.add(customer_id)
+        self.prices = dict(await self.read("SELECT product_id, unit_price FROM products"))
+
+    def write_batch(self, batch):
+        """Insert a batch of (header, lines) orders in one transaction.
+
+        Each order gets its own savepoint, so a duplicate Order ID only
+        rejects that order. Returns one error message (or None) per order.
+        """
+        quantities = [quantity for _, lines in batch for _, quantity, _ in lines]
+        unit_prices = [unit_price for _, lines in batch for _, _, unit_price in lines]
+        discounts, sales, profits = calculate_financials_batch(quantities, unit_prices)
+        financials = iter(zip(discounts, sales, profits))
+
+        errors = []
+        self.writer.execute("BEGIN")
+        try:
+            for header, lines in batch:
+                rows = [(header[0], line_number, product_id, quantity, float(d), float(s), float(p))
+                        for line_number, ((product_id, quantity, _), (d, s, p))
+                        in enumerate(zip(lines, financials), 1)]
+                self.writer.execute("SAVEPOINT ingest_order")
+                try:
+                    self.writer.execute(ORDER_HEADER_INSERT, header)
+                    self.writer.executemany(ORDER_LINE_INSERT, rows)
+                    errors.append(None)
+                except sqlite3.IntegrityError as e:
+                    self.writer.execute("ROLLBACK TO ingest_order")
+                    errors.append(str(e))
+                self.writer.execute("RELEASE ingest_order")
+            self.writer.execute("COMMIT")
+        except sqlite3.Error:
+            self.writer.execute("ROLLBACK")
+            raise
+        return errors
+
+    async def write_loop(self):
+        """The single writer: gather queued orders into batches and commit them.
+
+        A None on the queue flushes what has been gathered and stops the loop.
+        """
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+            batch, stopping = [first], False
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    # Take whatever is already waiting before sleeping on the queue
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                errors = await asyncio.to_thread(self.write_batch, [(h, l) for h, l, _, _ in batch])
+            except sqlite3.Error as e:
+                errors = [f"Database error: {e}"] * len(batch)
+            committed_at = time.perf_counter()
+            self.batches += 1
+            for (_, _, received, future), error in zip(batch, errors):
+                if error is None:
+                    self.committed += 1
+                    self.latencies.append(committed_at - received)
+                else:
+                    self.rejected += 1
+                if not future.done():
+                    future.set_result(error)
+            del self.latencies[:-INGEST_LATENCY_SAMPLES]
+            if stopping:
+                return
+
+    async def submit(self, request):
+        received = time.perf_counter()
+        try:
+            header, lines = parse_order_request(request, self.customer_ids, self.prices)
+        except ValueError:
+            await self.refresh_caches(request.get('customer_id'))
+            try:
+                header, lines = parse_order_request(request, self.customer_ids, self.prices)
+            except ValueError as e:
+                self.rejected += 1
+                return {'ok': False, 'error': str(e)}
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((header, lines, received, future))
+        error = await future
+        if error:
+            return {'ok': False, 'error': error}
+        return {'ok': True, 'order_id': header[0]}
+
+    async def get_order(self, request):
+        rows = await self.read(ORDER_DETAIL_QUERY + " WHERE l.order_id = ? ORDER BY l.line_number",
+                               (request.get('order_id'),))
+        if not rows:
+            return {'ok': False, 'error': "Order not found"}
+        return {'ok': True, 'order': [dict(zip(ORDER_DETAIL_HEADERS, row)) for row in rows]}
+
+    def stats(self):
+        """Throughput and commit latency since the server started"""
+        elapsed = time.perf_counter() - self.started
+        return {
+            'committed': self.committed,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'queued': self.queue.qsize(),
+            'orders_per_sec': round(self.committed / elapsed, 1) if elapsed > 0 else 0.0,
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(self.latencies, 99) * 1000, 2),
+        }
+
+    async def handle_client(self, reader, writer):
+        """Answer one JSON request per line until the client disconnects"""
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Requests must be JSON objects")
+                    op = request.get('op', 'order')
+                    if op == 'order':
+                        response = await self.submit(request)
+                    elif op == 'get':
+                        response = await self.get_order(request)
+                    elif op == 'stats':
+                        response = {'ok': True, **self.stats()}
+                    else:
+                        response = {'ok': False, 'error': f"Unknown op '{op}'"}
+                except ValueError as e:
+                    response = {'ok': False, 'error': f"Bad request: {e}"}
+                except sqlite3.Error as e:
+                    response = {'ok': False, 'error': f"Database error: {e}"}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=INGEST_HOST, port=INGEST_PORT, unix_socket=None, ready=None):
+        """Run until cancelled or sent SIGTERM. ready, if given, is called with the listening address."""
+        self.open()
+        writer_task = asyncio.create_task(self.write_loop())
+        try:
+            if unix_socket:
+                server = await asyncio.start_unix_server(self.handle_client, unix_socket)
+                address = unix_socket
+            else:
+                server = await asyncio.start_server(self.handle_client, host, port)
+                address = f"{host}:{port}"
+            # Stop cleanly on SIGTERM as well as Ctrl+C (not available on Windows)
+            stop = asyncio.Event()
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+            except (NotImplementedError, AttributeError):
+                pass
+            if ready:
+                ready(address)
+            async with server:
+                await stop.wait()
+        finally:
+            # Let the writer commit whatever is already queued before closing
+            await self.queue.put(None)
+            await writer_task
+            self.close()
+
+async def load_test(customer_ids, product_ids, orders=10000, clients=20, lines_per_order=2,
+                    host=INGEST_HOST, port=INGEST_PORT, unix_socket=None, seed=SYNTHETIC_SEED):
+    """Submit orders from several concurrent clients and time each round trip.
+
+    The same seed picks the same customers, products, quantities and ship
+    modes, so runs can be compared. Returns (client stats, server stats); the
+    client stats include the accepted/rejected counts, orders/sec and p50/p99
+    round-trip latency.
+    """
+    rng = random.Random(seed)
+    run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+    latencies, errors = [], []
+    order_numbers = iter(range(orders))
+
+    async def connect():
+        if unix_socket:
+            return await asyncio.open_unix_connection(unix_socket)
+        return await asyncio.open_connection(host, port)
+
+    async def client():
+        reader, writer = await connect()
+        for i in order_numbers:
+            request = {
+                'op': 'order',
+                'order_id': f"LOAD-{run_id}-{i:07}",
+                'order_date': '2024-06-01',
+                'ship_date': '2024-06-04',
+                'ship_mode': rng.choice(SHIP_MODES),
+                'customer_id': rng.choice(customer_ids),
+                'lines': [[rng.choice(product_ids), rng.randint(1, 60)] for _ in range(lines_per_order)],
+            }
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if not response['ok']:
+                errors.append(response['error'])
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await connect()
+    writer.write(b'{"op": "stats"}\n')
+    await writer.drain()
+    server_stats = json.loads(await reader.readline())
+    writer.close()
+
+    client_stats = {
+        'accepted': len(latencies) - len(errors),
+        'rejected': len(errors),
+        'orders_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'first_error': errors[0] if errors else None,
+    }
+    return client_stats, server_stats
+
+def maintenance():
+    while True:
+        print("\n1. Reprice All Orders \n2. Check Pricing Parity \n3. Audit Query Plans")
+        print("4. Benchmark Connection Profiles \n5. Archive Old Orders \n6. Trim Change Log")
+        print("7. Back to main menu")
+        choice = input("Enter your choice: ")
+
+        try:
+            if choice == '1':
+                confirm = input("This will recompute discount, sales and profit for every order line. Continue? (y/n): ")
+                if confirm.lower() == 'y':
+                    updated = reprice_orders()
+                    print(f"{updated} order lines repriced")
+
+            elif choice == '2':
+                checked, mismatches = check_financials_parity()
+                if mismatches:
+                    print(f"{len(mismatches)} of {checked} results differ from calculate_financials:")
+                    for quantity, unit_price, expected, actual in mismatches[:10]:
+                        print(f"  quantity={quantity}, price={unit_price}: expected {expected}, got {actual}")
+                else:
+                    print(f"Batch pricing matches calculate_financials on all {checked} samples")
+
+            elif choice == '3':
+                results = audit_query_plans()
+                print(tabulate(results, headers=['Statement', 'Query Plan', 'Flag'], tablefmt='grid'))
+                full_scans = sorted({name for name, _, flag in results if flag == "FULL SCAN"})
+                if full_scans:
+                    print(f"Unexpected full scans in: {', '.join(full_scans)}")
+                else:
+                    print("No unexpected full scans.")
+
+            elif choice == '4':
+                print("Benchmarking, this can take a minute...")
+                results = benchmark_connection_profiles()
+                print(tabulate([(profile, f"{inserts:,.0f}", f"{report:,.0f}")
+                                for profile, inserts, report in results],
+                               headers=['Profile', 'Inserts/sec (commit each)', 'Report rows/sec'],
+                               tablefmt='grid'))
+
+            elif choice == '5':
+                cutoff = input("Archive orders dated before (YYYY-MM-DD): ").strip()
+                moved = archive_orders(cutoff)
+                for year, count in moved.items():
+                    print(f"{year}: {count} orders moved to the archive")
+                if not moved:
+                    print("No orders before that date.")
+                else:
+                    print(f"Archives are in {os.path.abspath(archive_dir())}")
+
+            elif choice == '6':
+                print(f"{trim_change_log()} change log entries removed")
+                print(tabulate(change_sync_status(), headers=['Consumer', 'Last Seq', 'Synced At', 'Pending'],
+                               tablefmt='grid'))
+
+            elif choice == '7':
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+        except ValueError as e:
+            print(f"Invalid input! {e}")
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+STATS_HEADERS = ['Statement', 'Calls', 'Total ms', 'Mean ms', 'p50 ms', 'p99 ms', 'Max ms', 'Rows']
+
+def print_stats(limit=20):
+    """Print the busiest statements and the commit timings"""
+    print(tabulate([(name[:80], *numbers) for name, *numbers in STATS.summary(limit)],
+                   headers=STATS_HEADERS, tablefmt='grid', floatfmt='.2f'))
+    commits = STATS.commits
+    mean = commits['seconds'] / commits['calls'] * 1000 if commits['calls'] else 0.0
+    print(f"Commits: {commits['calls']}, total {commits['seconds'] * 1000:.2f} ms, mean {mean:.2f} ms, "
+          f"p99 {STATS.bucket_percentile(commits, 99) * 1000:.2f} ms, max {commits['max_seconds'] * 1000:.2f} ms")
+    print(f"Slow queries (over {STATS.slow_seconds * 1000:g} ms): {STATS.slow_count}"
+          + (f", logged to {os.path.abspath(STATS.slow_log)}" if STATS.slow_log else ""))
+
+def stats_menu():
+    if STATS is None:
+        print("Instrumentation is off. Start with --stats, or set SUPERSTORE_STATS=1.")
+        return
+    while True:
+        print("\n1. Show Statement Stats \n2. Reset Stats \n3. Dump Stats to File")
+        print("4. Set Slow Query Threshold \n5. Back to main menu")
+        choice = input("Enter your choice: ")
+
+        try:
+            if choice == '1':
+                print_stats()
+            elif choice == '2':
+                STATS.reset()
+                print("Stats reset.")
+            elif choice == '3':
+                filename = input("Enter file name (.json, or .prom for Prometheus text) [superstore_stats.json]: ")
+                filename = filename.strip() or 'superstore_stats.json'
+                STATS.dump(filename)
+                print(f"Stats written to {os.path.abspath(filename)}")
+            elif choice == '4':
+                STATS.slow_seconds = float(input("Log statements slower than (ms): ")) / 1000
+                print("Threshold updated.")
+            elif choice == '5':
+                break
+            else:
+                print("Invalid choice. Please try again.")
+        except ValueError:
+            print("Invalid input! Please enter a number.")
+        except OSError as e:
+            print(f"Could not write the file: {e}")
+
+def run_menu():
+    """The interactive menu"""
+    # Modify the main menu to remove truncate and drop table options
+    while True:
+        print("\n1. Show Records \n2. Insert Records \n3. Update Records \n4. Delete Records")
+        print("5. Alter Table \n6. Describe Table \n7. Download as CSV \n8. Import from CSV \n9. Reports")
+        print("10. Maintenance \n11. Stats \n12. Exit")
+        choice = input("Enter your choice: ")
+
+        if choice == '1':
+            show_records()
+        elif choice == '2':
+            insert_record()
+        elif choice == '3':
+            update_table()
+        elif choice == '4':
+            delete_records()
+        elif choice == '5':
+            alter_table()
+        elif choice == '6':
+            describe()
+        elif choice == '7':
+            download_as_csv()
+        elif choice == '8':
+            import_from_csv()
+        elif choice == '9':
+            reports()
+        elif choice == '10':
+            maintenance()
+        elif choice == '11':
+            stats_menu()
+        elif choice == '12':
+            print("Exiting the program.")
+            break
+        else:
+            print("Invalid choice. Please choose again.")
+
+# Command line commands. Each takes the parsed arguments and returns an exit code.
+def cmd_show(args):
+    if args.table == 'orders' and args.history:
+        after = (args.after, sys.maxsize) if args.after is not None else None
+        years = attach_archives(args.date_from, args.date_to)
+        records = fetch_history_page(after, args.date_from, args.date_to, args.limit)
+        print(f"Archived years included: {', '.join(map(str, years)) or 'none'}")
+        print(tabulate([format_order_row(r) for r in records], headers=ORDER_DETAIL_HEADERS, tablefmt='grid'))
+    elif args.table == 'orders':
+        # Start after every line of the given order
+        after = (args.after, sys.maxsize) if args.after is not None else None
+        records = fetch_orders_page(after=after, page_size=args.limit)
+        print(tabulate([format_order_row(r) for r in records], headers=ORDER_DETAIL_HEADERS, tablefmt='grid'))
+    elif args.table == 'customers':
+        print(tabulate(fetch_records('customers'), headers=CUSTOMER_HEADERS, tablefmt='grid'))
+    else:
+        print(tabulate([format_product_row(r) for r in fetch_records('products')],
+                       headers=PRODUCT_HEADERS, tablefmt='grid'))
+    return 0
+
+def cmd_search(args):
+    records, total = search(args.table, args.text, args.limit, (args.page - 1) * args.limit)
+    if args.table == 'products':
+        print(tabulate([format_product_row(r) for r in records], headers=PRODUCT_HEADERS, tablefmt='grid'))
+    else:
+        print(tabulate(records, headers=CUSTOMER_HEADERS, tablefmt='grid'))
+    if total is None:
+        print(f"More than {SEARCH_RANK_LIMIT} matches, unranked; add words to narrow the search")
+    else:
+        print(f"{total} matches, page {args.page} of {max((total + args.limit - 1) // args.limit, 1)}")
+    return 0
+
+def cmd_insert(args):
+    if args.file:
+        inserted, rejected, rejects_filename = bulk_import_csv(args.table, args.file, args.batch_size)
+        print(f"Imported {inserted} rows into {args.table}")
+        if rejected:
+            print(f"{rejected} rows rejected, see {os.path.abspath(rejects_filename)}")
+            return 1
+        return 0
+
+    lines = []
+    for line in args.line or []:
+        product_id, sep, quantity = line.rpartition(':')
+        if not sep:
+            raise ValueError("--line must look like PRODUCT_ID:QUANTITY")
+        lines.append((product_id, int(quantity)))
+    if args.product_id is not None or args.quantity is not None or not lines:
+        fields = ['product_id', 'quantity']
+        missing = ['--' + f.replace('_', '-') for f in fields if getattr(args, f) is None]
+        if missing:
+            raise ValueError(f"Either --file, --line or all of {', '.join(missing)} are required")
+        lines.insert(0, (args.product_id, args.quantity))
+
+    fields = ['order_id', 'order_date', 'ship_date', 'ship_mode', 'customer_id']
+    missing = ['--' + f.replace('_', '-') for f in fields if getattr(args, f) is None]
+    if missing:
+        raise ValueError(f"Either --file or all of {', '.join(missing)} are required")
+    priced = add_basket(*(getattr(args, f) for f in fields), lines)
+    for line_number, (unit_price, discount, sales, profit) in enumerate(priced, 1):
+        print(f"Order {args.order_id} line {line_number} added: discount {discount:.2%}, "
+              f"sales ${sales:.2f}, profit ${profit:.2f}")
+    return 0
+
+def cmd_update(args):
+    field, sep, value = args.set.partition('=')
+    if not sep:
+        raise ValueError("--set must look like FIELD=VALUE")
+    if args.where or args.ids_file:
+        if args.id:
+            raise ValueError("Give either an ID or --where/--ids-file, not both")
+        filters = {}
+        for condition in args.where:
+            name, sep, filter_value = condition.partition('=')
+            if not sep:
+                raise ValueError("--where must look like FILTER=VALUE")
+            filters[name.strip()] = filter_value
+        changed = bulk_update(args.table, field.strip(), value, filters, args.ids_file)
+        print(f"{changed} records updated successfully!")
+        return 0
+    if not args.id:
+        raise ValueError("Give the ID of the record to update, or --where/--ids-file")
+    record_id = args.id
+    if isinstance(UPDATABLE_FIELDS[args.table][0], tuple):
+        order_id, _, line = args.id.rpartition(':')
+        try:
+            record_id = (order_id, int(line))
+        except ValueError:
+            record_id = None
+        if not order_id or record_id is None:
+            args.parser.error(f"order lines are identified as ORDER_ID:LINE with a numeric LINE, not '{args.id}'")
+    if update_field(args.table, record_id, field.strip(), value) == 0:
+        print(f"No {args.table} record with ID {args.id}")
+        return 1
+    print("Record updated successfully!")
+    return 0
+
+def cmd_delete(args):
+    if args.table == 'orders':
+        if not delete_order(args.id):
+            print("Order not found")
+            return 1
+        print(f"Order {args.id} deleted successfully")
+        return 0
+
+    column = 'customer_id' if args.table == 'customers' else 'product_id'
+    order_count = count_orders_for(column, args.id)
+    if order_count and not args.yes:
+        print(f"This would delete {order_count} orders as well; pass --yes to confirm")
+        return 1
+    if args.table == 'customers':
+        _, order_count = purge('customer', {'customer_id': args.id}, args.batch_size, args.pause_ms / 1000)
+        print(f"Customer and {order_count} orders deleted")
+    else:
+        _, line_count = purge('product', {'product_id': args.id}, args.batch_size, args.pause_ms / 1000)
+        print(f"Product deleted and removed from {line_count} order lines")
+    return 0
+
+def cmd_purge(args):
+    if args.list:
+        print(tabulate(purge_jobs(), headers=['Job', 'Kind', 'Filters', 'Deleted', 'Status', 'Started', 'Finished'],
+                       tablefmt='grid'))
+        return 0
+    if args.resume:
+        jobs = [row[0] for row in purge_jobs(unfinished=True)]
+        if args.job:
+            jobs = [args.job]
+        for job_id in jobs:
+            print(f"Purge {job_id} finished: {run_purge(job_id, args.batch_size, args.pause_ms / 1000)} rows deleted")
+        if not jobs:
+            print("No unfinished purges.")
+        return 0
+    filters = {}
+    for condition in args.where:
+        name, sep, value = condition.partition('=')
+        if not sep:
+            raise ValueError("--where must look like FILTER=VALUE")
+        filters[name.strip()] = value
+    matching = count_purge('orders', filters)
+    if args.dry_run or not matching:
+        print(f"{matching} orders match")
+        return 0
+    job_id, deleted = purge('orders', filters, args.batch_size, args.pause_ms / 1000)
+    print(f"Purge {job_id} deleted {deleted} orders")
+    return 0
+
+def cmd_alter(args):
+    in_place = [option for option in (args.add_column, args.rename_column, args.rename_to) if option]
+    rebuild = {'types': dict(args.change_type), 'drop': args.drop_column, 'not_null': args.not_null,
+               'unique': [group.split(',') for group in args.unique], 'checks': args.check}
+    if len(in_place) + any(rebuild.values()) != 1:
+        raise ValueError("Give one of --add-column, --rename-column or --rename-to, "
+                         "or any of the online rebuild options")
+    if args.add_column:
+        add_column(args.table, *args.add_column)
+    elif args.rename_column:
+        rename_column(args.table, *args.rename_column)
+    elif args.rename_to:
+        rename_table(args.table, args.rename_to)
+    else:
+        copied = online_alter(args.table, **rebuild, batch_size=args.batch_size, pause=args.pause_ms / 1000)
+        print(f"{args.table} rebuilt with {copied} rows")
+        return 0
+    print(f"Table '{args.table}' altered")
+    return 0
+
+def cmd_describe(args):
+    print(tabulate(describe_table(args.table),
+                   headers=['Column Name', 'Data Type', 'Nullable', 'Primary Key'], tablefmt='grid'))
+    return 0
+
+def cmd_export(args):
+    filename, row_count, size = export_csv(args.table, args.output, args.gzip, args.chunk_size,
+                                           args.workers, args.split_by,
+                                           args.history, args.date_from, args.date_to)
+    if not row_count:
+        print("No data to export.")
+        return 0
+    print(f"Exported {row_count} rows ({size:,} bytes) to {os.path.abspath(filename)}")
+    return 0
+
+def cmd_changes(args):
+    if args.full:
+        reset_watermark(args.consumer)
+    if args.trim:
+        print(f"{trim_change_log()} change log entries removed")
+    elif not args.status:
+        since, upto, results = export_changes(args.consumer, args.output_dir, args.gzip, args.chunk_size)
+        print(f"Changes {since or 0} to {upto}" + (" (full export)" if since is None else ""))
+        for table, (filename, row_count, size) in results.items():
+            if filename:
+                print(f"{table}: {row_count} rows ({size:,} bytes) to {os.path.abspath(filename)}")
+    print(tabulate(change_sync_status(), headers=['Consumer', 'Last Seq', 'Synced At', 'Pending'], tablefmt='grid'))
+    return 0
+
+def cmd_snapshot(args):
+    path, row_count = export_snapshot(args.table, args.output, args.format, args.chunk_size)
+    print(f"Snapshot of {row_count} rows written to {os.path.abspath(path)}")
+    return 0
+
+def cmd_load_snapshot(args):
+    start = time.perf_counter()
+    snapshot = load_snapshot(args.path)
+    elapsed = time.perf_counter() - start
+    if isinstance(snapshot, dict):
+        columns = [(name, 'dictionary' if isinstance(values, DictionaryColumn) else str(values.dtype), len(values))
+                   for name, values in snapshot.items()]
+    else:
+        columns = [(field.name, str(field.type), snapshot.num_rows) for field in snapshot.schema]
+    print(tabulate(columns, headers=['Column', 'Type', 'Rows'], tablefmt='grid'))
+    print(f"Mapped in {elapsed * 1000:.2f} ms")
+    return 0
+
+def cmd_report(args):
+    if args.rebuild:
+        print(f"Summary rebuilt with {rebuild_sales_summary()} groups")
+    if args.check:
+        differences = check_sales_summary()
+        for key, want, got in differences:
+            print(f"{key}: expected {want}, found {got}")
+        print(f"{len(differences)} summary groups out of date")
+        if differences:
+            return 1
+    if args.lead_time:
+        group_by = args.period or 'ship_mode'
+        print_lead_times(lead_time_report(group_by, args.date_from, args.date_to), group_by)
+    elif args.period:
+        print_period_rollup(period_rollup(args.period, args.date_from, args.date_to), args.period)
+    if args.group_by:
+        if args.history or args.date_from or args.date_to:
+            rows = sales_report(args.group_by, args.history, args.date_from, args.date_to)
+        elif args.workers == 1 or (not args.workers and os.cpu_count() == 1):
+            rows = sales_report(args.group_by)
+        else:
+            # Straight from the order lines rather than the summary table
+            rows = parallel_sales_report(args.group_by, args.workers, args.split_by)
+        print(tabulate([[key, count, quantity, f"${sales:,.2f}", f"${profit:,.2f}"]
+                        for key, count, quantity, sales, profit in rows],
+                       headers=[args.group_by, 'Order Lines', 'Quantity', 'Sales', 'Profit'], tablefmt='grid'))
+    return 0
+
+def cmd_archive(args):
+    if args.before:
+        for year, count in archive_orders(args.before).items():
+            print(f"{year}: {count} orders moved to the archive")
+    rows = archive_summary()
+    if not rows:
+        print("No archived orders.")
+        return 0
+    print(f"Archives in {os.path.abspath(archive_dir())}")
+    print(tabulate([[year, orders, lines, f"{size:,}"] for year, orders, lines, size in rows],
+                   headers=['Year', 'Orders', 'Order Lines', 'Bytes'], tablefmt='grid'))
+    return 0
+
+def cmd_analyze(args):
+    filters = {}
+    for condition in args.where:
+        name, sep, value = condition.partition('=')
+        if not sep:
+            raise ValueError("--where must look like DIMENSION=VALUE")
+        filters[name.strip()] = value
+    start = time.perf_counter()
+    store = load_order_store()
+    loaded = time.perf_counter() - start
+    size = store.nbytes()
+    print(f"{len(store)} order lines loaded in {loaded:.2f}s, {size / 2**20:,.1f} MB "
+          f"({size / max(len(store), 1):,.0f} bytes/line)")
+    start = time.perf_counter()
+    rows = store.select(args.date_from, args.date_to, **filters)
+    if args.top:
+        results = store.top(args.group_by, args.top, args.by, rows)
+    else:
+        results = store.group_by(args.group_by, rows)
+    print_analytics(results, args.group_by)
+    print(f"Query took {time.perf_counter() - start:.3f}s")
+    return 0
+
+def cmd_reprice(args):
+    print(f"{reprice_orders(args.chunk_size)} order lines repriced")
+    return 0
+
+def cmd_check_pricing(args):
+    checked, mismatches = check_financials_parity()
+    for quantity, unit_price, expected, actual in mismatches:
+        print(f"quantity={quantity}, price={unit_price}: expected {expected}, got {actual}")
+    print(f"{len(mismatches)} of {checked} results differ from calculate_financials")
+    return 1 if mismatches else 0
+
+def cmd_audit_plans(args):
+    results = audit_query_plans()
+    print(tabulate(results, headers=['Statement', 'Query Plan', 'Flag'], tablefmt='grid'))
+    return 1 if any(flag == "FULL SCAN" for _, _, flag in results) else 0
+
+def cmd_benchmark_profiles(args):
+    results = benchmark_connection_profiles(args.orders, args.report_orders)
+    print(tabulate(results, headers=['Profile', 'Inserts/sec (commit each)', 'Report rows/sec'],
+                   tablefmt='grid', floatfmt=',.0f'))
+    return 0
+
+def cmd_generate(args):
+    counts = generate_synthetic_data(args.orders, args.seed, args.products)
+    print(tabulate(counts.items(), headers=['Table', 'Rows'], tablefmt='grid', intfmt=','))
+    return 0
+
+def cmd_benchmark(args):
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    run = run_benchmarks(args.orders, args.seed, args.profile, args.cache_dir, args.label)
+    output = args.output or f"benchmark_{args.orders}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+
+    print(tabulate([(name, r['seconds'], r['count'], r['per_sec']) for name, r in run['results'].items()],
+                   headers=['Benchmark', 'Seconds', 'Count', 'Per sec'], tablefmt='grid',
+                   floatfmt=('', '.4f', '', ',.1f'), intfmt=','))
+    if baseline:
+        print(f"\nCompared with {args.compare} ({baseline.get('label') or baseline['created']}):")
+        print(tabulate(compare_benchmarks(baseline, run),
+                       headers=['Benchmark', 'Before (s)', 'After (s)', 'Change %'],
+                       tablefmt='grid', floatfmt=('', '.4f', '.4f', '+.1f')))
+    print(f"Results written to {os.path.abspath(output)}")
+    return 0
+
+def cmd_dashboard(args):
+    run_dashboard(args.interval, args.once)
+    return 0
+
+def cmd_serve(args):
+    server = IngestServer(database_path(con), args.profile, args.batch_size,
+                          args.flush_ms / 1000, args.readers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket,
+                                 ready=lambda address: print(f"Accepting orders on {address}, Ctrl+C to stop")))
+    except KeyboardInterrupt:
+        pass
+    print(tabulate(server.stats().items(), tablefmt='grid'))
+    return 0
+
+def cmd_load_test(args):
+    cur.execute("SELECT customer_id FROM customers")
+    customer_ids = [row[0] for row in cur.fetchall()]
+    product_ids = list(get_product_catalog())
+    if not customer_ids or not product_ids:
+        raise ValueError("Add some customers and products before load testing")
+
+    async def run():
+        if not args.local:
+            return await load_test(customer_ids, product_ids, args.orders, args.clients, args.lines,
+                                   args.host, args.port, args.socket, args.seed)
+        # Run a server in this process for the duration of the test
+        server = IngestServer(database_path(con), args.profile)
+        started = asyncio.Event()
+        serving = asyncio.create_task(server.serve(args.host, args.port, args.socket,
+                                                   ready=lambda address: started.set()))
+        waiting = asyncio.create_task(started.wait())
+        await asyncio.wait([waiting, serving], return_when=asyncio.FIRST_COMPLETED)
+        if serving.done():
+            waiting.cancel()
+            serving.result()  # the server failed to start; raise its error
+        try:
+            return await load_test(customer_ids, product_ids, args.orders, args.clients, args.lines,
+                                   args.host, args.port, args.socket, args.seed)
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+    client_stats, server_stats = asyncio.run(run())
+    print(f"Client: {client_stats['accepted']} accepted, {client_stats['rejected']} rejected, "
+          f"{client_stats['orders_per_sec']:,.0f} orders/sec, "
+          f"round trip p50 {client_stats['p50_ms']:.2f} ms, p99 {client_stats['p99_ms']:.2f} ms")
+    print(f"Server: {server_stats['committed']} committed in {server_stats['batches']} batches, "
+          f"commit latency p50 {server_stats['p50_ms']:.2f} ms, p99 {server_stats['p99_ms']:.2f} ms")
+    if client_stats['first_error']:
+        print(f"First rejection: {client_stats['first_error']}")
+        return 1
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='superstore',
+        description="Superstore management system. Run without a command for the interactive menu.")
+    parser.add_argument('--db', help="database file (default from superstore.ini or SUPERSTORE_DB)")
+    parser.add_argument('--profile', choices=list(CONNECTION_PROFILES), help="connection profile")
+    parser.add_argument('--stats', action='store_true',
+                        help="time every statement and print the busiest ones on exit")
+    parser.add_argument('--stats-dump', metavar='FILE',
+                        help="write statement stats to FILE on exit (.prom for Prometheus text, else JSON)")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    p = commands.add_parser('show', help="print orders, customers or products")
+    p.add_argument('table', choices=RECORD_TABLES)
+    p.add_argument('--after', help="orders: start after this Order ID")
+    p.add_argument('--limit', type=int, default=PAGE_SIZE, help="orders: number of rows (default %(default)s)")
+    p.add_argument('--history', action='store_true', help="include orders moved to the archive databases")
+    p.add_argument('--from', dest='date_from', metavar='DATE', help="only orders dated on or after DATE")
+    p.add_argument('--to', dest='date_to', metavar='DATE', help="only orders dated on or before DATE")
+    p.set_defaults(func=cmd_show)
+
+    p = commands.add_parser('dashboard', help="today's sales, refreshed live until Ctrl+C")
+    p.add_argument('--interval', type=float, default=DASHBOARD_INTERVAL, help="seconds between refreshes")
+    p.add_argument('--once', action='store_true', help="print the figures once and exit")
+    p.set_defaults(func=cmd_dashboard)
+
+    p = commands.add_parser('search', help="find customers or products by name, place or category")
+    p.add_argument('table', choices=list(SEARCH_INDEXES))
+    p.add_argument('text', help="words to match; each also matches as the start of a longer word")
+    p.add_argument('--limit', type=int, default=PAGE_SIZE, help="results per page (default %(default)s)")
+    p.add_argument('--page', type=int, default=1)
+    p.set_defaults(func=cmd_search)
+
+    p = commands.add_parser('insert', help="add one order, or bulk import a CSV file")
+    p.add_argument('--file', help="CSV or CSV.gz in the layout written by export")
+    p.add_argument('--table', choices=RECORD_TABLES, default='orders', help="table the file holds (default %(default)s)")
+    p.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    p.add_argument('--order-id')
+    p.add_argument('--order-date')
+    p.add_argument('--ship-date')
+    p.add_argument('--ship-mode', choices=SHIP_MODES)
+    p.add_argument('--customer-id')
+    p.add_argument('--product-id')
+    p.add_argument('--quantity', type=int)
+    p.add_argument('--line', action='append', metavar='PRODUCT_ID:QUANTITY',
+                   help="add a line to the order; repeat for several products")
+    p.set_defaults(func=cmd_insert)
+
+    p = commands.add_parser('update', help="set one field of one record, or of every matching record")
+    p.add_argument('table', choices=list(UPDATABLE_FIELDS))
+    p.add_argument('id', nargs='?', help="primary key of the record; ORDER_ID:LINE for order_lines")
+    p.add_argument('--set', required=True, metavar='FIELD=VALUE')
+    p.add_argument('--where', action='append', default=[], metavar='FILTER=VALUE',
+                   help="update every record matching this filter; repeat to combine filters")
+    p.add_argument('--ids-file', help="update the records listed in this file, one ID per line "
+                                      "(order IDs for order_lines)")
+    p.set_defaults(func=cmd_update, parser=p)
+
+    p = commands.add_parser('delete', help="delete an order, or a customer/product and its orders")
+    p.add_argument('table', choices=RECORD_TABLES)
+    p.add_argument('id', help="primary key of the record")
+    p.add_argument('--yes', action='store_true', help="confirm deleting related orders")
+    p.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help="related rows deleted per transaction")
+    p.add_argument('--pause-ms', type=float, default=PURGE_PAUSE * 1000,
+                   help="pause between batches so other writers get in (default %(default)s)")
+    p.set_defaults(func=cmd_delete)
+
+    p = commands.add_parser('purge', help="delete every order matching filters in small batches")
+    p.add_argument('--where', action='append', default=[], metavar='FILTER=VALUE',
+                   help=f"one of {', '.join(BULK_FILTERS['orders'])}; repeat to combine")
+    p.add_argument('--dry-run', action='store_true', help="only count the matching orders")
+    p.add_argument('--resume', action='store_true', help="finish interrupted purges (all, or --job)")
+    p.add_argument('--job', type=int, help="purge job to resume")
+    p.add_argument('--list', action='store_true', help="list purge jobs")
+    p.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help="orders deleted per transaction")
+    p.add_argument('--pause-ms', type=float, default=PURGE_PAUSE * 1000,
+                   help="pause between batches so other writers get in (default %(default)s)")
+    p.set_defaults(func=cmd_purge)
+
+    p = commands.add_parser('alter', help="add, rename, retype or drop columns, add constraints, or rename a table")
+    p.add_argument('table', choices=TABLES)
+    p.add_argument('--add-column', nargs=2, metavar=('NAME', 'TYPE'))
+    p.add_argument('--rename-column', nargs=2, metavar=('OLD', 'NEW'))
+    p.add_argument('--rename-to', metavar='NEW_NAME')
+    # These rebuild the table online and can be combined into one rebuild
+    p.add_argument('--change-type', nargs=2, action='append', default=[], metavar=('COLUMN', 'TYPE'))
+    p.add_argument('--drop-column', action='append', default=[], metavar='COLUMN')
+    p.add_argument('--not-null', action='append', default=[], metavar='COLUMN')
+    p.add_argument('--unique', action='append', default=[], metavar='COLUMN[,COLUMN...]')
+    p.add_argument('--check', action='append', default=[], metavar='EXPRESSION')
+    p.add_argument('--batch-size', type=int, default=ONLINE_ALTER_BATCH_SIZE, help="rows copied per transaction")
+    p.add_argument('--pause-ms', type=float, default=ONLINE_ALTER_PAUSE * 1000,
+                   help="pause between batches so other writers get in (default %(default)s)")
+    p.set_defaults(func=cmd_alter)
+
+    p = commands.add_parser('describe', help="show a table's columns")
+    p.add_argument('table', choices=TABLES)
+    p.set_defaults(func=cmd_describe)
+
+    p = commands.add_parser('export', help="export to CSV")
+    p.add_argument('table', choices=list(EXPORTS))
+    p.add_argument('--output', help="file to write (default superstore_<table>_<timestamp>.csv)")
+    p.add_argument('--gzip', action='store_true', help="compress the output")
+    p.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    p.add_argument('--workers', type=int, default=1,
+                   help="orders: export ranges in this many processes, 0 for one per core")
+    p.add_argument('--split-by', choices=SPLIT_BY, default='rowid', help="how orders are split between workers")
+    p.add_argument('--history', action='store_true', help="include orders moved to the archive databases")
+    p.add_argument('--from', dest='date_from', metavar='DATE', help="only orders dated on or after DATE")
+    p.add_argument('--to', dest='date_to', metavar='DATE', help="only orders dated on or before DATE")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser('changes', help="export rows changed since a consumer's last sync")
+    p.add_argument('--consumer', default=DEFAULT_CONSUMER, help="name of the downstream sync (default %(default)s)")
+    p.add_argument('--output-dir', default='.', help="directory for the delta files")
+    p.add_argument('--gzip', action='store_true', help="compress the output")
+    p.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    p.add_argument('--full', action='store_true', help="forget the watermark and export every row")
+    p.add_argument('--status', action='store_true', help="only list the consumers and their pending changes")
+    p.add_argument('--trim', action='store_true', help="only drop the log entries every consumer has received")
+    p.set_defaults(func=cmd_changes)
+
+    p = commands.add_parser('snapshot', help="write a typed columnar snapshot for analysis")
+    p.add_argument('table', choices=list(EXPORTS))
+    p.add_argument('--output', help="file or directory to write (default superstore_<table>_<timestamp>)")
+    p.add_argument('--format', choices=SNAPSHOT_FORMATS, default='auto',
+                   help="arrow needs pyarrow, npy needs NumPy; auto prefers arrow")
+    p.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    p.set_defaults(func=cmd_snapshot)
+
+    p = commands.add_parser('load-snapshot', help="memory-map a snapshot and list its columns")
+    p.add_argument('path')
+    p.set_defaults(func=cmd_load_snapshot)
+
+    p = commands.add_parser('report', help="sales totals, calendar period rollups and ship lead times")
+    p.add_argument('--group-by', choices=SUMMARY_DIMENSIONS)
+    p.add_argument('--rebuild', action='store_true', help="rebuild the summary tables first")
+    p.add_argument('--check', action='store_true', help="compare the summary tables with the orders")
+    p.add_argument('--workers', type=int, default=1,
+                   help="aggregate the order lines in this many processes (0 for one per core) "
+                        "instead of reading the summary table")
+    p.add_argument('--split-by', choices=SPLIT_BY, default='rowid', help="how orders are split between workers")
+    p.add_argument('--history', action='store_true', help="include orders moved to the archive databases")
+    p.add_argument('--period', choices=list(CALENDAR_PERIODS),
+                   help="orders, lines, sales and profit per calendar period")
+    p.add_argument('--lead-time', action='store_true',
+                   help="days from order to shipping per ship mode, or per --period")
+    p.add_argument('--from', dest='date_from', metavar='DATE',
+                   help="only orders dated on or after DATE (whole months for --group-by)")
+    p.add_argument('--to', dest='date_to', metavar='DATE',
+                   help="only orders dated on or before DATE (whole months for --group-by)")
+    p.set_defaults(func=cmd_report)
+
+    p = commands.add_parser('archive', help="move closed years of orders into per-year archive databases")
+    p.add_argument('--before', metavar='DATE', help="archive orders dated before DATE; without it, list the archives")
+    p.set_defaults(func=cmd_archive)
+
+    p = commands.add_parser('analyze', help="group and rank the order lines in memory")
+    p.add_argument('--group-by', choices=ANALYTICS_DIMENSIONS, default='category')
+    p.add_argument('--top', type=int, help="only the N groups with the highest --by")
+    p.add_argument('--by', choices=ANALYTICS_MEASURES, default='sales', help="measure for --top (default %(default)s)")
+    p.add_argument('--where', action='append', default=[], metavar='DIMENSION=VALUE',
+                   help="only lines where the dimension has this value (IDs for customer, product, order)")
+    p.add_argument('--from', dest='date_from', metavar='DATE', help="only orders dated on or after DATE")
+    p.add_argument('--to', dest='date_to', metavar='DATE', help="only orders dated on or before DATE")
+    p.set_defaults(func=cmd_analyze)
+
+    p = commands.add_parser('reprice', help="recompute discount, sales and profit for every order line")
+    p.add_argument('--chunk-size', type=int, default=REPRICE_CHUNK_SIZE)
+    p.set_defaults(func=cmd_reprice)
+
+    p = commands.add_parser('check-pricing', help="compare batch and scalar pricing")
+    p.set_defaults(func=cmd_check_pricing)
+
+    p = commands.add_parser('audit-plans', help="EXPLAIN QUERY PLAN every statement")
+    p.set_defaults(func=cmd_audit_plans)
+
+    p = commands.add_parser('benchmark-profiles', help="compare connection profiles")
+    p.add_argument('--orders', type=int, default=2000, help="orders inserted one commit at a time")
+    p.add_argument('--report-orders', type=int, default=100000, help="orders in the report benchmark")
+    p.set_defaults(func=cmd_benchmark_profiles)
+
+    p = commands.add_parser('generate', help="fill an empty database with seeded synthetic data")
+    p.add_argument('--orders', type=parse_order_count, default=SYNTHETIC_SIZES['10k'],
+                   help="number of orders, e.g. 10k, 1m or 10m (default 10k)")
+    p.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    p.add_argument('--products', type=int, help="number of products (default one per 1,000 orders)")
+    p.set_defaults(func=cmd_generate)
+
+    p = commands.add_parser('benchmark', help="time the main operations on a synthetic database")
+    p.add_argument('--orders', type=parse_order_count, default=SYNTHETIC_SIZES['10k'],
+                   help="size of the synthetic database, e.g. 10k, 1m or 10m (default 10k)")
+    p.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    p.add_argument('--cache-dir', help="keep generated databases here and reuse them on later runs")
+    p.add_argument('--label', help="name for this run, such as a commit hash")
+    p.add_argument('--output', help="JSON results file (default benchmark_<orders>_<timestamp>.json)")
+    p.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run to compare with")
+    p.set_defaults(func=cmd_benchmark)
+
+    p = commands.add_parser('serve', help="accept JSON-lines orders over a socket")
+    p.add_argument('--host', default=INGEST_HOST)
+    p.add_argument('--port', type=int, default=INGEST_PORT)
+    p.add_argument('--socket', help="listen on this Unix socket instead of TCP")
+    p.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE, help="orders per commit at most")
+    p.add_argument('--flush-ms', type=float, default=INGEST_FLUSH_INTERVAL * 1000,
+                   help="longest an order waits for its batch to fill (default %(default)s)")
+    p.add_argument('--readers', type=int, default=INGEST_READERS, help="read-only connections")
+    p.set_defaults(func=cmd_serve)
+
+    p = commands.add_parser('load-test', help="submit orders to the ingestion server from many clients")
+    p.add_argument('--host', default=INGEST_HOST)
+    p.add_argument('--port', type=int, default=INGEST_PORT)
+    p.add_argument('--socket', help="connect to this Unix socket instead of TCP")
+    p.add_argument('--orders', type=int, default=10000)
+    p.add_argument('--clients', type=int, default=20, help="concurrent connections")
+    p.add_argument('--lines', type=int, default=2, help="lines per order")
+    p.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    p.add_argument('--local', action='store_true', help="start a server in this process for the test")
+    p.set_defaults(func=cmd_load_test)
+
+    return parser
+
+def main(argv=None):
+    """Run one command from argv, or the interactive menu when none is given"""
+    args = build_parser().parse_args(argv)
+    open_database(args.db, args.profile, stats=True if args.stats or args.stats_dump else None)
+    try:
+        if args.command is None:
+            run_menu()
+            return 0
+        return args.func(args)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if STATS is not None:
+            if args.stats:
+                print_stats()
+            if args.stats_dump:
+                STATS.dump(args.stats_dump)
+        close_database()
+
+if __name__ == '__main__':
+    sys.exit(main())
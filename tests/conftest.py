@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# superstore.py lives at the repository root, which isn't a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import superstore  # noqa: E402
+
+SAMPLE_ORDERS = 300
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """superstore run from tmp_path with the SUPERSTORE_* variables cleared.
+
+    No superstore.ini or environment setting from the developer's machine
+    applies, and the connection is closed again afterwards.
+    """
+    for name in list(os.environ):
+        if name.startswith('SUPERSTORE_'):
+            monkeypatch.delenv(name)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(superstore, '_order_store', None)
+    yield superstore
+    superstore.close_database()
+
+
+@pytest.fixture
+def db(isolated, tmp_path):
+    """A freshly migrated database in tmp_path, opened as superstore's connection"""
+    isolated.open_database(str(tmp_path / 'test.db'), 'default', stats=False)
+    return isolated
+
+
+@pytest.fixture
+def store(db):
+    """db filled with a small seeded synthetic store"""
+    db.generate_synthetic_data(SAMPLE_ORDERS, seed=7)
+    return db
+
+
+def scalar(sql, params=()):
+    """First column of the first row of a query on the open database"""
+    superstore.cur.execute(sql, params)
+    return superstore.cur.fetchone()[0]
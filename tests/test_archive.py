@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from conftest import scalar
+
+CUTOFF = '2023-01-01'
+
+
+def history(superstore, date_from=None, date_to=None):
+    rows, page = [], superstore.fetch_history_page(None, date_from, date_to, page_size=97)
+    while page:
+        rows += page
+        page = superstore.fetch_history_page(page[-1][:2], date_from, date_to, page_size=97)
+    return rows
+
+
+@pytest.fixture
+def archived(store):
+    """store with the orders placed before CUTOFF archived, and what it held before"""
+    before = {
+        'lines': store.cur.execute(store.ORDER_DETAIL_QUERY + " ORDER BY l.order_id, l.line_number").fetchall(),
+        'report': store.sales_report('region'),
+        'changes': scalar("SELECT COUNT(*) FROM change_log"),
+        'old': scalar("SELECT COUNT(*) FROM orders WHERE order_date < ?", (CUTOFF,)),
+    }
+    store.moved = store.archive_orders(CUTOFF)
+    return store, before
+
+
+def test_old_orders_move_to_one_file_per_year(archived):
+    store, before = archived
+    assert sorted(store.moved) == [2021, 2022]
+    assert sum(store.moved.values()) == before['old']
+    assert scalar("SELECT COUNT(*) FROM orders WHERE order_date < ?", (CUTOFF,)) == 0
+    assert sorted(os.listdir(store.archive_dir())) == ['orders_2021.db', 'orders_2022.db']
+    # Moving orders is not a change to sync, and the hot summary only covers the hot rows
+    assert scalar("SELECT COUNT(*) FROM change_log") == before['changes']
+    assert store.check_sales_summary() == []
+
+
+def test_history_includes_the_archived_rows(archived):
+    store, before = archived
+    assert store.attach_archives() == [2021, 2022]
+    try:
+        assert history(store) == before['lines']
+    finally:
+        store.detach_archives()
+    report = store.sales_report('region', history=True)
+    assert [row[:3] for row in report] == [row[:3] for row in before['report']]
+    assert [row[3:] for row in report] == [pytest.approx(row[3:]) for row in before['report']]
+
+
+def test_date_ranges_attach_only_the_years_they_need(archived):
+    store, before = archived
+    assert store.attach_archives('2022-03-01', '2023-06-30') == [2022]
+    try:
+        lines = history(store, '2022-03-01', '2023-06-30')
+    finally:
+        store.detach_archives()
+    assert lines == [row for row in before['lines'] if '2022-03-01' <= row[2] <= '2023-06-30']
+    assert not any(name.startswith('archive_') for _, name, _ in store.cur.execute("PRAGMA database_list"))
+
+
+def test_archiving_again_moves_nothing(archived):
+    store, before = archived
+    assert store.archive_orders(CUTOFF) == {}
+    assert store.attach_archives() == [2021, 2022]
+    try:
+        assert history(store) == before['lines']
+    finally:
+        store.detach_archives()
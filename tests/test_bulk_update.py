@@ -0,0 +1,71 @@
+import pytest
+from conftest import scalar
+
+
+def lines_priced_as(superstore, where, params=()):
+    """(quantity, unit price, discount, sales, profit) of the matching lines"""
+    return superstore.cur.execute(f"""
+    SELECT l.quantity, p.unit_price, l.discount, l.sales, l.profit
+    FROM order_lines l JOIN products p ON p.product_id = l.product_id WHERE {where}
+    """, params).fetchall()
+
+
+def test_quantity_change_reprices_each_line_from_its_product(store):
+    conditions, params = store.bulk_conditions('order_lines', {'category': 'Technology'})
+    matching = store.count_matching('order_lines', conditions, params)
+    assert matching > 0
+    assert store.apply_update('order_lines', 'quantity', '25', conditions, params) == matching
+
+    lines = lines_priced_as(store, "p.category = 'Technology'")
+    assert len(lines) == matching
+    for quantity, unit_price, *financials in lines:
+        assert quantity == 25
+        assert tuple(financials) == store.calculate_financials(25, unit_price)
+    assert store.check_sales_summary() == []
+
+
+def test_product_change_reprices_from_the_new_product(store):
+    order_id = scalar("SELECT order_id FROM order_lines GROUP BY order_id HAVING COUNT(*) > 1 LIMIT 1")
+    product_id = scalar("SELECT product_id FROM products ORDER BY unit_price DESC LIMIT 1")
+    conditions, params = store.bulk_conditions('order_lines', {'order_id': order_id})
+    store.apply_update('order_lines', 'product_id', product_id, conditions, params)
+
+    for quantity, unit_price, *financials in lines_priced_as(store, "l.order_id = ?", (order_id,)):
+        assert tuple(financials) == store.calculate_financials(quantity, unit_price)
+    assert scalar("SELECT COUNT(DISTINCT product_id) FROM order_lines WHERE order_id = ?", (order_id,)) == 1
+
+
+def test_filters_and_id_files_combine(store, tmp_path):
+    order_ids = [row[0] for row in store.cur.execute("SELECT order_id FROM orders ORDER BY order_id LIMIT 40")]
+    ids_file = tmp_path / 'ids.txt'
+    ids_file.write_text('\n'.join(order_ids + ['', 'NO-SUCH-ORDER']) + '\n')
+    conditions, params = store.bulk_conditions('orders', {'ship_mode': 'Standard Class'}, str(ids_file))
+    expected = scalar(f"SELECT COUNT(*) FROM orders WHERE ship_mode = 'Standard Class' "
+                      f"AND order_id IN ({', '.join('?' * len(order_ids))})", order_ids)
+
+    assert store.apply_update('orders', 'ship_mode', 'Same Day', conditions, params) == expected
+    assert scalar("SELECT COUNT(*) FROM orders WHERE ship_mode = 'Standard Class' AND order_id <= ?",
+                  (order_ids[-1],)) == 0
+    assert store.check_sales_summary() == []
+
+
+@pytest.mark.parametrize('table_name, field, value, message', [
+    ('orders', 'ship_mode', 'Teleport', "Unknown ship_mode"),
+    ('order_lines', 'quantity', '0', "Quantity must be positive"),
+    ('order_lines', 'product_id', 'NO-SUCH', "Invalid Product ID"),
+    ('orders', 'customer_id', 'NO-SUCH', "Invalid Customer ID"),
+    ('orders', 'order_id', 'X', "Cannot update orders.order_id"),
+])
+def test_bad_values_change_nothing(store, table_name, field, value, message):
+    changes = scalar("SELECT COUNT(*) FROM change_log")
+    conditions, params = store.bulk_conditions(table_name, {'region': 'West'})
+    with pytest.raises(ValueError, match=message):
+        store.apply_update(table_name, field, value, conditions, params)
+    assert scalar("SELECT COUNT(*) FROM change_log") == changes
+
+
+def test_an_update_needs_a_known_filter(db):
+    with pytest.raises(ValueError, match="at least one filter"):
+        db.bulk_conditions('orders')
+    with pytest.raises(ValueError, match="Cannot filter orders by 'colour'"):
+        db.bulk_conditions('orders', {'colour': 'red'})
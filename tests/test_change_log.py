@@ -0,0 +1,99 @@
+import csv
+
+from conftest import scalar
+
+
+def read_export(filename):
+    """{key: change} of an export file, keyed on its first data column"""
+    with open(filename, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))[1:]
+    changes = {}
+    for change, key, *_ in rows:
+        changes.setdefault(key, set()).add(change)
+    return changes
+
+
+def rename_customer(superstore, customer_id, name):
+    superstore.apply_update('customers', 'customer_name', name, ["t.customer_id = ?"], [customer_id])
+
+
+def test_first_export_is_full_then_nothing_is_pending(store, tmp_path):
+    since, upto, results = store.export_changes('warehouse', str(tmp_path))
+    assert since is None
+    assert results['orders'][1] == scalar("SELECT COUNT(*) FROM order_lines")
+    assert results['customers'][1] == scalar("SELECT COUNT(*) FROM customers")
+    assert results['orders'][0].endswith(f"superstore_orders_full_{upto}.csv")
+
+    since, again, results = store.export_changes('warehouse', str(tmp_path))
+    assert since == again == upto
+    assert set(results.values()) == {(None, 0, 0)}
+
+
+def test_delta_holds_upserts_and_deletes(store, tmp_path):
+    store.export_changes('warehouse', str(tmp_path))
+    customer_id = scalar("SELECT customer_id FROM orders GROUP BY customer_id HAVING COUNT(*) > 1 LIMIT 1")
+    their_orders = {row[0] for row in store.cur.execute("SELECT order_id FROM orders WHERE customer_id = ?",
+                                                        (customer_id,))}
+    deleted = scalar("SELECT order_id FROM orders WHERE customer_id <> ? LIMIT 1", (customer_id,))
+    product_id = scalar("SELECT product_id FROM products LIMIT 1")
+
+    rename_customer(store, customer_id, 'Renamed Customer')
+    store.delete_order(deleted)
+    store.add_order('CHG-1', '2024-06-01', '2024-06-03', 'First Class', customer_id, product_id, 3)
+
+    since, upto, results = store.export_changes('warehouse', str(tmp_path))
+    assert since is not None and since < upto
+    assert results['orders'][0].endswith(f"superstore_orders_changes_{since}_{upto}.csv")
+    assert read_export(results['customers'][0]) == {customer_id: {'upsert'}}
+    # Orders showing the renamed customer are sent again along with the new and deleted ones
+    orders = read_export(results['orders'][0])
+    assert orders == {**{order_id: {'upsert'} for order_id in their_orders | {'CHG-1'}}, deleted: {'delete'}}
+    assert results['products'] == (None, 0, 0)
+
+
+def test_a_consumer_behind_the_trimmed_log_gets_a_full_export(store, tmp_path):
+    store.export_changes('warehouse', str(tmp_path))
+    for i in range(5):
+        rename_customer(store, scalar("SELECT MIN(customer_id) FROM customers"), f"Name {i}")
+    _, upto, _ = store.export_changes('warehouse', str(tmp_path))
+    rename_customer(store, scalar("SELECT MIN(customer_id) FROM customers"), "Latest")
+    assert scalar("SELECT MIN(seq) FROM change_log") == upto + 1
+    # A watermark from before the entries trimmed so far, e.g. restored from an old backup
+    store.cur.execute("INSERT INTO sync_watermarks VALUES('restored', 1, datetime('now'))")
+    store.con.commit()
+
+    since, _, results = store.export_changes('restored', str(tmp_path))
+    assert since is None
+    assert results['customers'][1] == scalar("SELECT COUNT(*) FROM customers")
+
+
+def test_trim_keeps_what_the_slowest_consumer_needs(store, tmp_path):
+    store.export_changes('warehouse', str(tmp_path))
+    store.export_changes('crm', str(tmp_path))
+    customer_id = scalar("SELECT MIN(customer_id) FROM customers")
+    rename_customer(store, customer_id, 'First Rename')
+    _, crm_seq, _ = store.export_changes('crm', str(tmp_path))
+    rename_customer(store, customer_id, 'Second Rename')
+    _, warehouse_seq, _ = store.export_changes('warehouse', str(tmp_path))
+
+    # warehouse is current, but crm has not seen the second rename
+    assert scalar("SELECT MIN(seq) FROM change_log") == crm_seq + 1
+    pending = dict((consumer, pending) for consumer, _, _, pending in store.change_sync_status())
+    assert pending == {'crm': warehouse_seq - crm_seq, 'warehouse': 0}
+
+    since, _, results = store.export_changes('crm', str(tmp_path))
+    assert since == crm_seq
+    assert read_export(results['customers'][0]) == {customer_id: {'upsert'}}
+    assert scalar("SELECT COUNT(*) FROM change_log") == 0
+
+
+def test_without_consumers_only_the_newest_entries_are_kept(store, monkeypatch):
+    monkeypatch.setattr(store, 'CHANGE_LOG_RETENTION', 10)
+    for i in range(30):
+        rename_customer(store, scalar("SELECT MIN(customer_id) FROM customers"), f"Name {i}")
+    logged = scalar("SELECT COUNT(*) FROM change_log")
+    newest = scalar("SELECT MAX(seq) FROM change_log")
+
+    assert store.trim_change_log(batch_size=7) == logged - 10
+    assert store.cur.execute("SELECT MIN(seq), MAX(seq) FROM change_log").fetchone() == (newest - 9, newest)
+    assert store.trim_change_log() == 0
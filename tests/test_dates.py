@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from conftest import scalar, superstore
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-03-05', '2024-03-05'),
+    ('3/5/2024', '2024-03-05'),
+    ('2024/03/05', '2024-03-05'),
+    (' 12/31/2023 ', '2023-12-31'),
+    (date(2024, 2, 29), '2024-02-29'),
+])
+def test_dates_are_stored_as_iso_text(value, expected):
+    assert superstore.normalize_date(value) == expected
+
+
+@pytest.mark.parametrize('value', ['2023-02-29', '31/12/2024', '1850-01-01', 'soon', '', None, 20240305])
+def test_unreadable_dates_are_refused(value):
+    with pytest.raises(ValueError, match="expected YYYY-MM-DD"):
+        superstore.normalize_date(value)
+
+
+def test_an_order_cannot_ship_before_it_is_placed(db):
+    assert db.check_order_dates('2/28/2024', '2024-03-01') == ('2024-02-28', '2024-03-01')
+    with pytest.raises(ValueError, match="Ship date 2024-02-27 is before order date 2024-02-28"):
+        db.check_order_dates('2024-02-28', '2024/02/27')
+
+
+def test_date_updates_that_would_clash_change_nothing(store):
+    conditions, params = store.bulk_conditions('orders', {'ship_mode': 'Standard Class'})
+    before = store.cur.execute("SELECT order_id, order_date, ship_date FROM orders ORDER BY order_id").fetchall()
+    latest_order = scalar("SELECT MAX(order_date) FROM orders WHERE ship_mode = 'Standard Class'")
+    clashing = scalar("SELECT COUNT(*) FROM orders WHERE ship_mode = 'Standard Class' AND ship_date < ?",
+                      (latest_order,))
+
+    with pytest.raises(ValueError, match=f"{clashing} matching orders would ship before they were placed"):
+        store.apply_update('orders', 'order_date', latest_order, conditions, params)
+    with pytest.raises(ValueError, match="would ship before they were placed"):
+        store.apply_update('orders', 'ship_date', '2020-01-01', conditions, params)
+    assert store.cur.execute("SELECT order_id, order_date, ship_date FROM orders ORDER BY order_id").fetchall() \
+        == before
+
+    # A later ship date in another layout is fine, and stored as ISO text
+    changed = store.apply_update('orders', 'ship_date', '1/31/2025', conditions, params)
+    assert changed == scalar("SELECT COUNT(*) FROM orders WHERE ship_mode = 'Standard Class'")
+    assert scalar("SELECT COUNT(*) FROM orders WHERE ship_date = '2025-01-31'") == changed
+
+
+def test_month_rollup_matches_the_order_lines(store):
+    expected = store.cur.execute("""
+    SELECT substr(o.order_date, 1, 7), COUNT(DISTINCT o.order_id), COUNT(*), SUM(l.quantity)
+    FROM orders o JOIN order_lines l ON l.order_id = o.order_id
+    WHERE o.order_date BETWEEN '2022-01-01' AND '2022-06-30'
+    GROUP BY 1 ORDER BY 1
+    """).fetchall()
+    rows = store.period_rollup('month', '2022-01-01', '6/30/2022')
+    assert [row[:4] for row in rows] == expected
+    assert len(rows) == 6
+
+
+def test_the_calendar_grows_to_cover_new_orders(store):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    product_id = scalar("SELECT product_id FROM products LIMIT 1")
+    # 2026-12-31 is a Thursday, so it falls in ISO week 53 of 2026
+    store.add_order('CAL-1', '12/31/2026', '2027-01-04', 'Standard Class', customer_id, product_id, 3)
+    assert [row[:4] for row in store.period_rollup('week', '2026-12-28', '2027-01-03')] == [('2026-W53', 1, 1, 3)]
+    assert [row[:2] for row in store.period_rollup('weekday', '2026-12-31', '2026-12-31')] == [('Thursday', 1)]
+    assert store.lead_time_report('quarter', '2026-10-01') == [('2026-Q4', 1, 4.0, 4, 4)]
+
+
+def test_lead_times_by_ship_mode(store):
+    expected = {}
+    for ship_mode, order_date, ship_date in store.cur.execute("SELECT ship_mode, order_date, ship_date FROM orders"):
+        expected.setdefault(ship_mode, []).append(
+            (date.fromisoformat(ship_date) - date.fromisoformat(order_date)).days)
+    rows = store.lead_time_report('ship_mode')
+    assert [row[0] for row in rows] == sorted(expected)
+    for ship_mode, orders, average, shortest, longest in rows:
+        days = expected[ship_mode]
+        assert (orders, shortest, longest) == (len(days), min(days), max(days))
+        assert average == pytest.approx(sum(days) / len(days))
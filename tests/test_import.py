@@ -0,0 +1,86 @@
+import csv
+
+import pytest
+from conftest import scalar
+
+ORDER_COLUMNS = ['Order ID', 'Order Date', 'Ship Date', 'Ship Mode', 'Customer ID', 'Product ID', 'Quantity']
+
+
+def write_csv(path, headers, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_rejects(filename):
+    with open(filename, newline='', encoding='utf-8') as f:
+        return {row[0]: row[-1] for row in csv.reader(f)}
+
+
+def test_order_lines_are_numbered_and_priced(store, tmp_path):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    product_id, unit_price = store.cur.execute("SELECT product_id, unit_price FROM products LIMIT 1").fetchone()
+    filename = write_csv(tmp_path / 'orders.csv', ORDER_COLUMNS, [
+        ['IMP-1', '01/15/2024', '2024-01-18', 'First Class', customer_id, product_id, '3'],
+        ['IMP-1', '01/15/2024', '2024-01-18', 'First Class', customer_id, product_id, '12'],
+    ])
+    assert store.bulk_import_csv('orders', filename) == (2, 0, None)
+
+    assert store.cur.execute("SELECT order_date, ship_date FROM orders WHERE order_id = 'IMP-1'").fetchone() \
+        == ('2024-01-15', '2024-01-18')
+    lines = store.cur.execute("""
+    SELECT line_number, quantity, discount, sales, profit FROM order_lines
+    WHERE order_id = 'IMP-1' ORDER BY line_number
+    """).fetchall()
+    assert lines == [(1, 3) + store.calculate_financials(3, unit_price),
+                     (2, 12) + store.calculate_financials(12, unit_price)]
+
+
+def test_bad_rows_go_to_the_rejects_file(store, tmp_path):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    product_id = scalar("SELECT product_id FROM products LIMIT 1")
+    existing = scalar("SELECT order_id FROM orders LIMIT 1")
+    orders = scalar("SELECT COUNT(*) FROM orders")
+    filename = write_csv(tmp_path / 'orders.csv', ORDER_COLUMNS, [
+        ['BAD-QTY', '2024-01-15', '2024-01-18', 'First Class', customer_id, product_id, '0'],
+        ['BAD-NEG', '2024-01-15', '2024-01-18', 'First Class', customer_id, product_id, '-2'],
+        ['BAD-MODE', '2024-01-15', '2024-01-18', 'Teleport', customer_id, product_id, '1'],
+        ['BAD-DATE', '2024-01-15', '2024-01-10', 'First Class', customer_id, product_id, '1'],
+        ['BAD-CUST', '2024-01-15', '2024-01-18', 'First Class', 'NO-SUCH', product_id, '1'],
+        [existing, '2024-01-15', '2024-01-18', 'First Class', customer_id, product_id, '1'],
+        ['GOOD', '2024-01-15', '2024-01-18', 'Same Day', customer_id, product_id, '1'],
+    ])
+    inserted, rejected, rejects_filename = store.bulk_import_csv('orders', filename, batch_size=3)
+    assert (inserted, rejected) == (1, 6)
+    assert rejects_filename == str(tmp_path / 'orders_rejects.csv')
+
+    reasons = read_rejects(rejects_filename)
+    assert reasons.pop('Order ID') == 'Reason'
+    assert reasons['BAD-QTY'] == reasons['BAD-NEG'] == "Invalid Quantity or Line"
+    assert reasons['BAD-MODE'].startswith("Unknown ship mode 'Teleport'")
+    assert reasons['BAD-DATE'].startswith("Invalid Order Date or Ship Date")
+    assert reasons['BAD-CUST'] == "Unknown or ambiguous customer"
+    assert reasons[existing].startswith("Duplicate or invalid row")
+    assert scalar("SELECT COUNT(*) FROM orders") == orders + 1
+    assert scalar("SELECT COUNT(*) FROM orders WHERE order_id LIKE 'BAD-%'") == 0
+
+
+def test_a_rejected_header_rejects_the_rest_of_the_order(store, tmp_path):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    product_id = scalar("SELECT product_id FROM products LIMIT 1")
+    filename = write_csv(tmp_path / 'orders.csv', ORDER_COLUMNS, [
+        ['IMP-2', '2024-01-15', '2024-01-18', 'Teleport', customer_id, product_id, '1'],
+        ['IMP-2', '2024-01-15', '2024-01-18', 'First Class', customer_id, product_id, '1'],
+    ])
+    inserted, rejected, rejects_filename = store.bulk_import_csv('orders', filename)
+    assert (inserted, rejected) == (0, 2)
+    assert list(read_rejects(rejects_filename).values())[-1] == "Order rejected earlier in file"
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = 'IMP-2'") == 0
+
+
+def test_missing_columns_are_refused(db, tmp_path):
+    filename = write_csv(tmp_path / 'orders.csv', ORDER_COLUMNS[:-1], [])
+    with pytest.raises(ValueError, match="Missing columns: Quantity"):
+        db.bulk_import_csv('orders', filename)
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from conftest import scalar
+
+
+@pytest.fixture
+def wal_store(isolated, tmp_path):
+    """A seeded store in WAL mode, as the ingest server needs"""
+    isolated.open_database(str(tmp_path / 'ingest.db'), 'performance', stats=False)
+    isolated.generate_synthetic_data(100, seed=11)
+    return isolated
+
+
+@pytest.fixture
+def server(wal_store, tmp_path):
+    server = wal_store.IngestServer(str(tmp_path / 'ingest.db'), 'performance', readers=1)
+    server.open()
+    yield server
+    server.close()
+
+
+def order_request(server, order_id, fields=()):
+    request = {
+        'order_id': order_id, 'order_date': '2024-06-01', 'ship_date': '2024-06-04',
+        'ship_mode': 'Standard Class', 'customer_id': min(server.customer_ids),
+        'lines': [[product_id, 2] for product_id in sorted(server.prices)[:2]],
+    }
+    request.update(fields)
+    return request
+
+
+def test_a_duplicate_only_rejects_its_own_order(wal_store, server):
+    existing = scalar("SELECT order_id FROM orders LIMIT 1")
+    lines = scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = ?", (existing,))
+    batch = [wal_store.parse_order_request(order_request(server, order_id), server.customer_ids, server.prices)
+             for order_id in ['ING-1', existing, 'ING-2']]
+
+    errors = server.write_batch(batch)
+    assert errors[0] is None and errors[2] is None
+    assert 'UNIQUE' in errors[1]
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id IN ('ING-1', 'ING-2')") == 4
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = ?", (existing,)) == lines
+    assert wal_store.check_sales_summary() == []
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'ship_mode': 'Teleport'}, "Unknown ship mode"),
+    ({'customer_id': 'NO-SUCH'}, "Invalid Customer ID"),
+    ({'ship_date': '2024-05-01'}, "before order date"),
+    ({'lines': []}, "at least one line"),
+    ({'lines': [['NO-SUCH', 1]]}, "Invalid Product ID"),
+    ({'lines': [['SYN-P00001', 0]]}, "Invalid quantity"),
+    ({'order_id': ''}, "Missing fields: order_id"),
+])
+def test_invalid_requests_are_refused(wal_store, server, fields, message):
+    with pytest.raises(ValueError, match=message):
+        wal_store.parse_order_request(order_request(server, 'ING-3', fields), server.customer_ids, server.prices)
+
+
+def test_server_refuses_a_rollback_journal(db, tmp_path):
+    server = db.IngestServer(str(tmp_path / 'test.db'), 'default')
+    with pytest.raises(ValueError, match="needs a WAL database"):
+        server.open()
+    assert server.writer is None
+
+
+def test_load_test_round_trip(wal_store, tmp_path):
+    customer_ids = [row[0] for row in wal_store.cur.execute("SELECT customer_id FROM customers")]
+    product_ids = list(wal_store.get_product_catalog())
+    orders = scalar("SELECT COUNT(*) FROM orders")
+    socket = str(tmp_path / 'ingest.sock')
+
+    async def run():
+        server = wal_store.IngestServer(str(tmp_path / 'ingest.db'), 'performance', batch_size=8)
+        started = asyncio.Event()
+        serving = asyncio.create_task(server.serve(unix_socket=socket, ready=lambda address: started.set()))
+        await started.wait()
+        try:
+            return await wal_store.load_test(customer_ids, product_ids, orders=60, clients=5, unix_socket=socket)
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+    client_stats, server_stats = asyncio.run(run())
+    assert (client_stats['accepted'], client_stats['rejected']) == (60, 0)
+    assert server_stats['committed'] == 60
+    assert server_stats['batches'] < 60
+    assert scalar("SELECT COUNT(*) FROM orders") == orders + 60
+    assert wal_store.check_sales_summary() == []
@@ -0,0 +1,85 @@
+import sqlite3
+
+from conftest import scalar
+
+# The schema the program created before migrations: one product per order
+LEGACY_SCHEMA = """
+CREATE TABLE products(product_id VARCHAR(20) PRIMARY KEY, category VARCHAR(20), sub_category VARCHAR(20),
+                      product_name VARCHAR(100), unit_price FLOAT);
+CREATE TABLE customers(customer_id VARCHAR(20) PRIMARY KEY, customer_name VARCHAR(50), segment VARCHAR(20),
+                       country VARCHAR(50), city VARCHAR(50), state VARCHAR(50), postal_code VARCHAR(10),
+                       region VARCHAR(20));
+CREATE TABLE orders(order_id VARCHAR(20) PRIMARY KEY, order_date DATE, ship_date DATE, ship_mode VARCHAR(20),
+                    customer_id VARCHAR(20), product_id VARCHAR(20), quantity INT, discount FLOAT,
+                    sales FLOAT, profit FLOAT, gift_note TEXT);
+INSERT INTO products VALUES('PROD-001', 'Furniture', 'Chairs', 'Executive Leather Chair', 299.99);
+INSERT INTO customers VALUES('CUST-001', 'Ada Lovelace', 'Consumer', 'United States', 'Boston',
+                             'Massachusetts', '02108', 'East');
+INSERT INTO orders VALUES('ORD-001', '03/15/2023', '2023/03/18', 'First Class', 'CUST-001', 'PROD-001',
+                          2, 0.0, 599.98, 149.99, 'Happy birthday');
+INSERT INTO orders VALUES('ORD-002', '2023-04-01', 'soon', 'Same Day', 'CUST-001', 'PROD-001',
+                          1, 0.0, 299.99, 75.0, NULL);
+"""
+
+
+def open_test_database(superstore, path):
+    superstore.open_database(str(path), 'default', stats=False)
+    return superstore
+
+
+def test_fresh_database_is_current(isolated, tmp_path, capsys):
+    db = open_test_database(isolated, tmp_path / 'fresh.db')
+    assert scalar("PRAGMA user_version") == db.SCHEMA_VERSION
+    for table in ['products', 'customers', 'orders', 'order_lines', 'sales_summary', 'change_log',
+                  'sync_watermarks', 'purge_jobs', 'calendar', 'customers_fts', 'products_fts']:
+        assert db.table_exists(table), table
+    db.close_database()
+    capsys.readouterr()
+
+    # A current database runs no migration on the next open
+    open_test_database(isolated, tmp_path / 'fresh.db')
+    assert capsys.readouterr().out == ""
+
+
+def test_legacy_database_is_upgraded(isolated, tmp_path):
+    legacy = sqlite3.connect(tmp_path / 'legacy.db')
+    legacy.executescript(LEGACY_SCHEMA)
+    legacy.close()
+
+    db = open_test_database(isolated, tmp_path / 'legacy.db')
+    assert scalar("PRAGMA user_version") == db.SCHEMA_VERSION
+    # Headers keep their extra columns, with dates rewritten as ISO text where they can be read
+    assert db.cur.execute("SELECT * FROM orders ORDER BY order_id").fetchall() == [
+        ('ORD-001', '2023-03-15', '2023-03-18', 'First Class', 'CUST-001', 'Happy birthday', 3),
+        ('ORD-002', '2023-04-01', 'soon', 'Same Day', 'CUST-001', None, None),
+    ]
+    # Every old order became a one-line order
+    assert db.cur.execute("SELECT * FROM order_lines ORDER BY order_id").fetchall() == [
+        ('ORD-001', 1, 'PROD-001', 2, 0.0, 599.98, 149.99),
+        ('ORD-002', 1, 'PROD-001', 1, 0.0, 299.99, 75.0),
+    ]
+    assert db.check_sales_summary() == []
+    rows, total = db.search('customers', 'ada')
+    assert (rows[0][0], total) == ('CUST-001', 1)
+
+
+def test_running_purge_jobs_restart_by_order_id(isolated, tmp_path, monkeypatch):
+    # Stop just before purge cursors moved from rowids to Order IDs
+    with monkeypatch.context() as m:
+        m.setattr(isolated, 'MIGRATIONS', isolated.MIGRATIONS[:-1])
+        m.setattr(isolated, 'SCHEMA_VERSION', len(isolated.MIGRATIONS) - 1)
+        db = open_test_database(isolated, tmp_path / 'purge.db')
+        db.generate_synthetic_data(50, seed=3)
+        db.cur.executemany("""
+        INSERT INTO purge_jobs(kind, filters, last_rowid, high_rowid, deleted, status, started_at, finished_at)
+        VALUES(?, '{}', ?, ?, ?, ?, '2024-01-01 10:00:00', ?)
+        """, [('orders', 20, 80, 5, 'running', None), ('customer', 90, 90, 12, 'done', '2024-01-01 10:01:00')])
+        db.con.commit()
+        db.close_database()
+
+    db = open_test_database(isolated, tmp_path / 'purge.db')
+    assert scalar("PRAGMA user_version") == db.SCHEMA_VERSION
+    highest = scalar("SELECT MAX(order_id) FROM orders")
+    assert db.cur.execute("""
+    SELECT kind, last_key, high_key, deleted, status FROM purge_jobs ORDER BY job_id
+    """).fetchall() == [('orders', '', highest, 5, 'running'), ('customer', None, None, 12, 'done')]
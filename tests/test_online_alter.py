@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+from conftest import scalar
+
+
+def schema_of(superstore, table_name):
+    """Index and trigger definitions on table_name"""
+    return sorted(superstore.cur.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger')",
+        (table_name,)).fetchall())
+
+
+def leftovers(superstore):
+    return scalar("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE ?", (f"%{superstore.REBUILD_SUFFIX}%",))
+
+
+def test_writes_during_the_copy_reach_the_new_table(store, tmp_path, monkeypatch):
+    before = schema_of(store, 'customers')
+    first, last = store.cur.execute("SELECT MIN(customer_id), MAX(customer_id) FROM customers").fetchone()
+    customers = scalar("SELECT COUNT(*) FROM customers")
+
+    # A clerk on another connection writes between every batch
+    clerk = sqlite3.connect(tmp_path / 'test.db')
+    pauses = []
+    def write_between_batches(seconds):
+        n = len(pauses)
+        pauses.append(seconds)
+        with clerk:
+            clerk.execute("INSERT INTO customers VALUES(?, ?, 'Consumer', 'United States', 'Austin', 'Texas',"
+                          " '73301', 'South')", (f"ALT-{n:03}", f"Added During Copy {n}"))
+            clerk.execute("UPDATE customers SET customer_name = ? WHERE customer_id IN (?, ?)",
+                          (f"Renamed {n}", first, last))
+            clerk.execute("DELETE FROM customers WHERE customer_id = ?", (f"ALT-{n - 1:03}",))
+    monkeypatch.setattr(store.time, 'sleep', write_between_batches)
+
+    copied = store.online_alter('customers', types={'postal_code': 'TEXT'}, not_null=['customer_name'],
+                                batch_size=25)
+    clerk.close()
+    batches = len(pauses)
+    assert batches > 2
+    assert copied >= customers
+
+    assert scalar("SELECT COUNT(*) FROM customers") == customers + 1
+    assert scalar("SELECT customer_id FROM customers WHERE customer_id LIKE 'ALT-%'") == f"ALT-{batches - 1:03}"
+    assert {row[0] for row in store.cur.execute("SELECT customer_name FROM customers WHERE customer_id IN (?, ?)",
+                                               (first, last))} == {f"Renamed {batches - 1}"}
+    columns = {row[1]: (row[2], row[3]) for row in store.cur.execute("PRAGMA table_info(customers)")}
+    assert columns['postal_code'] == ('TEXT', 0)
+    assert columns['customer_name'][1] == 1
+
+    # Indexes and triggers come across, so search and the change log keep working
+    assert schema_of(store, 'customers') == before
+    assert leftovers(store) == 0
+    rows, _ = store.search('customers', 'renamed')
+    assert {row[0] for row in rows} == {first, last}
+    with pytest.raises(sqlite3.IntegrityError):
+        store.cur.execute("INSERT INTO customers(customer_id) VALUES('ALT-NULL')")
+    store.con.rollback()
+
+
+def test_rows_breaking_a_new_constraint_stop_it_up_front(store):
+    store.cur.execute("UPDATE customers SET city = NULL WHERE customer_id = (SELECT MIN(customer_id) FROM customers)")
+    store.con.commit()
+    with pytest.raises(ValueError, match="1 customers rows have no city"):
+        store.online_alter('customers', not_null=['city'])
+    with pytest.raises(ValueError, match="cannot be dropped"):
+        store.online_alter('customers', drop=['region'])
+    assert leftovers(store) == 0
+
+
+def test_an_interrupted_copy_leaves_the_table_as_it_was(store, monkeypatch):
+    before = store.cur.execute("SELECT * FROM order_lines ORDER BY rowid").fetchall()
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(store.time, 'sleep', interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        store.online_alter('order_lines', checks=['quantity > 0'], batch_size=50)
+    assert store.cur.execute("SELECT * FROM order_lines ORDER BY rowid").fetchall() == before
+    assert leftovers(store) == 0
+    assert "CHECK" not in scalar("SELECT sql FROM sqlite_master WHERE name = 'order_lines'")
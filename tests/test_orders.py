@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+from conftest import scalar
+
+
+@pytest.fixture
+def parties(store):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    products = store.cur.execute("SELECT product_id, unit_price FROM products LIMIT 2").fetchall()
+    return customer_id, products
+
+
+def test_basket_lines_are_numbered_and_priced(store, parties):
+    customer_id, [(first, first_price), (second, second_price)] = parties
+    financials = store.add_basket('BSK-1', '2024-05-02', '2024-05-06', 'Second Class', customer_id,
+                                  [(first, 4), (second, 30)])
+    assert financials == [(first_price,) + store.calculate_financials(4, first_price),
+                          (second_price,) + store.calculate_financials(30, second_price)]
+    assert store.cur.execute("""
+    SELECT line_number, product_id, quantity FROM order_lines WHERE order_id = 'BSK-1' ORDER BY line_number
+    """).fetchall() == [(1, first, 4), (2, second, 30)]
+
+
+@pytest.mark.parametrize('second_line, message', [
+    (None, "at least one product"),
+    (('NO-SUCH', 1), "Invalid Product ID 'NO-SUCH'"),
+    (('SECOND', 0), "Invalid quantity 0"),
+    (('SECOND', -3), "Invalid quantity -3"),
+])
+def test_a_bad_basket_leaves_nothing_behind(store, parties, second_line, message):
+    customer_id, products = parties
+    if second_line is None:
+        lines = []
+    else:
+        product, quantity = second_line
+        lines = [(products[0][0], 1), (products[1][0] if product == 'SECOND' else product, quantity)]
+    with pytest.raises(ValueError, match=message):
+        store.add_basket('BSK-2', '2024-05-02', '2024-05-06', 'Second Class', customer_id, lines)
+    assert scalar("SELECT COUNT(*) FROM orders WHERE order_id = 'BSK-2'") == 0
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = 'BSK-2'") == 0
+
+
+def test_a_duplicate_order_id_rolls_the_basket_back(store, parties):
+    customer_id, products = parties
+    existing = scalar("SELECT order_id FROM orders LIMIT 1")
+    lines = scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = ?", (existing,))
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_basket(existing, '2024-05-02', '2024-05-06', 'Second Class', customer_id,
+                         [(products[0][0], 1)])
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id = ?", (existing,)) == lines
+    assert store.check_sales_summary() == []
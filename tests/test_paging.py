@@ -0,0 +1,54 @@
+import builtins
+
+from conftest import scalar
+
+
+def walk_forward(superstore, page_size):
+    pages = []
+    page = superstore.fetch_orders_page(page_size=page_size)
+    while page:
+        pages.append(page)
+        page = superstore.fetch_orders_page(after=page[-1][:2], page_size=page_size)
+    return pages
+
+
+def test_pages_cover_every_line_in_key_order(store):
+    pages = walk_forward(store, 37)
+    keys = [row[:2] for page in pages for row in page]
+    assert keys == sorted(keys)
+    assert len(keys) == len(set(keys)) == scalar("SELECT COUNT(*) FROM order_lines")
+    assert all(len(page) == 37 for page in pages[:-1])
+
+
+def test_previous_page_returns_the_page_before(store):
+    pages = walk_forward(store, 25)
+    for before, current in zip(pages, pages[1:]):
+        assert store.fetch_orders_page(before=current[0][:2], page_size=25) == before
+    assert store.fetch_orders_page(before=pages[0][0][:2], page_size=25) == []
+
+
+def test_count_follows_the_joined_rows(store):
+    lines = scalar("SELECT COUNT(*) FROM order_lines")
+    assert store.count_order_details() == lines
+    # A line whose product has gone is not shown, so it must not be counted either
+    store.cur.execute("PRAGMA foreign_keys = OFF")
+    product_id, count = store.cur.execute(
+        "SELECT product_id, COUNT(*) FROM order_lines GROUP BY product_id ORDER BY 2 LIMIT 1").fetchone()
+    store.cur.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+    store.con.commit()
+    assert store.count_order_details() == lines - count
+    assert sum(len(page) for page in walk_forward(store, 50)) == lines - count
+
+    order_id = scalar("SELECT order_id FROM orders ORDER BY order_id LIMIT 1 OFFSET 100")
+    shown_before = [row for page in walk_forward(store, 50) for row in page if row[0] < order_id]
+    assert store.count_order_details(before=order_id) == len(shown_before)
+
+
+def test_go_to_page_matches_paging_forward(store, monkeypatch, capsys):
+    pages = walk_forward(store, store.PAGE_SIZE)
+    commands = iter(["g 4", "q"])
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': next(commands))
+    store.show_orders_paged()
+    output = capsys.readouterr().out
+    assert f"(page 4 of {len(pages)})" in output
+    assert pages[3][0][0] in output
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import superstore
+
+# Prices on and either side of each margin tier, and prices whose totals
+# land exactly on a half cent, where rounding is easiest to get wrong
+BOUNDARY_PRICES = [0.01, 0.125, 0.145, 1.005, 1.115, 2.675, 10.005, 99.99, 100.0, 100.01,
+                   499.99, 500.0, 500.01, 1000.005]
+# Every discount tier threshold and its neighbours
+BOUNDARY_QUANTITIES = list(range(0, 12)) + [19, 20, 21, 49, 50, 51, 100, 120]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run a test on the NumPy path and again on the pure-Python fallback"""
+    if request.param == 'numpy':
+        if superstore.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(superstore, 'np', None)
+    return request.param
+
+
+def assert_parity(quantities, prices):
+    discounts, sales, profits = superstore.calculate_financials_batch(quantities, prices)
+    assert len(discounts) == len(sales) == len(profits) == len(quantities)
+    for i, (quantity, unit_price) in enumerate(zip(quantities, prices)):
+        expected = superstore.calculate_financials(quantity, unit_price)
+        actual = (float(discounts[i]), float(sales[i]), float(profits[i]))
+        assert actual == expected, f"quantity {quantity}, unit price {unit_price}"
+
+
+def test_tier_boundaries(backend):
+    quantities = [q for q in BOUNDARY_QUANTITIES for _ in BOUNDARY_PRICES]
+    prices = BOUNDARY_PRICES * len(BOUNDARY_QUANTITIES)
+    assert_parity(quantities, prices)
+
+
+def test_half_cent_ties(backend):
+    # One unit below the first discount tier, so sales and profit are price
+    # and price * margin, rounded from an exact .5 of a cent where possible
+    prices = [cents / 1000 for cents in range(5, 20000, 10)]
+    assert_parity([1] * len(prices), prices)
+    assert_parity([3] * len(prices), prices)
+
+
+def test_random_orders(backend):
+    rng = random.Random(42)
+    quantities = [rng.randint(0, 500) for _ in range(20000)]
+    prices = [round(rng.uniform(0, 2000), 2) for _ in range(20000)]
+    assert_parity(quantities, prices)
+
+
+def test_accepts_any_sequence(backend):
+    from array import array
+    quantities, prices = array('q', [1, 5, 50]), array('d', [2.675, 100.0, 500.0])
+    assert_parity(quantities, prices)
+
+
+def test_empty_batch(backend):
+    assert [len(column) for column in superstore.calculate_financials_batch([], [])] == [0, 0, 0]
+
+
+def test_round_batch_matches_round_on_ties():
+    np = pytest.importorskip('numpy')
+    values = np.array([0.125, 0.375, 1.005, 2.675, 1.115, 10.005, 0.145, 2.5])
+    assert [float(v) for v in superstore.round_batch(values)] == [round(float(v), 2) for v in values]
@@ -0,0 +1,86 @@
+import pytest
+from conftest import scalar
+
+
+def busiest(superstore, column, table_name):
+    return scalar(f"SELECT {column} FROM {table_name} GROUP BY {column} ORDER BY COUNT(*) DESC LIMIT 1")
+
+
+def test_purge_deletes_what_the_dry_run_counted(store):
+    filters = {'ship_mode': 'Standard Class', 'order_date_to': '2022-12-31'}
+    expected = store.count_purge('orders', filters)
+    others = scalar("SELECT COUNT(*) FROM orders") - expected
+    assert expected > 0
+
+    job_id, deleted = store.purge('orders', filters, batch_size=7, pause=0)
+    assert deleted == expected
+    assert store.count_purge('orders', filters) == 0
+    assert scalar("SELECT COUNT(*) FROM orders") == others
+    assert scalar("SELECT COUNT(*) FROM order_lines WHERE order_id NOT IN (SELECT order_id FROM orders)") == 0
+    assert store.purge_jobs()[0][:5] == (job_id, 'orders', '{"ship_mode": "Standard Class", '
+                                         '"order_date_to": "2022-12-31"}', expected, 'done')
+    assert store.check_sales_summary() == []
+
+
+def test_an_interrupted_purge_resumes_after_a_vacuum(store, monkeypatch):
+    filters = {'region': 'West'}
+    expected = store.count_purge('orders', filters)
+    job_id = store.create_purge('orders', filters)
+
+    chunks = []
+    def stop_after_three_chunks(seconds):
+        chunks.append(seconds)
+        if len(chunks) == 3:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(store.time, 'sleep', stop_after_three_chunks)
+    with pytest.raises(KeyboardInterrupt):
+        store.run_purge(job_id, batch_size=10)
+    _, _, _, deleted, status, _, _ = store.purge_jobs(unfinished=True)[0]
+    assert (deleted, status) == (30, 'running')
+
+    # Other deletes and a VACUUM renumber rowids; the Order ID cursor is unaffected
+    store.cur.execute("DELETE FROM orders WHERE order_id IN (SELECT order_id FROM orders ORDER BY order_id LIMIT 5)")
+    store.con.commit()
+    store.cur.execute("VACUUM")
+    remaining = store.count_purge('orders', filters)
+
+    monkeypatch.setattr(store.time, 'sleep', lambda seconds: None)
+    assert store.run_purge(job_id, batch_size=10) == 30 + remaining
+    assert 30 + remaining <= expected
+    assert store.count_purge('orders', filters) == 0
+    assert store.purge_jobs(unfinished=True) == []
+
+
+def test_customer_purge_sweeps_orders_added_while_it_ran(store, monkeypatch):
+    customer_id = busiest(store, 'customer_id', 'orders')
+    product_id = scalar("SELECT product_id FROM products LIMIT 1")
+    # A clerk keeps taking orders for the customer, on both sides of the cursor
+    added = iter(['AAA-0001', 'ZZZ-0001', 'AAA-0002', 'ZZZ-0002'])
+    def add_order_between_chunks(seconds):
+        order_id = next(added, None)
+        if order_id:
+            store.add_order(order_id, '2024-01-02', '2024-01-05', 'Same Day', customer_id, product_id, 1)
+    monkeypatch.setattr(store.time, 'sleep', add_order_between_chunks)
+
+    store.purge('customer', {'customer_id': customer_id}, batch_size=1)
+    assert next(added, None) is None
+    assert scalar("SELECT COUNT(*) FROM orders WHERE customer_id = ?", (customer_id,)) == 0
+    assert scalar("SELECT COUNT(*) FROM customers WHERE customer_id = ?", (customer_id,)) == 0
+    assert store.check_sales_summary() == []
+
+
+def test_product_purge_drops_orders_left_empty(store):
+    product_id = busiest(store, 'product_id', 'order_lines')
+    orders = {row[0]: row[1] for row in store.cur.execute("""
+    SELECT order_id, SUM(product_id <> ?) FROM order_lines
+    WHERE order_id IN (SELECT order_id FROM order_lines WHERE product_id = ?) GROUP BY order_id
+    """, (product_id, product_id))}
+    lines = store.count_purge('product', {'product_id': product_id})
+
+    _, deleted = store.purge('product', {'product_id': product_id}, batch_size=3, pause=0)
+    assert deleted == lines
+    kept = {row[0] for row in store.cur.execute(
+        f"SELECT order_id FROM orders WHERE order_id IN ({', '.join('?' * len(orders))})", list(orders))}
+    assert kept == {order_id for order_id, other_lines in orders.items() if other_lines}
+    assert product_id not in store.get_product_catalog()
+    assert store.check_sales_summary() == []
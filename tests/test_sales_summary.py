@@ -0,0 +1,57 @@
+import pytest
+from conftest import scalar
+
+
+def summary_rows(superstore):
+    return superstore.cur.execute(f"SELECT * FROM sales_summary ORDER BY {superstore.SUMMARY_KEY}").fetchall()
+
+
+def test_generated_store_matches_a_rebuild(store):
+    assert store.check_sales_summary() == []
+    maintained = summary_rows(store)
+    store.rebuild_sales_summary()
+    rebuilt = summary_rows(store)
+    # Keys, order counts and quantities match exactly; sales and profit up to float rounding
+    assert [row[:8] for row in rebuilt] == [row[:8] for row in maintained]
+    assert [row[8:] for row in rebuilt] == [pytest.approx(row[8:]) for row in maintained]
+
+
+def test_triggers_follow_inserts_updates_and_deletes(store):
+    customer_id = scalar("SELECT customer_id FROM customers LIMIT 1")
+    product_ids = [row[0] for row in store.cur.execute("SELECT product_id FROM products LIMIT 3")]
+    store.add_basket('SUM-1', '2024-02-29', '2024-03-02', 'Same Day', customer_id,
+                     [(product_ids[0], 2), (product_ids[1], 7)])
+    assert store.check_sales_summary() == []
+
+    # Moving an order into another month and ship mode
+    store.apply_update('orders', 'order_date', '2024-03-01', ["t.order_id = ?"], ['SUM-1'])
+    store.apply_update('orders', 'ship_mode', 'Standard Class', ["t.order_id = ?"], ['SUM-1'])
+    assert store.check_sales_summary() == []
+
+    # Repricing and reassigning lines
+    store.apply_update('order_lines', 'quantity', 11, ["t.order_id = ?"], ['SUM-1'])
+    store.apply_update('order_lines', 'product_id', product_ids[2], ["t.order_id = ?", "t.line_number = 1"], ['SUM-1'])
+    assert store.check_sales_summary() == []
+
+    # Dimensions changed on the customer and product themselves
+    store.apply_update('customers', 'segment', 'Home Office', ["t.customer_id = ?"], [customer_id])
+    store.apply_update('customers', 'region', 'South', ["t.customer_id = ?"], [customer_id])
+    store.apply_update('products', 'category', 'Technology', ["t.product_id = ?"], [product_ids[1]])
+    assert store.check_sales_summary() == []
+
+    assert store.delete_order('SUM-1')
+    store.delete_product(product_ids[0])
+    store.delete_customer(scalar("SELECT customer_id FROM orders ORDER BY order_id DESC LIMIT 1"))
+    assert store.check_sales_summary() == []
+    assert scalar("SELECT COUNT(*) FROM sales_summary WHERE order_count <= 0") == 0
+
+
+def test_check_reports_a_drifted_bucket(store):
+    store.cur.execute("UPDATE sales_summary SET sales = sales + 5 WHERE rowid = (SELECT MIN(rowid) FROM sales_summary)")
+    store.con.commit()
+    differences = store.check_sales_summary()
+    assert len(differences) == 1
+    key, want, got = differences[0]
+    assert got[2] == pytest.approx(want[2] + 5)
+    store.rebuild_sales_summary()
+    assert store.check_sales_summary() == []
@@ -0,0 +1,59 @@
+import pytest
+from conftest import scalar
+
+
+def customer_ids(superstore, text):
+    rows, _ = superstore.search('customers', text, limit=1000)
+    return [row[0] for row in rows]
+
+
+def test_customer_index_follows_inserts_updates_and_deletes(store):
+    store.add_customer('FTS-1', 'Zoë Müller', 'Consumer', 'Switzerland', 'Zürich', 'Zürich', '8001', 'North')
+    assert 'FTS-1' in customer_ids(store, 'zoe mul')
+    assert 'FTS-1' in customer_ids(store, 'zuri')
+
+    conditions, params = store.bulk_conditions('customers', {'country': 'Switzerland'})
+    store.apply_update('customers', 'customer_name', 'Quentin Quibble', conditions, params)
+    assert customer_ids(store, 'zoe') == []
+    assert customer_ids(store, 'quib') == ['FTS-1']
+
+    store.delete_customer('FTS-1')
+    assert customer_ids(store, 'quib') == []
+    assert scalar("SELECT COUNT(*) FROM customers_fts") == scalar("SELECT COUNT(*) FROM customers")
+
+
+def test_product_search_follows_reclassification(store):
+    product_id = scalar("SELECT product_id FROM products WHERE category = 'Furniture' LIMIT 1")
+    assert product_id in store.search_products('furn')
+    assert product_id in store.search_products('', category='Furniture')
+
+    store.apply_update('products', 'category', 'Technology', ["t.product_id = ?"], [product_id])
+    assert product_id not in store.search_products('furn')
+    assert product_id in store.search_products('tech', category='Technology')
+
+
+def test_best_matches_come_first(store):
+    store.add_customer('FTS-2', 'Harriet Harrison', 'Corporate', 'United States', 'Harrisburg', 'Pennsylvania',
+                       '17101', 'East')
+    store.add_customer('FTS-3', 'Ann Harrison', 'Corporate', 'United States', 'Dover', 'Delaware', '19901', 'East')
+    assert customer_ids(store, 'harri')[0] == 'FTS-2'
+
+
+def test_searches_past_the_rank_limit_are_not_counted(store, monkeypatch):
+    matches = len(customer_ids(store, 'a'))
+    monkeypatch.setattr(store, 'SEARCH_RANK_LIMIT', matches - 1)
+    rows, total = store.search('customers', 'a', limit=10)
+    assert total is None
+    # Unranked matches come in table order
+    assert rows == store.cur.execute("""
+    SELECT c.* FROM customers c WHERE c.rowid IN (SELECT rowid FROM customers_fts WHERE customers_fts MATCH ?)
+    ORDER BY c.rowid LIMIT 10
+    """, (store.search_query('a'),)).fetchall()
+
+
+def test_queries_without_words(store):
+    with pytest.raises(ValueError, match="Enter some letters or digits"):
+        store.search('customers', '"*-')
+    assert store.search_products('"*-') == []
+    with pytest.raises(ValueError, match="Cannot search 'orders'"):
+        store.search('orders', 'x')